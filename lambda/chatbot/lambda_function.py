@@ -14,8 +14,9 @@ from pinecone import Pinecone
 
 # Import thư viện Tử Vi
 try:
-    from lasotuvi import App, DiaBan
     from lasotuvi.AmDuong import diaChi
+    from lasotuvi.battu import tuTru
+    from lasotuvi.chartcache import DynamoDBStore, getChartCache, lapLaSo
     HAS_TUVI = True
 except ImportError:
     HAS_TUVI = False
@@ -29,12 +30,16 @@ BEDROCK_LLM_MODEL_ID = os.environ.get("BEDROCK_LLM_MODEL_ID", "amazon.nova-micro
 BEDROCK_EMBED_MODEL_ID = os.environ.get("BEDROCK_EMBED_MODEL_ID", "cohere.embed-multilingual-v3")
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY")
 PINECONE_HOST = os.environ.get("PINECONE_HOST")
+# Bảng lưu lá số Tử Vi dùng chung với dịch vụ metaphysical, bỏ trống thì chỉ giữ trong tiến trình
+TUVI_CHART_TABLE = os.environ.get("TUVI_CHART_TABLE")
 
 # =========================
 # II. GLOBAL CLIENTS
 # =========================
 dynamodb = boto3.resource("dynamodb")
 ddb_table = dynamodb.Table(DDB_MESSAGE_TABLE)
+if HAS_TUVI and TUVI_CHART_TABLE:
+    getChartCache().store = DynamoDBStore(dynamodb.Table(TUVI_CHART_TABLE))
 bedrock = boto3.client("bedrock-runtime")
 
 pc_index = None
@@ -95,13 +100,15 @@ def calculate_tuvi(d: int, m: int, y: int, h_str: str, gender: int) -> dict:
         gio_chi = int((hour_val + 1) / 2) % 12
         if gio_chi == 0: gio_chi = 12
         
-        db = App.lapDiaBan(DiaBan.diaBan, d, m, y, gio_chi, gender, True, 7)
-        cung_menh = db.thapNhiCung[db.cungMenh]
-        chinh_tinh = [s['saoTen'] for s in cung_menh.cungSao if s['saoLoai'] == 1]
+        # Lá số lấy từ bộ nhớ đệm dùng chung, không dựng cả Địa Bàn
+        chart = lapLaSo(d, m, y, gio_chi, gender, True, 7)
+        cung_menh = chart.palace("Mệnh", groups={"chinh_tinh"})
+        chinh_tinh = [s['saoTen'] for s in cung_menh.cungSao]
         
         return {
             "menh_tai": diaChi[cung_menh.cungSo]['tenChi'],
-            "chinh_tinh": ", ".join(chinh_tinh) if chinh_tinh else "Vô Chính Diệu"
+            "chinh_tinh": ", ".join(chinh_tinh) if chinh_tinh else "Vô Chính Diệu",
+            "bat_tu": ", ".join(tru.ten for tru in tuTru(d, m, y, gio_chi, 7))
         }
     except: return {}
 
@@ -168,7 +175,7 @@ def process_subject_data(intent: dict, user_ctx: dict, partner_ctx: dict) -> dic
                 gender = 1 if user_ctx.get("gender") == "Nam" else -1
                 tv = calculate_tuvi(d, m, y, user_ctx["birth_time"], gender)
             
-            tv_str = f", Mệnh {tv.get('menh_tai')}" if tv else ""
+            tv_str = f", Mệnh {tv.get('menh_tai')}, Bát tự {tv.get('bat_tu')}" if tv else ""
             # Thêm thông tin raw để LLM biết nếu user hỏi "Tôi là ai"
             result["prompt_context"] += f"- [USER DATA - {user_ctx.get('name', 'Bạn')}]: Sinh ngày {user_ctx.get('birth_date')}. Số chủ đạo {lp}, Cung {zd}{tv_str}.\n"
             
@@ -2,6 +2,9 @@
 """
 (c) 2016 doanguyen <dungnv2410@gmail.com>.
 """
+from collections import namedtuple
+from types import MappingProxyType
+
 from lasotuvi.AmDuong import nguHanh
 
 
@@ -206,3 +209,41 @@ saoHoaCai = Sao(105, "Hoa cái", "K", 14)
 saoVanTinh = Sao(106, "Văn tinh", "H", 6)
 saoDauQuan = Sao(107, "Đẩu quân", "H", 5)
 saoThienKhong = Sao(108, "Thiên không", "T", 11)
+
+
+# Thông tin tĩnh của các sao, chỉ đọc, dùng chung cho mọi lá số
+SAO_THEO_ID = MappingProxyType({
+    sao.saoID: MappingProxyType({thuocTinh: giaTri for thuocTinh, giaTri
+                                 in vars(sao).items()
+                                 if thuocTinh != 'saoDacTinh'})
+    for sao in list(globals().values()) if isinstance(sao, Sao)})
+
+
+class SaoCung(namedtuple('SaoCung', ['saoID', 'cungSo', 'saoDacTinh'])):
+    """Vị trí của một sao trên một lá số: (saoID, cungSo, saoDacTinh)
+
+    Bất biến và riêng cho từng lá số nên có thể dựng lá số song song.
+    Vẫn đọc được như dict cũ (sao['saoTen'], sao.get('saoLoai')), các
+    thuộc tính tĩnh được tra từ SAO_THEO_ID.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key == 'saoID':
+                return self.saoID
+            if key == 'saoDacTinh':
+                return self.saoDacTinh
+            if key == 'cungSo':
+                return self.cungSo
+            return SAO_THEO_ID[self.saoID][key]
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(SAO_THEO_ID[self.saoID].keys()) + ['saoDacTinh']
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Atlas lá số: toàn bộ Địa Bàn tính sẵn, đọc qua mmap.
+
+Một Địa Bàn do App.lapDiaBan dựng ra chỉ phụ thuộc vào ngày âm (1-30),
+tháng âm (1-12), can chi năm (60), chi giờ sinh (12) và giới tính (2),
+tức 518.400 lá số. Atlas lưu mỗi lá số thành một bản ghi cố định:
+
+    0           cung Mệnh
+    1           cung Thân
+    2..14       đại hạn của 13 phần tử thapNhiCung
+    15..27      khoảng cách tiểu hạn của 13 phần tử thapNhiCung
+    28, 29      hai cung Tuần
+    30, 31      hai cung Triệt
+    32..        cung của từng sao, theo đúng thứ tự lapDiaBan nhập sao
+
+Đặc tính (miếu, vượng,...) của sao chỉ phụ thuộc vào sao và cung nên
+được tra lại từ DiaBan.timDacTinh khi đọc, không cần lưu.
+
+Dựng atlas (chạy offline):
+    python -m lasotuvi.atlas atlas.bin --workers 8
+
+Atlas dành cho công cụ offline (chimuc, thống kê, xử lý hàng loạt):
+lapDiaBan của module này đọc atlas khi biến môi trường TUVI_ATLAS_PATH trỏ
+tới file và tính lại bằng App.lapDiaBan với bản ghi atlas chưa có. Các
+Lambda không đọc atlas mà dùng chartcache.
+"""
+import argparse
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from lasotuvi import App
+from lasotuvi.AmDuong import diaChi, ngayThangNam, ngayThangNamCanChi
+from lasotuvi.bitset import LaSoBit
+from lasotuvi.DiaBan import diaBan, timDacTinh
+from lasotuvi.Sao import SAO_THEO_ID, SaoCung
+from lasotuvi.tables import SO_SAO
+
+MAGIC = b'TVATLAS\x00'
+VERSION = 1
+HEADER_SIZE = 256
+_HEADER = struct.Struct('<8sHHHI')
+
+SO_NGAY, SO_THANG, SO_CAN_CHI, SO_GIO, SO_GIOI_TINH = 30, 12, 60, 12, 2
+SO_LA_SO = SO_NGAY * SO_THANG * SO_CAN_CHI * SO_GIO * SO_GIOI_TINH
+
+_CUNG_MENH, _CUNG_THAN, _DAI_HAN, _TIEU_HAN, _TUAN, _TRIET, _SAO = \
+    0, 1, 2, 15, 28, 30, 32
+
+
+def canChiIndex(canNam, chiNam):
+    """Số thứ tự 0-59 trong hoa giáp của cặp can chi (Giáp Tý = 0)"""
+    return ((canNam - 1) * 6 - (chiNam - 1) * 5) % 60
+
+
+def recordIndex(ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh):
+    index = (ngayAm - 1) * SO_THANG + (thangAm - 1)
+    index = index * SO_CAN_CHI + canChiIndex(canNam, chiNam)
+    index = index * SO_GIO + (gioSinh - 1)
+    return index * SO_GIOI_TINH + (0 if gioiTinh == 1 else 1)
+
+
+def recordSignature(index):
+    """Ngược lại của recordIndex: (ngayAm, thangAm, canNam, chiNam, gioSinh,
+    gioiTinh)"""
+    index, gioiTinh = divmod(index, SO_GIOI_TINH)
+    index, gioSinh = divmod(index, SO_GIO)
+    index, canChi = divmod(index, SO_CAN_CHI)
+    ngayAm, thangAm = divmod(index, SO_THANG)
+    return (ngayAm + 1, thangAm + 1, canChi % 10 + 1, canChi % 12 + 1,
+            gioSinh + 1, 1 if gioiTinh == 0 else -1)
+
+
+class _NgayAm(object):
+    """Dữ kiện tối thiểu để lapDiaBan dựng lá số từ ngày âm và can chi"""
+
+    def __init__(self, ngayAm, thangAm, canNam, chiNam):
+        self.ngayAm, self.thangAm, self.namAm = ngayAm, thangAm, None
+        self.canThang, self.canNam, self.chiNam = None, canNam, chiNam
+
+
+class _diaBanGhi(diaBan):
+    """Địa bàn chỉ ghi lại thứ tự nhập sao, Tuần và Triệt"""
+
+    def __init__(self, thangSinhAmLich, gioSinhAmLich):
+        super(_diaBanGhi, self).__init__(thangSinhAmLich, gioSinhAmLich)
+        self.thuTuSao = []
+
+    def nhapSao(self, cungSo, *args):
+        for sao in args:
+            self.thuTuSao.append((sao.saoID, cungSo))
+        return self
+
+    def nhapTuan(self, *args):
+        self.tuan = args
+        return self
+
+    def nhapTriet(self, *args):
+        self.triet = args
+        return self
+
+
+def _ghiLaSo(ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh):
+    return App.lapDiaBan(_diaBanGhi, ngayAm, thangAm, None, gioSinh,
+                         gioiTinh, False, 7,
+                         dateFacts=_NgayAm(ngayAm, thangAm, canNam, chiNam))
+
+
+def encodeRecord(ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh):
+    """Bản ghi atlas của một lá số
+
+    Returns:
+        tuple: (danh sách saoID theo thứ tự nhập, bytes của bản ghi)
+    """
+    db = _ghiLaSo(ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh)
+    record = bytearray([db.cungMenh, db.cungThan])
+    record += bytes(cung.cungDaiHan for cung in db.thapNhiCung)
+    record += bytes(_TEN_CHI.index(cung.cungTieuHan)
+                    for cung in db.thapNhiCung)
+    record += bytes(db.tuan) + bytes(db.triet)
+    record += bytes(cungSo for _, cungSo in db.thuTuSao)
+    return [saoID for saoID, _ in db.thuTuSao], bytes(record)
+
+
+def _encodeDay(ngayAm):
+    """Các bản ghi liền nhau của một ngày âm (một tác vụ của builder)"""
+    chunk = bytearray()
+    for thangAm in range(1, SO_THANG + 1):
+        for canChi in range(SO_CAN_CHI):
+            for gioSinh in range(1, SO_GIO + 1):
+                for gioiTinh in (1, -1):
+                    chunk += encodeRecord(ngayAm, thangAm, canChi % 10 + 1,
+                                          canChi % 12 + 1, gioSinh,
+                                          gioiTinh)[1]
+    return ngayAm, bytes(chunk)
+
+
+def thuTuSao():
+    """Danh sách saoID theo thứ tự lapDiaBan nhập sao"""
+    return encodeRecord(1, 1, 1, 1, 1, 1)[0]
+
+
+def writeHeader(f, saoIDs):
+    recordSize = _SAO + len(saoIDs)
+    header = _HEADER.pack(MAGIC, VERSION, len(saoIDs), recordSize,
+                          SO_LA_SO) + bytes(saoIDs)
+    f.write(header.ljust(HEADER_SIZE, b'\x00'))
+    return recordSize
+
+
+def buildAtlas(path, workers=None):
+    """Tính toàn bộ 518.400 lá số và ghi ra file atlas
+
+    Args:
+        path (str): Đường dẫn file atlas
+        workers (int, optional): Số tiến trình, mặc định theo số CPU
+    """
+    saoIDs = thuTuSao()
+    with open(path, 'wb') as f:
+        recordSize = writeHeader(f, saoIDs)
+        f.truncate(HEADER_SIZE + SO_LA_SO * recordSize)
+        with ProcessPoolExecutor(workers) as executor:
+            for ngayAm, chunk in executor.map(_encodeDay,
+                                              range(1, SO_NGAY + 1)):
+                f.seek(HEADER_SIZE + recordIndex(ngayAm, 1, 1, 1, 1, 1)
+                       * recordSize)
+                f.write(chunk)
+
+
+_TEN_CHI = [chi['tenChi'] for chi in diaChi[1:]]
+
+
+def _bangSaoCung():
+    """SaoCung dựng sẵn cho mọi cặp (saoID, cungSo), dùng chung mọi lá số"""
+    return {(saoID, cungSo): SaoCung(saoID, cungSo,
+                                     timDacTinh(saoID, cungSo))
+            for saoID in SAO_THEO_ID for cungSo in range(1, 13)}
+
+
+class ChartAtlas(object):
+    """Đọc atlas lá số qua mmap, dựng lại Địa Bàn với chi phí O(1)"""
+
+    def __init__(self, path):
+        super(ChartAtlas, self).__init__()
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, soSao, self.recordSize, soLaSo = \
+            _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or soLaSo != SO_LA_SO:
+            raise Exception("File atlas không hợp lệ: %s" % path)
+        start = _HEADER.size
+        self.saoThuTu = list(self._mm[start:start + soSao])
+        self._saoCung = _bangSaoCung()
+
+    def record(self, ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh):
+        offset = HEADER_SIZE + self.recordSize * recordIndex(
+            ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh)
+        return self._mm[offset:offset + self.recordSize]
+
+    def lapDiaBan(self, diaBan, ngayAm, thangAm, canNam, chiNam, gioSinh,
+                  gioiTinh):
+        """Dựng lại Địa Bàn giống hệt App.lapDiaBan từ bản ghi atlas
+
+        Raises:
+            KeyError: Bản ghi chưa được tính trong atlas
+        """
+        record = self.record(ngayAm, thangAm, canNam, chiNam, gioSinh,
+                             gioiTinh)
+        if record[_CUNG_MENH] == 0:
+            raise KeyError((ngayAm, thangAm, canNam, chiNam, gioSinh,
+                            gioiTinh))
+        db = diaBan(thangAm, gioSinh)
+        for i, cung in enumerate(db.thapNhiCung):
+            cung.daiHan(record[_DAI_HAN + i])
+            cung.tieuHan(record[_TIEU_HAN + i])
+        thapNhiCung = db.thapNhiCung
+        saoCung = self._saoCung
+        for slot, saoID in enumerate(self.saoThuTu, _SAO):
+            cungSo = record[slot]
+            thapNhiCung[cungSo].cungSao.append(saoCung[saoID, cungSo])
+        db.nhapTuan(record[_TUAN], record[_TUAN + 1])
+        db.nhapTriet(record[_TRIET], record[_TRIET + 1])
+        return db
+
+    def laSoBit(self, ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh):
+        """Lá số bitset (bitset.LaSoBit) từ bản ghi atlas
+
+        Raises:
+            KeyError: Bản ghi chưa được tính trong atlas
+        """
+        record = self.record(ngayAm, thangAm, canNam, chiNam, gioSinh,
+                             gioiTinh)
+        if record[_CUNG_MENH] == 0:
+            raise KeyError((ngayAm, thangAm, canNam, chiNam, gioSinh,
+                            gioiTinh))
+        viTriSao = bytearray(SO_SAO)
+        for slot, saoID in enumerate(self.saoThuTu, _SAO):
+            viTriSao[saoID] = record[slot]
+        return LaSoBit(viTriSao, record[_CUNG_MENH], record[_CUNG_THAN],
+                       record[_TUAN:_TUAN + 2], record[_TRIET:_TRIET + 2])
+
+    def banGhi(self):
+        """Toàn bộ bản ghi, liền nhau theo recordIndex, để xử lý hàng loạt
+        (xem vectorized.viTriSaoAtlas)"""
+        return memoryview(self._mm)[HEADER_SIZE:
+                                    HEADER_SIZE + SO_LA_SO * self.recordSize]
+
+
+_atlas = None
+
+
+def getAtlas():
+    """Atlas theo biến môi trường TUVI_ATLAS_PATH, None nếu không có"""
+    global _atlas
+    if _atlas is None:
+        path = os.environ.get('TUVI_ATLAS_PATH')
+        if not path or not os.path.exists(path):
+            return None
+        _atlas = ChartAtlas(path)
+    return _atlas
+
+
+def lapDiaBan(diaBan, nn, tt, nnnn, gioSinh, gioiTinh, duongLich, timeZone,
+              dateFacts=None):
+    """Như App.lapDiaBan nhưng đọc từ atlas nếu có; lá số atlas chưa tính
+    (atlas dựng dở) được tính lại bằng App.lapDiaBan"""
+    atlas = getAtlas()
+    if atlas is None or gioiTinh not in (1, -1):
+        return App.lapDiaBan(diaBan, nn, tt, nnnn, gioSinh, gioiTinh,
+                             duongLich, timeZone, dateFacts=dateFacts)
+    if dateFacts is not None:
+        ngayAm, thangAm = dateFacts.ngayAm, dateFacts.thangAm
+        canNam, chiNam = dateFacts.canNam, dateFacts.chiNam
+    else:
+        ngayAm, thangAm, namAm = nn, tt, nnnn
+        if duongLich is True:
+            ngayAm, thangAm, namAm, thangNhuan = \
+                ngayThangNam(nn, tt, nnnn, duongLich, timeZone)
+        canThang, canNam, chiNam = \
+            ngayThangNamCanChi(ngayAm, thangAm, namAm, False, timeZone)
+    try:
+        return atlas.lapDiaBan(diaBan, ngayAm, thangAm, canNam, chiNam,
+                               gioSinh, gioiTinh)
+    except KeyError:
+        return App.lapDiaBan(diaBan, nn, tt, nnnn, gioSinh, gioiTinh,
+                             duongLich, timeZone, dateFacts=dateFacts)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Dựng atlas lá số Tử Vi")
+    parser.add_argument('path', help="File atlas đầu ra")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--index', default=None,
+                        help="Dựng kèm chỉ mục ngược (lasotuvi.chimuc)")
+    args = parser.parse_args()
+    buildAtlas(args.path, args.workers)
+    if args.index:
+        from lasotuvi.chimuc import xayChiMuc
+        xayChiMuc(args.index, ChartAtlas(args.path))
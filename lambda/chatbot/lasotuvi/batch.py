@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Dựng hàng loạt lá số trên nhiều tiến trình.
+
+    from lasotuvi.batch import build_charts
+
+    for diaBan, thienBan in build_charts(records, workers=8):
+        ...
+
+Mỗi record là bộ (ngày, tháng, năm, chi giờ sinh, giới tính) hoặc thêm tên
+ở cuối. Record được đọc dần và kết quả trả về dần theo đúng thứ tự đầu vào.
+Lá số chỉ phụ thuộc (ngày, tháng, năm, giờ, giới tính) nên các record trùng
+khóa này, dù khác tên, chỉ được tính một lần trong một cửa sổ gần đây; tên
+được gắn vào Thiên Bàn sau.
+"""
+import copy
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from lasotuvi.AmDuong import DateFacts
+from lasotuvi.App import lapDiaBan
+from lasotuvi.DiaBan import diaBan
+from lasotuvi.ThienBan import lapThienBan
+
+
+# Số lá số gần đây giữ lại cho record trùng khóa. Lá số có nhiều đối tượng
+# nhỏ nên giữ quá nhiều làm bộ thu gom rác chạy chậm
+CACHE_SIZE = 1024
+
+
+def chartSignature(record):
+    """Chuẩn hóa record thành (nn, tt, nnnn, gioSinh, gioiTinh, ten)"""
+    if len(record) == 5:
+        return tuple(record) + ("",)
+    if len(record) == 6:
+        return tuple(record)
+    raise Exception("Record phải có dạng (ngày, tháng, năm, giờ, giới tính"
+                    "[, tên]): %r" % (record,))
+
+
+def lapLaSo(signature, duongLich=True, timeZone=7):
+    """Dựng Địa Bàn và Thiên Bàn của một lá số
+
+    Returns:
+        tuple: (diaBan, lapThienBan)
+    """
+    nn, tt, nnnn, gioSinh, gioiTinh, ten = signature
+    facts = DateFacts(nn, tt, nnnn, gioSinh, timeZone) \
+        if duongLich is True else None
+    db = lapDiaBan(diaBan, nn, tt, nnnn, gioSinh, gioiTinh, duongLich,
+                   timeZone, dateFacts=facts)
+    tb = lapThienBan(nn, tt, nnnn, gioSinh, gioiTinh, ten, db,
+                     duongLich=duongLich, timeZone=timeZone, dateFacts=facts)
+    return db, tb
+
+
+def _lapNhieu(khoa, duongLich, timeZone):
+    # Một lô khóa (nn, tt, nnnn, gioSinh, gioiTinh), chạy trong tiến trình con
+    return [lapLaSo(k + ("",), duongLich, timeZone) for k in khoa]
+
+
+def _datTen(laSo, ten):
+    # Lá số tính chung không có tên; Thiên Bàn có tên là một bản sao nông
+    if not ten:
+        return laSo
+    db, tb = laSo
+    tb = copy.copy(tb)
+    tb.ten = ten
+    return db, tb
+
+
+def build_charts(records, workers=None, duongLich=True, timeZone=7,
+                 chunksize=256, cacheSize=CACHE_SIZE):
+    """Dựng lá số cho nhiều record, trả về dần theo thứ tự đầu vào
+
+    Args:
+        records (iterable): Các record (nn, tt, nnnn, gioSinh, gioiTinh
+            [, ten]), được đọc dần nên có thể là generator
+        workers (int, optional): Số tiến trình, mặc định theo số CPU; 1 thì
+            tính ngay trong tiến trình hiện tại
+        chunksize (int, optional): Số lá số gửi cho mỗi tiến trình một lần,
+            bỏ qua khi workers là 1
+        cacheSize (int, optional): Số khóa lá số gần đây được dùng lại
+
+    Yields:
+        tuple: (diaBan, lapThienBan). Các record trùng khóa nhận cùng một
+        diaBan (và cùng Thiên Bàn nếu cùng tên), không nên sửa kết quả.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        chunksize = 1
+    executor = None
+    # Mỗi lô là [danh sách khóa, Future của danh sách lá số]; mỗi khóa đã
+    # gửi là [lô, vị trí trong lô, lá số khi đã có]
+    lo = [[], None]
+    daGui = OrderedDict()
+    choTra = deque()
+    # Số record đọc trước tối đa, đủ để mọi tiến trình có việc
+    docTruoc = chunksize * max(workers, 1) * 2
+
+    def gui():
+        nonlocal executor, lo
+        if not lo[0]:
+            return
+        if workers <= 1:
+            lo[1] = Future()
+            lo[1].set_result(_lapNhieu(lo[0], duongLich, timeZone))
+        else:
+            if executor is None:
+                executor = ProcessPoolExecutor(workers)
+            lo[1] = executor.submit(_lapNhieu, lo[0], duongLich, timeZone)
+        lo = [[], None]
+
+    def tra():
+        muc, ten = choTra.popleft()
+        if muc[2] is None:
+            if muc[0][1] is None:
+                gui()
+            # Bỏ tham chiếu tới lô để lô được giải phóng khi đã trả hết
+            muc[2] = muc[0][1].result()[muc[1]]
+            muc[0] = None
+        return _datTen(muc[2], ten)
+
+    try:
+        for record in records:
+            *khoa, ten = chartSignature(record)
+            khoa = tuple(khoa)
+            muc = daGui.get(khoa)
+            if muc is None:
+                lo[0].append(khoa)
+                muc = daGui[khoa] = [lo, len(lo[0]) - 1, None]
+                if len(daGui) > cacheSize:
+                    daGui.popitem(last=False)
+                if len(lo[0]) >= chunksize:
+                    gui()
+            else:
+                daGui.move_to_end(khoa)
+            choTra.append((muc, ten))
+            while len(choTra) > docTruoc:
+                yield tra()
+        gui()
+        while choTra:
+            yield tra()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Tứ trụ (Bát Tự): can chi của năm, tháng, ngày, giờ.
+
+    from lasotuvi.battu import tuTru
+
+    truNam, truThang, truNgay, truGio = tuTru(15, 8, 2000, gioSinh=1)
+    truNam.ten      # "Canh Thìn"
+
+Khác với lá số Tử Vi (theo tháng âm lịch), năm và tháng của Bát Tự đổi
+theo tiết khí: năm mới bắt đầu từ Lập xuân, mỗi tháng bắt đầu từ một tiết
+(Lập xuân, Kinh trập, Thanh minh,...). Ngày đổi lúc nửa đêm, giờ Tý tính
+cho ngày đang xét như App.lapDiaBan.
+
+Mỗi trụ là một trong 60 cặp can chi của vòng hoa giáp (TRU, đánh số
+0-59 theo HOA_GIAP), nên cả bốn trụ chỉ là bốn phép tính số học sau một
+lần tra tiết khí. Bản mảng NumPy là vectorized.tuTru_batch.
+"""
+from collections import namedtuple
+
+from lasotuvi.AmDuong import diaChi, thienCan
+from lasotuvi.Lich_HND import jdFromDate, solarTermOf
+from lasotuvi.tables import HOA_GIAP
+
+Tru = namedtuple('Tru', ['can', 'chi', 'ten'])
+TuTru = namedtuple('TuTru', ['nam', 'thang', 'ngay', 'gio'])
+
+# 60 trụ dựng sẵn, theo thứ tự hoa giáp
+TRU = tuple(Tru(can, chi, "%s %s" % (thienCan[can]['tenCan'],
+                                     diaChi[chi]['tenChi']))
+            for can, chi in HOA_GIAP)
+
+
+def chiGioDongHo(gio):
+    """Chi của giờ đồng hồ 0-23: 23h-1h là Tý (1), 1h-3h là Sửu (2),..."""
+    return (gio + 1) // 2 % 12 + 1
+
+
+def soThuTuTuTru(nn, tt, nnnn, gioSinh, timeZone=7):
+    """Số thứ tự hoa giáp (0-59) của bốn trụ
+
+    Args:
+        nn, tt, nnnn (int): Ngày, tháng, năm dương lịch
+        gioSinh (int): Chi của giờ, 1: Tý, 2: Sửu,...
+        timeZone (int, optional): Múi giờ
+
+    Returns:
+        tuple: (năm, tháng, ngày, giờ)
+    """
+    jd = jdFromDate(nn, tt, nnnn)
+    tiet = solarTermOf(jd, timeZone).term
+    # Tháng 1, 2 trước Lập xuân (Đông chí, Tiểu hàn, Đại hàn) vẫn thuộc
+    # năm trước
+    if tt <= 2 and 18 <= tiet <= 20:
+        nnnn -= 1
+    nam = (nnnn - 4) % 60
+    # Tháng Dần (0) bắt đầu từ Lập xuân, tiết thứ 21 tính từ Xuân phân
+    thang = (12 * (nam % 5) + 2 + (tiet + 3) % 24 // 2) % 60
+    ngay = (jd + 49) % 60
+    gio = (12 * (ngay % 5) + gioSinh - 1) % 60
+    return nam, thang, ngay, gio
+
+
+def tuTru(nn, tt, nnnn, gioSinh, timeZone=7):
+    """Bốn trụ năm, tháng, ngày, giờ của một ngày dương lịch
+
+    Returns:
+        TuTru: mỗi phần tử là một Tru(can, chi, ten)
+    """
+    nam, thang, ngay, gio = soThuTuTuTru(nn, tt, nnnn, gioSinh, timeZone)
+    return TuTru(TRU[nam], TRU[thang], TRU[ngay], TRU[gio])
+
+
+def tuTruThoiDiem(thoiDiem, timeZone=7):
+    """Bốn trụ của một datetime (giờ địa phương theo timeZone)"""
+    return tuTru(thoiDiem.day, thoiDiem.month, thoiDiem.year,
+                 chiGioDongHo(thoiDiem.hour), timeZone)
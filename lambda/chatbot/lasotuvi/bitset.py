@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Lá số dạng bitset.
+
+Mỗi cung trên địa bàn là một số nguyên, bit thứ saoID bật nếu sao nằm ở
+cung đó. Kèm theo là vài mảng byte nhỏ:
+
+    viTriSao[saoID]     cung của sao (0 nếu sao không được an)
+    dacTinh[saoID]      mã đặc tính của sao tại cung đó (xem DAC_TINH_MA)
+    co[cungSo]          cờ của cung: CO_THAN, CO_TUAN, CO_TRIET
+
+nên các câu hỏi "Tử Vi ở cung nào", "Hóa Kỵ có ở Mệnh không", "tam phương
+tứ chính của Mệnh có những sao nào" chỉ là một phép tra hoặc vài phép OR,
+AND trên số nguyên.
+
+    laSo = lapLaSoBit(ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh)
+    laSo.coSao(saoHoaKy.saoID, laSo.cungTheoTen("Mệnh"))
+    laSo.tamPhuongTuChinh(laSo.cungMenh) & NHOM_MASK["chinh_tinh"]
+
+toBytes / fromBytes ghi lá số thành 70 byte.
+"""
+from operator import add
+
+from lasotuvi import engine
+from lasotuvi.AmDuong import dichCung
+from lasotuvi.tables import CUNG_CHU, DAC_TINH, SO_SAO, chiSoDacTinh
+
+CO_THAN, CO_TUAN, CO_TRIET = 1, 2, 4
+
+# Mã đặc tính: 0 là không có đặc tính
+DAC_TINH_MA = (None, "M", "V", "Đ", "B", "H")
+_MA_DAC_TINH = bytes(0 if dacTinh is None else DAC_TINH_MA.index(dacTinh)
+                     for dacTinh in DAC_TINH)
+
+_BIT = tuple(1 << saoID for saoID in range(SO_SAO))
+_DONG_DAC_TINH = tuple(chiSoDacTinh(saoID, 0) for saoID in range(SO_SAO))
+
+# Mặt nạ bit của từng nhóm sao trong engine.NHOM_SAO
+NHOM_MASK = {tenNhom: sum(1 << saoID for saoID in saoIDs)
+             for tenNhom, saoIDs in engine.NHOM_SAO.items()}
+
+PHIEN_BAN = 1
+_SO_BYTE = 3 + 12 + (SO_SAO + 1) // 2
+
+
+# Cung, hai cung tam hợp và cung xung chiếu (tam phương tứ chính)
+TAM_PHUONG = (None,) + tuple(
+    (cungSo, dichCung(cungSo, 4), dichCung(cungSo, 8), dichCung(cungSo, 6))
+    for cungSo in range(1, 13))
+
+
+class LaSoBit(object):
+    """Lá số dạng bitset
+
+    Args:
+        viTriSao (sequence): Cung của từng saoID (độ dài SO_SAO, 0 nếu sao
+            không được an)
+        cungMenh, cungThan (int): Vị trí cung Mệnh, cung Thân
+        tuan, triet (tuple, optional): Hai cung Tuần, hai cung Triệt
+    """
+
+    __slots__ = ('viTriSao', 'dacTinh', 'cung', 'co', 'cungMenh',
+                 'cungThan')
+
+    def __init__(self, viTriSao, cungMenh, cungThan, tuan=(), triet=()):
+        super(LaSoBit, self).__init__()
+        self.viTriSao = bytes(viTriSao)
+        self.cungMenh = cungMenh
+        self.cungThan = cungThan
+        cung = [0] * 13
+        for bit, cungSo in zip(_BIT, self.viTriSao):
+            cung[cungSo] |= bit
+        # Ô 0 gom các sao không được an
+        cung[0] = 0
+        self.cung = tuple(cung)
+        self.dacTinh = bytes(map(_MA_DAC_TINH.__getitem__,
+                                 map(add, _DONG_DAC_TINH, self.viTriSao)))
+        co = bytearray(13)
+        co[cungThan] |= CO_THAN
+        for cungSo in tuan:
+            co[cungSo] |= CO_TUAN
+        for cungSo in triet:
+            co[cungSo] |= CO_TRIET
+        self.co = bytes(co)
+
+    @classmethod
+    def tuDiaBan(cls, diaBan):
+        """Chuyển một Địa Bàn đã an sao sang dạng bitset"""
+        viTriSao = bytearray(SO_SAO)
+        tuan, triet = [], []
+        for cung in diaBan.thapNhiCung[1:]:
+            for sao in cung.cungSao:
+                viTriSao[sao['saoID']] = cung.cungSo
+            if getattr(cung, 'tuanTrung', False):
+                tuan.append(cung.cungSo)
+            if getattr(cung, 'trietLo', False):
+                triet.append(cung.cungSo)
+        return cls(viTriSao, diaBan.cungMenh, diaBan.cungThan, tuan, triet)
+
+    def cungCuaSao(self, saoID):
+        """Cung của sao, 0 nếu sao không được an"""
+        return self.viTriSao[saoID]
+
+    def saoTrongCung(self, cungSo):
+        """Mặt nạ bit các sao trong cung"""
+        return self.cung[cungSo]
+
+    def coSao(self, saoID, cungSo):
+        return self.viTriSao[saoID] == cungSo
+
+    def tamPhuongTuChinh(self, cungSo):
+        """Mặt nạ bit các sao trong tam phương tứ chính của cung"""
+        cung = self.cung
+        a, b, c, d = TAM_PHUONG[cungSo]
+        return cung[a] | cung[b] | cung[c] | cung[d]
+
+    def cungTheoTen(self, tenCung):
+        """Vị trí trên địa bàn của cung chủ (Mệnh, Phụ mẫu,...)"""
+        if tenCung not in CUNG_CHU:
+            raise Exception("Không có cung %s" % tenCung)
+        return dichCung(self.cungMenh, CUNG_CHU.index(tenCung))
+
+    def cungChu(self, cungSo):
+        """Tên cung chủ của một vị trí trên địa bàn"""
+        return CUNG_CHU[(cungSo - self.cungMenh) % 12]
+
+    def dacTinhSao(self, saoID):
+        """M, V, Đ, B, H hoặc None"""
+        return DAC_TINH_MA[self.dacTinh[saoID]]
+
+    def toBytes(self):
+        """Phiên bản, Mệnh, Thân, 12 byte cờ rồi cung của từng sao, mỗi sao
+        nửa byte"""
+        viTri = self.viTriSao + b"\0"
+        return bytes((PHIEN_BAN, self.cungMenh, self.cungThan)) \
+            + self.co[1:] \
+            + bytes(viTri[i] | viTri[i + 1] << 4
+                    for i in range(0, SO_SAO, 2))
+
+    @classmethod
+    def fromBytes(cls, duLieu):
+        if len(duLieu) != _SO_BYTE or duLieu[0] != PHIEN_BAN:
+            raise Exception("Dữ liệu lá số bitset không hợp lệ")
+        viTriSao = bytearray(SO_SAO)
+        for i, b in enumerate(duLieu[15:]):
+            viTriSao[2 * i] = b & 15
+            if 2 * i + 1 < SO_SAO:
+                viTriSao[2 * i + 1] = b >> 4
+        co = duLieu[3:15]
+        return cls(viTriSao, duLieu[1], duLieu[2],
+                   [i for i in range(1, 13) if co[i - 1] & CO_TUAN],
+                   [i for i in range(1, 13) if co[i - 1] & CO_TRIET])
+
+    def __eq__(self, other):
+        return isinstance(other, LaSoBit) and self.toBytes() == other.toBytes()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+
+def danhSachSao(mask):
+    """Các saoID có bit bật trong mask, tăng dần"""
+    saoIDs = []
+    while mask:
+        thap = mask & -mask
+        saoIDs.append(thap.bit_length() - 1)
+        mask ^= thap
+    return saoIDs
+
+
+def lapLaSoBit(ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh,
+               quyTac=engine.QUY_TAC):
+    """Lá số bitset dựng thẳng từ engine.anSao, không qua Địa Bàn"""
+    o = engine.anSao(ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh,
+                     quyTac)
+    return LaSoBit(o[:SO_SAO], o[engine.MENH], o[engine.THAN],
+                   (o[engine.TUAN_1], o[engine.TUAN_2]),
+                   (o[engine.TRIET_1], o[engine.TRIET_2]))
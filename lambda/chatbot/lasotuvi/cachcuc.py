@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Nhận diện cách cục trên lá số bitset (bitset.LaSoBit).
+
+Mỗi cách cục là một dãy điều kiện đã biên dịch thành mặt nạ bit:
+
+    DieuKien(vung, mask, toiThieu, toiDa)
+        số sao của mask có mặt trong vùng nằm trong [toiThieu, toiDa].
+        Vùng tính từ cung gốc (mặc định cung Mệnh): CUNG (chính cung),
+        TAM_PHUONG_TU_CHINH (tam phương tứ chính), TRUOC / SAU (hai cung giáp).
+    ViTri(saoID, cungMask)
+        sao phải đóng ở một trong các cung có bit bật trong cungMask
+        (dùng cho miếu, vượng, hãm).
+
+    for cachCuc in timCachCuc(LaSoBit.tuDiaBan(db)):
+        print(cachCuc.ten, cachCuc.moTa)
+
+Kiểm tra toàn bộ CACH_CUC trên một lá số chỉ là vài chục phép AND và
+đếm bit. vectorized.cachCuc_batch chạy cùng bộ cách cục trên mảng NumPy
+(kết quả của anSao_batch hoặc cả atlas).
+"""
+from collections import namedtuple
+
+from lasotuvi.bitset import TAM_PHUONG
+from lasotuvi.Sao import (saoCuMon, saoDaLa, saoDiaKhong, saoDiaKiep,
+                          saoHoaKhoa, saoHoaLoc, saoHoaQuyen, saoHoaTinh,
+                          saoHuuBat, saoKinhDuong, saoLiemTrinh, saoLinhTinh,
+                          saoLocTon, saoPhaQuan, saoTaPhu, saoThaiAm,
+                          saoThaiDuong, saoThamLang, saoThatSat, saoThienCo,
+                          saoThienDong, saoThienKhoi, saoThienLuong,
+                          saoThienMa, saoThienPhu, saoThienTuong,
+                          saoThienViet, saoTuVi, saoVanKhuc, saoVanXuong,
+                          saoVuKhuc)
+from lasotuvi.tables import DAC_TINH, chiSoDacTinh
+
+CUNG, TAM_PHUONG_TU_CHINH, TRUOC, SAU = range(4)
+# Khoảng cách từ cung gốc tới các cung của mỗi vùng
+KHOANG_CACH_VUNG = ((0,), (0, 4, 6, 8), (11,), (1,))
+
+DieuKien = namedtuple('DieuKien', ['vung', 'mask', 'toiThieu', 'toiDa'])
+ViTri = namedtuple('ViTri', ['saoID', 'cungMask'])
+CachCuc = namedtuple('CachCuc', ['ten', 'moTa', 'dieuKien', 'viTri'])
+
+
+def _mask(*sao):
+    return sum(1 << s.saoID for s in sao)
+
+
+def du(vung, *sao):
+    """Đủ mọi sao trong vùng"""
+    return DieuKien(vung, _mask(*sao), len(sao), len(sao))
+
+
+def mot(vung, *sao):
+    """Ít nhất một sao trong vùng"""
+    return DieuKien(vung, _mask(*sao), 1, len(sao))
+
+
+def khong(vung, *sao):
+    """Không sao nào trong vùng"""
+    return DieuKien(vung, _mask(*sao), 0, 0)
+
+
+def dacTinh(sao, *dacTinh):
+    """Sao đóng ở cung có đặc tính thuộc dacTinh (M, V, Đ, B, H)"""
+    return ViTri(sao.saoID, sum(
+        1 << cungSo for cungSo in range(1, 13)
+        if DAC_TINH[chiSoDacTinh(sao.saoID, cungSo)] in dacTinh))
+
+
+def cachCuc(ten, moTa, *dieuKien, viTri=()):
+    return CachCuc(ten, moTa, tuple(dieuKien), tuple(viTri))
+
+
+_SAT_TINH = (saoKinhDuong, saoDaLa, saoDiaKhong, saoDiaKiep, saoHoaTinh,
+             saoLinhTinh)
+
+CACH_CUC = (
+    cachCuc("Tử Phủ Vũ Tướng",
+            "Tử Vi, Thiên Phủ, Vũ Khúc, Thiên Tướng hội đủ ở tam phương "
+            "tứ chính, Mệnh có một trong bốn sao",
+            mot(CUNG, saoTuVi, saoThienPhu, saoVuKhuc, saoThienTuong),
+            du(TAM_PHUONG_TU_CHINH, saoTuVi, saoThienPhu, saoVuKhuc,
+               saoThienTuong)),
+    cachCuc("Sát Phá Tham",
+            "Thất Sát, Phá Quân, Tham Lang hội ở tam phương tứ chính, "
+            "Mệnh có một trong ba sao",
+            mot(CUNG, saoThatSat, saoPhaQuan, saoThamLang),
+            du(TAM_PHUONG_TU_CHINH, saoThatSat, saoPhaQuan, saoThamLang)),
+    cachCuc("Cơ Nguyệt Đồng Lương",
+            "Thiên Cơ, Thái Âm, Thiên Đồng, Thiên Lương hội đủ ở tam "
+            "phương tứ chính, Mệnh có một trong bốn sao",
+            mot(CUNG, saoThienCo, saoThaiAm, saoThienDong, saoThienLuong),
+            du(TAM_PHUONG_TU_CHINH, saoThienCo, saoThaiAm, saoThienDong,
+               saoThienLuong)),
+    cachCuc("Cự Nhật đồng cung",
+            "Cự Môn và Thái Dương cùng ở Mệnh",
+            du(CUNG, saoCuMon, saoThaiDuong)),
+    cachCuc("Nhật Nguyệt tịnh minh",
+            "Thái Dương, Thái Âm cùng sáng (miếu, vượng, đắc) và hội ở tam "
+            "phương tứ chính",
+            du(TAM_PHUONG_TU_CHINH, saoThaiDuong, saoThaiAm),
+            viTri=(dacTinh(saoThaiDuong, "M", "V", "Đ"),
+                   dacTinh(saoThaiAm, "M", "V", "Đ"))),
+    cachCuc("Nhật Nguyệt phản bối",
+            "Thái Dương, Thái Âm cùng hãm và hội ở tam phương tứ chính",
+            du(TAM_PHUONG_TU_CHINH, saoThaiDuong, saoThaiAm),
+            viTri=(dacTinh(saoThaiDuong, "H"), dacTinh(saoThaiAm, "H"))),
+    cachCuc("Tả Hữu giáp Mệnh",
+            "Tả Phù, Hữu Bật ở hai cung giáp Mệnh",
+            mot(TRUOC, saoTaPhu, saoHuuBat),
+            mot(SAU, saoTaPhu, saoHuuBat)),
+    cachCuc("Xương Khúc giáp Mệnh",
+            "Văn Xương, Văn Khúc ở hai cung giáp Mệnh",
+            mot(TRUOC, saoVanXuong, saoVanKhuc),
+            mot(SAU, saoVanXuong, saoVanKhuc)),
+    cachCuc("Kình Đà giáp Mệnh",
+            "Kình Dương, Đà La ở hai cung giáp Mệnh",
+            mot(TRUOC, saoKinhDuong, saoDaLa),
+            mot(SAU, saoKinhDuong, saoDaLa)),
+    cachCuc("Khôi Việt",
+            "Thiên Khôi, Thiên Việt hội ở tam phương tứ chính, Mệnh có một "
+            "trong hai sao",
+            mot(CUNG, saoThienKhoi, saoThienViet),
+            du(TAM_PHUONG_TU_CHINH, saoThienKhoi, saoThienViet)),
+    cachCuc("Lộc Mã giao trì",
+            "Thiên Mã gặp Lộc Tồn hoặc Hóa Lộc ở tam phương tứ chính",
+            du(TAM_PHUONG_TU_CHINH, saoThienMa),
+            mot(TAM_PHUONG_TU_CHINH, saoLocTon, saoHoaLoc)),
+    cachCuc("Tam Hóa liên châu",
+            "Hóa Lộc, Hóa Quyền, Hóa Khoa hội đủ ở tam phương tứ chính",
+            du(TAM_PHUONG_TU_CHINH, saoHoaLoc, saoHoaQuyen, saoHoaKhoa)),
+    cachCuc("Mệnh vô chính diệu",
+            "Mệnh không có chính tinh",
+            khong(CUNG, saoTuVi, saoThienCo, saoThaiDuong, saoVuKhuc,
+                  saoThienDong, saoThienPhu, saoThaiAm, saoThamLang,
+                  saoCuMon, saoThienTuong, saoThienLuong, saoThatSat,
+                  saoPhaQuan, saoLiemTrinh)),
+    cachCuc("Lục sát hội Mệnh",
+            "Từ bốn sát tinh trở lên (Kình, Đà, Không, Kiếp, Hỏa, Linh) ở "
+            "tam phương tứ chính",
+            DieuKien(TAM_PHUONG_TU_CHINH, _mask(*_SAT_TINH), 4,
+                     len(_SAT_TINH))),
+)
+
+
+def _vungCung(cungSo):
+    return tuple(tuple((cungSo + k - 1) % 12 + 1 for k in khoangCach)
+                 for khoangCach in KHOANG_CACH_VUNG)
+
+
+# Các cung của mỗi vùng, tra theo cung gốc
+VUNG_CUNG = (None,) + tuple(_vungCung(cungSo) for cungSo in range(1, 13))
+
+
+def timCachCuc(laSo, cungSo=None, boCachCuc=CACH_CUC):
+    """Các cách cục khớp với lá số
+
+    Args:
+        laSo (LaSoBit): Lá số bitset
+        cungSo (int, optional): Cung gốc, mặc định cung Mệnh
+        boCachCuc (tuple, optional): Bộ cách cục, mặc định CACH_CUC
+
+    Returns:
+        list: Các CachCuc khớp, theo thứ tự trong boCachCuc
+    """
+    if cungSo is None:
+        cungSo = laSo.cungMenh
+    cung = laSo.cung
+    a, b, c, d = TAM_PHUONG[cungSo]
+    truoc, sau = VUNG_CUNG[cungSo][TRUOC][0], VUNG_CUNG[cungSo][SAU][0]
+    vung = (cung[cungSo], cung[a] | cung[b] | cung[c] | cung[d],
+            cung[truoc], cung[sau])
+    viTriSao = laSo.viTriSao
+    khop = []
+    for cc in boCachCuc:
+        for v, mask, toiThieu, toiDa in cc.dieuKien:
+            if not toiThieu <= (vung[v] & mask).bit_count() <= toiDa:
+                break
+        else:
+            for saoID, cungMask in cc.viTri:
+                if not cungMask >> viTriSao[saoID] & 1:
+                    break
+            else:
+                khop.append(cc)
+    return khop
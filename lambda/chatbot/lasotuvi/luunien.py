@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Lưu niên: lớp sao lưu và hạn của từng năm, đặt chồng lên lá số gốc.
+
+Lá số gốc chỉ cần tính một lần. Mọi thứ của một năm xem đều suy ra từ
+can chi của năm đó cùng vài bảng nhỏ rút từ lá số gốc:
+
+    lưu Thái Tuế        cung mang chi của năm
+    lưu Lộc Tồn         theo can năm, lưu Kình Dương / Đà La hai bên
+    lưu Thiên Mã        theo chi năm
+    lưu Tứ Hóa          sao mang Hóa theo can năm, tại cung gốc của sao đó
+    đại hạn, tiểu hạn   cung có đại hạn chứa tuổi, cung có tiểu hạn mang
+                        chi năm
+
+    goc = LaSoGoc.tuDiaBan(db, thienBan.namAm)
+    luuNien(goc, 2025).locTon
+    dongThoiGian(goc, 2025)     # 10 năm, tính một lượt bằng NumPy
+"""
+from collections import namedtuple
+
+from lasotuvi.AmDuong import diaChi, thienCan, timThienMa
+from lasotuvi.tables import SO_SAO, TU_HOA
+
+# Cung của lưu Lộc Tồn theo can, lưu Thiên Mã theo chi
+LUU_LOC_TON = (None,) + tuple(thienCan[can]['vitriDiaBan']
+                              for can in range(1, 11))
+LUU_THIEN_MA = (None,) + tuple(timThienMa(chi) for chi in range(1, 13))
+
+_CHI_THEO_TEN = {diaChi[chi]['tenChi']: chi for chi in range(1, 13)}
+
+LuuNien = namedtuple('LuuNien', [
+    'nam', 'canNam', 'chiNam', 'tuoi', 'thaiTue', 'locTon', 'kinhDuong',
+    'daLa', 'thienMa', 'tuHoaSao', 'tuHoa', 'daiHan', 'tieuHan'])
+LuuNien.__doc__ = """Lưu niên của một năm. tuHoaSao là saoID của bốn sao
+mang Hóa lộc, quyền, khoa, kỵ; tuHoa là cung của chúng. daiHan là 0 khi
+tuổi chưa tới đại hạn đầu tiên."""
+
+
+class LaSoGoc(object):
+    """Phần của lá số gốc mà lưu niên cần đến
+
+    Args:
+        viTriSao (sequence): Cung của từng saoID (độ dài SO_SAO)
+        daiHan (sequence): Tuổi bắt đầu đại hạn của cung 1..12 (phần tử 0
+            bỏ qua, như thapNhiCung)
+        tieuHan (sequence): Cung tiểu hạn theo chi năm 1..12 (phần tử 0 bỏ
+            qua)
+        namSinh (int): Năm âm lịch của ngày sinh
+    """
+
+    __slots__ = ('viTriSao', 'daiHan', 'tieuHan', 'namSinh', 'cuc',
+                 'cungTheoDaiHan')
+
+    def __init__(self, viTriSao, daiHan, tieuHan, namSinh):
+        super(LaSoGoc, self).__init__()
+        if len(viTriSao) != SO_SAO:
+            raise Exception("Cần vị trí của đủ %d sao" % SO_SAO)
+        self.viTriSao = bytes(viTriSao)
+        self.daiHan = tuple(daiHan)
+        self.tieuHan = tuple(tieuHan)
+        self.namSinh = namSinh
+        # Đại hạn đầu tiên bắt đầu từ số cục, mỗi đại hạn 10 năm
+        self.cuc = min(self.daiHan[1:13])
+        self.cungTheoDaiHan = tuple(sorted(range(1, 13),
+                                           key=self.daiHan.__getitem__))
+
+    @classmethod
+    def tuDiaBan(cls, diaBan, namSinh):
+        """Rút lá số gốc từ một Địa Bàn đã an sao, đại hạn, tiểu hạn"""
+        viTriSao = bytearray(SO_SAO)
+        daiHan = [0] * 13
+        tieuHan = [0] * 13
+        for cung in diaBan.thapNhiCung[1:]:
+            for sao in cung.cungSao:
+                viTriSao[sao['saoID']] = cung.cungSo
+            daiHan[cung.cungSo] = cung.cungDaiHan
+            tieuHan[_CHI_THEO_TEN[cung.cungTieuHan]] = cung.cungSo
+        return cls(viTriSao, daiHan, tieuHan, namSinh)
+
+    def cungDaiHan(self, tuoi):
+        """Cung của đại hạn chứa tuổi (tuổi âm), 0 nếu chưa tới đại hạn"""
+        thu = (tuoi - self.cuc) // 10
+        return self.cungTheoDaiHan[thu] if 0 <= thu < 12 else 0
+
+    def namDauDaiHan(self, nam):
+        """Năm bắt đầu đại hạn chứa năm xem"""
+        tuoi = nam - self.namSinh + 1
+        return self.namSinh - 1 + self.cuc + (tuoi - self.cuc) // 10 * 10
+
+
+def canChiNam(nam):
+    """Can, chi của năm âm lịch"""
+    return (nam + 6) % 10 + 1, (nam + 8) % 12 + 1
+
+
+def luuNien(goc, nam):
+    """Lưu niên của một năm âm lịch
+
+    Args:
+        goc (LaSoGoc): Lá số gốc
+        nam (int): Năm âm lịch cần xem
+
+    Returns:
+        LuuNien
+    """
+    canNam, chiNam = canChiNam(nam)
+    tuoi = nam - goc.namSinh + 1
+    locTon = LUU_LOC_TON[canNam]
+    tuHoaSao = TU_HOA[canNam]
+    viTriSao = goc.viTriSao
+    return LuuNien(nam, canNam, chiNam, tuoi, chiNam, locTon,
+                   locTon % 12 + 1, (locTon - 2) % 12 + 1,
+                   LUU_THIEN_MA[chiNam], tuHoaSao,
+                   tuple(viTriSao[saoID] for saoID in tuHoaSao),
+                   goc.cungDaiHan(tuoi), goc.tieuHan[chiNam])
+
+
+def dongThoiGian(goc, namBatDau, soNam=10):
+    """Lưu niên của soNam năm liên tiếp, tính một lượt trên mảng NumPy
+
+    Args:
+        goc (LaSoGoc): Lá số gốc
+        namBatDau (int): Năm đầu, ví dụ goc.namDauDaiHan(nam) để lấy trọn
+            một đại hạn
+        soNam (int, optional): Số năm
+
+    Returns:
+        list: soNam phần tử LuuNien
+    """
+    # NumPy chỉ cần cho dòng thời gian, luuNien không phụ thuộc vào nó
+    from lasotuvi.vectorized import luuNien_batch
+
+    cot = luuNien_batch(goc, range(namBatDau, namBatDau + soNam))
+    return [LuuNien(*hang) for hang in zip(*(
+        list(map(tuple, v.T.tolist())) if v.ndim == 2 else v.tolist()
+        for v in cot))]
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Mã hóa gọn Địa Bàn và Thiên Bàn để gửi cho client hoặc lưu vào cache.
+
+Chỉ lưu những gì không suy ra được (schema phiên bản VERSION):
+
+    Địa Bàn     tháng âm, chi giờ sinh; mỗi cung 1..12: đại hạn, chi tiểu
+                hạn, cờ Tuần / Triệt và saoID của các sao theo thứ tự an
+    Thiên Bàn   ngày dương, ngày âm, can chi năm / tháng / ngày / giờ, giới
+                tính, múi giờ, tên và ngày lập
+
+Cung Mệnh, cung Thân, cung chủ, đặc tính sao và mọi tên gọi được tính lại
+khi giải mã. Có hai dạng:
+
+    encodeJSON / decodeJSON       JSON gọn, sao là số nguyên
+    encodeBinary / decodeBinary   nhị phân đóng gói bằng struct / array,
+                                  khoảng 200 byte một lá số
+
+Giải mã trả về LaSoView gồm các namedtuple chỉ đọc có cùng tên thuộc tính
+với diaBan / cungDiaBan / lapThienBan, nên các hàm đọc lá số (như
+generate_tuvi_context_text của Lambda) dùng được ngay:
+
+    view = decodeBinary(encodeBinary(db, tb))
+    view.diaBan.thapNhiCung[view.diaBan.cungMenh].cungSao
+"""
+import json
+import struct
+from array import array
+from collections import namedtuple
+
+from lasotuvi.AmDuong import diaChi, dichCung, nguHanhNapAm
+from lasotuvi.DiaBan import timDacTinh
+from lasotuvi.Sao import SaoCung
+from lasotuvi.tables import CUNG_CHU, HANH_CUNG, SO_SAO
+from lasotuvi.ThienBan import lapThienBan
+
+VERSION = 1
+MAGIC = b'TVLS'
+_HEADER = struct.Struct('<4sBB')
+_DIA_BAN = struct.Struct('<BB')
+_THIEN_BAN = struct.Struct('<BBhBbbBBhBBBBBBBHB')
+# Cờ của mỗi cung và của bản ghi nhị phân
+TUAN, TRIET = 1, 2
+CO_THIEN_BAN = 1
+
+_TEN_CHI = [chi['tenChi'] for chi in diaChi[1:]]
+
+CungView = namedtuple('CungView', [
+    'cungSo', 'hanhCung', 'cungAmDuong', 'cungTen', 'cungThan', 'cungChu',
+    'cungDaiHan', 'cungTieuHan', 'tuanTrung', 'trietLo', 'cungSao'])
+DiaBanView = namedtuple('DiaBanView', [
+    'thangSinhAmLich', 'gioSinhAmLich', 'cungThan', 'cungMenh', 'cungNoboc',
+    'cungTatAch', 'thapNhiCung'])
+DiaBanView.__doc__ = """Địa Bàn chỉ đọc; thapNhiCung là 13 phần tử như
+diaBan, phần tử 0 là None."""
+ThienBanView = namedtuple('ThienBanView', [
+    'gioiTinh', 'namNu', 'chiGioSinh', 'canGioSinh', 'gioSinh', 'timeZone',
+    'today', 'ngayDuong', 'thangDuong', 'namDuong', 'ten', 'ngayAm',
+    'thangAm', 'namAm', 'thangNhuan', 'canThang', 'canNam', 'chiNam',
+    'chiThang', 'canThangTen', 'canNamTen', 'chiThangTen', 'chiNamTen',
+    'canNgay', 'chiNgay', 'canNgayTen', 'chiNgayTen', 'amDuongNamSinh',
+    'amDuongMenh', 'hanhCuc', 'tenCuc', 'menhChu', 'thanChu', 'menh',
+    'sinhKhac', 'banMenh'])
+LaSoView = namedtuple('LaSoView', ['diaBan', 'thienBan'])
+
+_saoCung = []
+
+
+def _bangSaoCung():
+    # SaoCung bất biến nên mọi lá số giải mã dùng chung một bản, tra theo
+    # [cungSo][saoID]
+    if not _saoCung:
+        _saoCung.extend([SaoCung(saoID, cungSo, timDacTinh(saoID, cungSo))
+                         for saoID in range(SO_SAO)] for cungSo in range(13))
+    return _saoCung
+
+
+def toDict(diaBan, thienBan=None):
+    """Lá số thành dict gọn theo schema, dùng cho encodeJSON hoặc nhúng
+    vào một JSON lớn hơn"""
+    cung = []
+    for c in diaBan.thapNhiCung[1:]:
+        co = (TUAN if getattr(c, 'tuanTrung', False) else 0) \
+            | (TRIET if getattr(c, 'trietLo', False) else 0)
+        cung.append([c.cungDaiHan, _TEN_CHI.index(c.cungTieuHan) + 1, co,
+                     [sao.saoID for sao in c.cungSao]])
+    laSo = {'v': VERSION,
+            'db': [diaBan.thangSinhAmLich, diaBan.gioSinhAmLich, cung]}
+    if thienBan is not None:
+        tb = thienBan
+        laSo['tb'] = [tb.ngayDuong, tb.thangDuong, tb.namDuong,
+                      tb.chiGioSinh['id'], tb.gioiTinh, tb.timeZone,
+                      tb.ngayAm, tb.thangAm, tb.namAm, int(tb.thangNhuan),
+                      tb.canThang, tb.canNam, tb.chiNam, tb.canNgay,
+                      tb.chiNgay, tb.canGioSinh, tb.ten, tb.today]
+    return laSo
+
+
+def _diaBanView(thangAm, gioSinh, cung):
+    # Cùng công thức với diaBan.anCungMenhThan
+    cungThan = dichCung(3, thangAm - 1, gioSinh - 1)
+    cungMenh = dichCung(3, thangAm - 1, - gioSinh + 1)
+    bangSao = _bangSaoCung()
+    thapNhiCung = [None]
+    for cungSo, (daiHan, tieuHan, co, saoIDs) in enumerate(cung, 1):
+        thapNhiCung.append(CungView(
+            cungSo, HANH_CUNG[cungSo], -1 if cungSo % 2 == 0 else 1,
+            _TEN_CHI[cungSo - 1], cungSo == cungThan,
+            CUNG_CHU[(cungSo - cungMenh) % 12], daiHan,
+            _TEN_CHI[tieuHan - 1], bool(co & TUAN), bool(co & TRIET),
+            tuple(map(bangSao[cungSo].__getitem__, saoIDs))))
+    return DiaBanView(thangAm, gioSinh, cungThan, cungMenh,
+                      dichCung(cungMenh, 5), dichCung(cungMenh, 7),
+                      tuple(thapNhiCung))
+
+
+class _DuKien(object):
+    """Dữ kiện ngày sinh đã giải mã, đóng vai DateFacts cho lapThienBan"""
+
+    def __init__(self, ngayAm, thangAm, namAm, thangNhuan, canThang, canNam,
+                 chiNam, canNgay, chiNgay, canGio):
+        self.ngayAm, self.thangAm, self.namAm, self.thangNhuan = \
+            ngayAm, thangAm, namAm, thangNhuan
+        self.canThang, self.canNam, self.chiNam = canThang, canNam, chiNam
+        self.canNgay, self.chiNgay, self.canGio = canNgay, chiNgay, canGio
+        self.menh = nguHanhNapAm(chiNam, canNam)
+        self.banMenh = nguHanhNapAm(chiNam, canNam, True)
+
+
+def _thienBanView(diaBan, nn, tt, nnnn, gioSinh, gioiTinh, timeZone,
+                  ngayAm, thangAm, namAm, thangNhuan, canThang, canNam,
+                  chiNam, canNgay, chiNgay, canGio, ten, today):
+    # Các trường suy ra được tính bằng chính lapThienBan
+    tb = lapThienBan(nn, tt, nnnn, gioSinh, gioiTinh, ten, diaBan,
+                     timeZone=timeZone, dateFacts=_DuKien(
+                         ngayAm, thangAm, namAm, thangNhuan, canThang,
+                         canNam, chiNam, canNgay, chiNgay, canGio))
+    tb.today = today
+    return ThienBanView(**vars(tb))
+
+
+def fromDict(laSo):
+    """Ngược lại của toDict
+
+    Returns:
+        LaSoView: thienBan là None nếu không được mã hóa
+    """
+    if laSo.get('v') != VERSION:
+        raise Exception("Không đọc được lá số phiên bản %s" % laSo.get('v'))
+    diaBan = _diaBanView(*laSo['db'])
+    tb = laSo.get('tb')
+    return LaSoView(diaBan, None if tb is None
+                    else _thienBanView(diaBan, *tb))
+
+
+def encodeJSON(diaBan, thienBan=None):
+    """Lá số thành chuỗi JSON gọn"""
+    return json.dumps(toDict(diaBan, thienBan), ensure_ascii=False,
+                      separators=(',', ':'))
+
+
+def decodeJSON(s):
+    return fromDict(json.loads(s))
+
+
+def encodeBinary(diaBan, thienBan=None):
+    """Lá số thành bytes: header, Địa Bàn, 12 cung x 4 byte, saoID, rồi
+    Thiên Bàn (nếu có) với tên dạng UTF-8"""
+    laSo = toDict(diaBan, thienBan)
+    thangAm, gioSinh, cung = laSo['db']
+    bangCung = array('B')
+    saoIDs = array('B')
+    for daiHan, tieuHan, co, sao in cung:
+        bangCung.extend((daiHan, tieuHan, co, len(sao)))
+        saoIDs.extend(sao)
+    phan = [_HEADER.pack(MAGIC, VERSION,
+                         CO_THIEN_BAN if thienBan is not None else 0),
+            _DIA_BAN.pack(thangAm, gioSinh), bangCung.tobytes(),
+            saoIDs.tobytes()]
+    if thienBan is not None:
+        *so, ten, today = laSo['tb']
+        ten, today = ten.encode('utf-8'), today.encode('utf-8')
+        phan.append(_THIEN_BAN.pack(*so, len(ten), len(today)))
+        phan += [ten, today]
+    return b''.join(phan)
+
+
+def decodeBinary(data):
+    """Ngược lại của encodeBinary
+
+    Returns:
+        LaSoView
+    """
+    magic, version, co = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise Exception("Không đọc được lá số nhị phân phiên bản %s"
+                        % version)
+    offset = _HEADER.size
+    thangAm, gioSinh = _DIA_BAN.unpack_from(data, offset)
+    offset += _DIA_BAN.size
+    bangCung = array('B', data[offset:offset + 48])
+    offset += 48
+    cung = []
+    for i in range(0, 48, 4):
+        daiHan, tieuHan, coCung, soSao = bangCung[i:i + 4]
+        cung.append((daiHan, tieuHan, coCung,
+                     data[offset:offset + soSao]))
+        offset += soSao
+    diaBan = _diaBanView(thangAm, gioSinh, cung)
+    if not co & CO_THIEN_BAN:
+        return LaSoView(diaBan, None)
+    *so, doDaiTen, doDaiToday = _THIEN_BAN.unpack_from(data, offset)
+    offset += _THIEN_BAN.size
+    ten = bytes(data[offset:offset + doDaiTen]).decode('utf-8')
+    offset += doDaiTen
+    today = bytes(data[offset:offset + doDaiToday]).decode('utf-8')
+    return LaSoView(diaBan, _thienBanView(diaBan, *so, ten, today))
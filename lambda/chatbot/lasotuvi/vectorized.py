@@ -0,0 +1,604 @@
+"""
+NumPy versions of lasotuvi functions: arrays in, arrays out. Each _batch
+function returns the same values, element by element, as its scalar
+counterpart:
+
+    calendar    jdFromDate_batch, jdToDate_batch, S2L_batch, L2S_batch,
+                solarTermOf_batch and the astronomical helpers (Lich_HND)
+    Bát Tự      tuTru_batch (battu.soThuTuTuTru)
+    charts      anSao_batch (engine.anSao), viTriSaoAtlas (atlas records)
+    features    cachCuc_batch (cachcuc), luuNien_batch (luunien),
+                hopTuoi_batch (hoptuoi), xemNgay_batch (xemngay)
+
+The calendar functions mirror Lich_HND operation by operation (int()
+becomes np.trunc, math.floor becomes np.floor, integer floor division
+stays //). New moons and month-11 anchors are only evaluated for the
+distinct months and years present in the input, which keeps large batches
+of clustered birth dates cheap. anSao_batch evaluates the lasotuvi.engine
+rule table over arrays of charts, one NumPy operation per rule.
+
+Only the calendar core is imported with this module; the chart and
+feature modules are imported by the functions that use them, so
+calendar-only callers do not load the star engine.
+"""
+
+import numpy as np
+
+from lasotuvi.Lich_HND import getLunarTable, getSolarTermTable, solarTermOf
+from lasotuvi.tables import TU_HOA
+
+
+def jdFromDate_batch(dd, mm, yy):
+    '''def jdFromDate_batch(dd, mm, yy): Array version of jdFromDate.'''
+    dd = np.asarray(dd, dtype=np.int64)
+    mm = np.asarray(mm, dtype=np.int64)
+    yy = np.asarray(yy, dtype=np.int64)
+    a = (14 - mm) // 12
+    y = yy + 4800 - a
+    m = mm + 12 * a - 3
+    base = dd + (153 * m + 2) // 5 + 365 * y + y // 4
+    jd = base - y // 100 + y // 400 - 32045
+    return np.where(jd < 2299161, base - 32083, jd)
+
+
+def jdToDate_batch(jd):
+    '''def jdToDate_batch(jd): Array version of jdToDate, returns the arrays
+    (day, month, year).'''
+    jd = np.asarray(jd, dtype=np.int64)
+    gregorian = jd > 2299160
+    a = jd + 32044
+    b = np.where(gregorian, (4 * a + 3) // 146097, 0)
+    c = np.where(gregorian, a - (b * 146097) // 4, jd + 32082)
+    d = (4 * c + 3) // 1461
+    e = c - (1461 * d) // 4
+    m = (5 * e + 2) // 153
+    day = e - (153 * m + 2) // 5 + 1
+    month = m + 3 - 12 * (m // 10)
+    year = b * 100 + d - 4800 + m // 10
+    return day, month, year
+
+
+def NewMoon_batch(k):
+    '''def NewMoon_batch(k): Array version of NewMoon.'''
+    k = np.asarray(k, dtype=np.float64)
+    T = k / 1236.85
+    T2 = T * T
+    T3 = T2 * T
+    dr = np.pi / 180.
+    Jd1 = 2415020.75933 + 29.53058868 * k \
+        + 0.0001178 * T2 - 0.000000155 * T3
+    Jd1 = Jd1 + 0.00033 * np.sin(
+        (166.56 + 132.87 * T - 0.009173 * T2) * dr)
+    M = 359.2242 + 29.10535608 * k \
+        - 0.0000333 * T2 - 0.00000347 * T3
+    Mpr = 306.0253 + 385.81691806 * k \
+        + 0.0107306 * T2 + 0.00001236 * T3
+    F = 21.2964 + 390.67050646 * k - 0.0016528 * T2 \
+        - 0.00000239 * T3
+    C1 = (0.1734 - 0.000393 * T) * np.sin(M * dr) \
+        + 0.0021 * np.sin(2 * dr * M)
+    C1 = C1 - 0.4068 * np.sin(Mpr * dr) \
+        + 0.0161 * np.sin(dr * 2 * Mpr)
+    C1 = C1 - 0.0004 * np.sin(dr * 3 * Mpr)
+    C1 = C1 + 0.0104 * np.sin(dr * 2 * F) \
+        - 0.0051 * np.sin(dr * (M + Mpr))
+    C1 = C1 - 0.0074 * np.sin(dr * (M - Mpr)) \
+        + 0.0004 * np.sin(dr * (2 * F + M))
+    C1 = C1 - 0.0004 * np.sin(dr * (2 * F - M)) \
+        - 0.0006 * np.sin(dr * (2 * F + Mpr))
+    C1 = C1 + 0.0010 * np.sin(dr * (2 * F - Mpr)) \
+        + 0.0005 * np.sin(dr * (2 * Mpr + M))
+    deltat = np.where(
+        T < -11,
+        0.001 + 0.000839 * T + 0.0002261 * T2
+        - 0.00000845 * T3 - 0.000000081 * T * T3,
+        -0.000278 + 0.000265 * T + 0.000262 * T2)
+    return Jd1 + C1 - deltat
+
+
+def getSunLongitude_batch(jdn, timeZone):
+    '''def getSunLongitude_batch(jdn, timeZone): Array version of
+    getSunLongitude, returns major-term indices 0..11.'''
+    jdn = np.asarray(jdn, dtype=np.float64)
+    T = (jdn - 2451545.5 - timeZone / 24.) / 36525.
+    T2 = T ** 2
+    dr = np.pi / 180.
+    M = 357.52910 + 35999.05030 * T - 0.0001559 * T2 - 0.00000048 * T * T2
+    L0 = 280.46645 + 36000.76983 * T + 0.0003032 * T2
+    DL = (1.914600 - 0.004817 * T - 0.000014 * T2) * np.sin(dr * M)
+    DL = DL + (0.019993 - 0.000101 * T) * np.sin(dr * 2 * M) \
+        + 0.000290 * np.sin(dr * 3 * M)
+    L = L0 + DL
+    omega = 125.04 - 1934.136 * T
+    L = L - 0.00569 - 0.00478 * np.sin(omega * dr)
+    L = L * dr
+    L = L - np.pi * 2 * (np.floor(L / (np.pi * 2)))
+    return np.trunc(L / np.pi * 6).astype(np.int64)
+
+
+def getNewMoonDay_batch(k, timeZone):
+    '''def getNewMoonDay_batch(k, timeZone): Array version of getNewMoonDay.
+    Each distinct k is evaluated once.'''
+    k = np.asarray(k, dtype=np.int64)
+    uniqueK, inverse = np.unique(k, return_inverse=True)
+    days = np.trunc(NewMoon_batch(uniqueK) + 0.5 + timeZone / 24.) \
+        .astype(np.int64)
+    return days[inverse].reshape(k.shape)
+
+
+def getMonthIndex_batch(monthStart):
+    '''def getMonthIndex_batch(monthStart): Array version of getMonthIndex.'''
+    monthStart = np.asarray(monthStart, dtype=np.int64)
+    return np.floor(0.5 + (monthStart - 2415021.076998695)
+                    / 29.530588853).astype(np.int64)
+
+
+def getLunarMonth11_batch(yy, timeZone):
+    '''def getLunarMonth11_batch(yy, timeZone): Array version of
+    getLunarMonth11. Each distinct year is evaluated once.'''
+    yy = np.asarray(yy, dtype=np.int64)
+    years, inverse = np.unique(yy, return_inverse=True)
+    off = jdFromDate_batch(31, 12, years) - 2415021.
+    k = np.floor(off / 29.530588853).astype(np.int64)
+    nm = getNewMoonDay_batch(k, timeZone)
+    sunLong = getSunLongitude_batch(nm, timeZone)
+    nm = np.where(sunLong >= 9, getNewMoonDay_batch(k - 1, timeZone), nm)
+    return nm[inverse].reshape(yy.shape)
+
+
+def getLeapMonthOffset_batch(a11, timeZone):
+    '''def getLeapMonthOffset_batch(a11, timeZone): Array version of
+    getLeapMonthOffset. Each distinct a11 is evaluated once.'''
+    a11 = np.asarray(a11, dtype=np.int64)
+    anchors, inverse = np.unique(a11, return_inverse=True)
+    k = getMonthIndex_batch(anchors)
+    offsets = np.zeros(anchors.shape, dtype=np.int64)
+    active = np.ones(anchors.shape, dtype=bool)
+    last = getSunLongitude_batch(getNewMoonDay_batch(k + 1, timeZone),
+                                 timeZone)
+    for i in range(2, 15):
+        arc = getSunLongitude_batch(getNewMoonDay_batch(k + i, timeZone),
+                                    timeZone)
+        stop = active & ((arc == last) | (i == 14))
+        offsets[stop] = i - 1
+        active &= ~stop
+        last = arc
+    return offsets[inverse].reshape(a11.shape)
+
+
+def astronomicalS2L_batch(dd, mm, yy, timeZone=7):
+    '''def astronomicalS2L_batch(dd, mm, yy, timeZone = 7): Array version of
+    astronomicalS2L, returns the arrays (lunarDay, lunarMonth, lunarYear,
+    lunarLeap).'''
+    yy = np.asarray(yy, dtype=np.int64)
+    dayNumber = jdFromDate_batch(dd, mm, yy)
+    k = np.floor((dayNumber - 2415021.076998695)
+                 / 29.530588853).astype(np.int64)
+    monthStart = getNewMoonDay_batch(k + 1, timeZone)
+    late = monthStart > dayNumber
+    monthStart[late] = getNewMoonDay_batch(k[late], timeZone)
+    late = monthStart > dayNumber
+    monthStart[late] = getNewMoonDay_batch(k[late] - 1, timeZone)
+
+    thisYear = getLunarMonth11_batch(yy, timeZone)
+    before = thisYear >= monthStart
+    a11 = np.where(before, getLunarMonth11_batch(yy - 1, timeZone),
+                   thisYear)
+    b11 = np.where(before, thisYear,
+                   getLunarMonth11_batch(yy + 1, timeZone))
+    lunarYear = np.where(before, yy, yy + 1)
+    lunarDay = dayNumber - monthStart + 1
+    diff = np.trunc((monthStart - a11) / 29.).astype(np.int64)
+
+    lunarLeap = np.zeros(diff.shape, dtype=np.int64)
+    lunarMonth = diff + 11
+    leapYear = b11 - a11 > 365
+    leapMonthDiff = np.zeros(diff.shape, dtype=np.int64)
+    leapMonthDiff[leapYear] = getLeapMonthOffset_batch(a11[leapYear],
+                                                       timeZone)
+    afterLeap = leapYear & (diff >= leapMonthDiff)
+    lunarMonth = np.where(afterLeap, diff + 10, lunarMonth)
+    lunarLeap[afterLeap & (diff == leapMonthDiff)] = 1
+    lunarMonth = np.where(lunarMonth > 12, lunarMonth - 12, lunarMonth)
+    lunarYear = lunarYear - ((lunarMonth >= 11) & (diff < 4))
+    return lunarDay, lunarMonth, lunarYear, lunarLeap
+
+
+def astronomicalL2S_batch(lunarD, lunarM, lunarY, lunarLeap, tZ=7):
+    '''def astronomicalL2S_batch(lunarD, lunarM, lunarY, lunarLeap, tZ = 7):
+    Array version of astronomicalL2S, returns the arrays (day, month, year).
+    Non-existent leap months give 0/0/0 like the scalar function.'''
+    lunarD = np.asarray(lunarD, dtype=np.int64)
+    lunarM = np.asarray(lunarM, dtype=np.int64)
+    lunarY = np.asarray(lunarY, dtype=np.int64)
+    lunarLeap = np.asarray(lunarLeap, dtype=np.int64)
+    lunarD, lunarM, lunarY, lunarLeap = np.broadcast_arrays(
+        lunarD, lunarM, lunarY, lunarLeap)
+    late = lunarM >= 11
+    a11 = getLunarMonth11_batch(np.where(late, lunarY, lunarY - 1), tZ)
+    b11 = getLunarMonth11_batch(np.where(late, lunarY + 1, lunarY), tZ)
+    k = getMonthIndex_batch(a11)
+    off = lunarM - 11
+    off = np.where(off < 0, off + 12, off)
+
+    leapYear = b11 - a11 > 365
+    leapOff = np.zeros(off.shape, dtype=np.int64)
+    leapOff[leapYear] = getLeapMonthOffset_batch(a11[leapYear], tZ)
+    leapM = leapOff - 2
+    leapM = np.where(leapM < 0, leapM + 12, leapM)
+    invalid = leapYear & (lunarLeap != 0) & (lunarM != leapM)
+    off = off + (leapYear & ~invalid
+                 & ((lunarLeap != 0) | (off >= leapOff)))
+
+    monthStart = getNewMoonDay_batch(k + off, tZ)
+    day, month, year = jdToDate_batch(monthStart + lunarD - 1)
+    for values in (day, month, year):
+        values[invalid] = 0
+    return day, month, year
+
+
+_tableCache = {}
+
+
+def _tableArrays(timeZone):
+    table = getLunarTable(timeZone)
+    arrays = _tableCache.get(timeZone)
+    if arrays is None:
+        arrays = {
+            'month11': np.asarray(table.month11, dtype=np.int64),
+            'leapOffsets': np.asarray(table.leapOffsets, dtype=np.int64),
+            'monthStarts': np.asarray(table.monthStarts, dtype=np.int64),
+            'lunarMonths': np.asarray(table.lunarMonths, dtype=np.int64),
+            'lunarLeaps': np.asarray(table.lunarLeaps, dtype=np.int64),
+            'lunarYears': np.asarray(table.lunarYears, dtype=np.int64),
+        }
+        _tableCache[timeZone] = arrays
+    return table, arrays
+
+
+def S2L_batch(dd, mm, yy, timeZone=7):
+    '''def S2L_batch(dd, mm, yy, timeZone = 7): Array version of S2L, returns
+    the arrays (lunarDay, lunarMonth, lunarYear, lunarLeap). Dates covered by
+    the LunarTable are looked up with searchsorted, the others go through
+    astronomicalS2L_batch.'''
+    dd, mm, yy = np.broadcast_arrays(np.asarray(dd, dtype=np.int64),
+                                     np.asarray(mm, dtype=np.int64),
+                                     np.asarray(yy, dtype=np.int64))
+    table, arrays = _tableArrays(timeZone)
+    dayNumber = jdFromDate_batch(dd, mm, yy)
+    inTable = (dayNumber >= arrays['month11'][0]) \
+        & (dayNumber < arrays['month11'][-1])
+
+    result = tuple(np.zeros(dayNumber.shape, dtype=np.int64)
+                   for _ in range(4))
+    i = np.searchsorted(arrays['monthStarts'], dayNumber[inTable],
+                        side='right') - 1
+    result[0][inTable] = dayNumber[inTable] - arrays['monthStarts'][i] + 1
+    result[1][inTable] = arrays['lunarMonths'][i]
+    result[2][inTable] = arrays['lunarYears'][i]
+    result[3][inTable] = arrays['lunarLeaps'][i]
+
+    outside = ~inTable
+    if outside.any():
+        fallback = astronomicalS2L_batch(dd[outside], mm[outside],
+                                         yy[outside], timeZone)
+        for values, computed in zip(result, fallback):
+            values[outside] = computed
+    return result
+
+
+def L2S_batch(lunarD, lunarM, lunarY, lunarLeap, tZ=7):
+    '''def L2S_batch(lunarD, lunarM, lunarY, lunarLeap, tZ = 7): Array version
+    of L2S, returns the arrays (day, month, year). Years covered by the
+    LunarTable are looked up, the others go through
+    astronomicalL2S_batch.'''
+    lunarD, lunarM, lunarY, lunarLeap = np.broadcast_arrays(
+        np.asarray(lunarD, dtype=np.int64), np.asarray(lunarM, dtype=np.int64),
+        np.asarray(lunarY, dtype=np.int64),
+        np.asarray(lunarLeap, dtype=np.int64))
+    table, arrays = _tableArrays(tZ)
+    yy = np.where(lunarM < 11, lunarY, lunarY + 1)
+    inTable = (yy >= table.firstYear) & (yy <= table.lastYear)
+
+    result = tuple(np.zeros(lunarD.shape, dtype=np.int64) for _ in range(3))
+    segment = yy[inTable] - table.firstYear
+    a11 = arrays['month11'][segment]
+    M = lunarM[inTable]
+    off = M - 11
+    off = np.where(off < 0, off + 12, off)
+    leapOff = arrays['leapOffsets'][segment]
+    leapM = leapOff - 2
+    leapM = np.where(leapM < 0, leapM + 12, leapM)
+    leap = lunarLeap[inTable] != 0
+    invalid = (leapOff != 0) & leap & (M != leapM)
+    off = off + ((leapOff != 0) & ~invalid & (leap | (off >= leapOff)))
+    monthStart = arrays['monthStarts'][getMonthIndex_batch(a11) + off
+                                       - table.kFirst]
+    converted = jdToDate_batch(monthStart + lunarD[inTable] - 1)
+    for values, computed in zip(result, converted):
+        values[inTable] = np.where(invalid, 0, computed)
+
+    outside = ~inTable
+    if outside.any():
+        fallback = astronomicalL2S_batch(lunarD[outside], lunarM[outside],
+                                         lunarY[outside], lunarLeap[outside],
+                                         tZ)
+        for values, computed in zip(result, fallback):
+            values[outside] = computed
+    return result
+
+
+_solarTermCache = {}
+
+
+def solarTermOf_batch(jd, timeZone=7):
+    '''def solarTermOf_batch(jd, timeZone = 7): Array version of solarTermOf,
+    returns the arrays (term, entry day). Days outside the SolarTermTable
+    go through the scalar solarTermOf.'''
+    jd = np.asarray(jd, dtype=np.int64)
+    table = getSolarTermTable(timeZone)
+    entries = _solarTermCache.get(timeZone)
+    if entries is None:
+        entries = np.asarray(table.entries, dtype=np.int64)
+        _solarTermCache[timeZone] = entries
+    i = np.searchsorted(entries, jd, side='right') - 1
+    inTable = (i >= 0) & (i < len(entries) - 1)
+    i = np.clip(i, 0, len(entries) - 1)
+    term = (table.firstTerm + i) % 24
+    entry = entries[i]
+    for j in np.flatnonzero(~inTable):
+        term.flat[j], entry.flat[j] = solarTermOf(int(jd.flat[j]), timeZone)
+    return term, entry
+
+
+def tuTru_batch(nn, tt, nnnn, gioSinh, timeZone=7):
+    '''def tuTru_batch(nn, tt, nnnn, gioSinh, timeZone = 7): Array version of
+    battu.soThuTuTuTru, returns the arrays (year, month, day, hour) of
+    sexagenary indices 0..59 (see tables.HOA_GIAP).'''
+    nn, tt, nnnn, gioSinh = np.broadcast_arrays(
+        np.asarray(nn, dtype=np.int64), np.asarray(tt, dtype=np.int64),
+        np.asarray(nnnn, dtype=np.int64), np.asarray(gioSinh, dtype=np.int64))
+    jd = jdFromDate_batch(nn, tt, nnnn)
+    term = solarTermOf_batch(jd, timeZone)[0]
+    year = (nnnn - ((tt <= 2) & (term >= 18) & (term <= 20)) - 4) % 60
+    month = (12 * (year % 5) + 2 + (term + 3) % 24 // 2) % 60
+    day = (jd + 49) % 60
+    hour = (12 * (day % 5) + gioSinh - 1) % 60
+    return year, month, day, hour
+
+
+_bangCache = {}
+
+
+def _bangArray(bang):
+    array = _bangCache.get(id(bang))
+    if array is None:
+        array = np.asarray([0 if v is None else v for v in bang],
+                           dtype=np.int64)
+        _bangCache[id(bang)] = array
+    return array
+
+
+def anSao_batch(ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh,
+                quyTac=None):
+    '''def anSao_batch(ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh,
+    quyTac = engine.QUY_TAC): Array version of engine.anSao, runs every rule
+    once over all charts. Returns an (engine.SO_O, n) array; row saoID holds
+    the palace of that star for each chart.'''
+    from lasotuvi import engine
+    if quyTac is None:
+        quyTac = engine.QUY_TAC
+    inputs = np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=np.int64))
+                                   for v in (ngayAm, thangAm, gioSinh,
+                                             gioiTinh, canNam, chiNam)))
+    n = inputs[0].shape[0]
+    o = np.zeros((engine.SO_O, n), dtype=np.int64)
+    for row, values in zip((engine.NGAY, engine.THANG, engine.GIO,
+                            engine.GIOI_TINH, engine.CAN, engine.CHI), inputs):
+        o[row] = values
+    cols = np.arange(n)
+    for oDich, bang, neo, hangSo, heSo, chieu, gianTiep in quyTac.buoc:
+        khoa = np.full(n, hangSo, dtype=np.int64)
+        for oHeSo, h in heSo:
+            khoa += h * o[oHeSo]
+        if bang is not None:
+            o[oDich] = _bangArray(bang)[khoa]
+            continue
+        if chieu is not None:
+            khoa *= o[chieu]
+        if neo is not None:
+            khoa += o[o[neo], cols] if gianTiep else o[neo]
+        o[oDich] = (khoa - 1) % 12 + 1
+    return o
+
+
+def viTriSaoAtlas(chartAtlas):
+    '''def viTriSaoAtlas(chartAtlas): Star positions of every record of a
+    ChartAtlas, without copying the star columns one record at a time.
+    Returns (viTriSao, cungMenh): an (SO_SAO, SO_LA_SO) uint8 array in
+    recordIndex order (0 for stars not placed and records not computed)
+    and the Mệnh palace of each record.'''
+    from lasotuvi.atlas import SO_LA_SO, _CUNG_MENH, _SAO
+    from lasotuvi.tables import SO_SAO
+    records = np.frombuffer(chartAtlas.banGhi(), dtype=np.uint8).reshape(
+        SO_LA_SO, chartAtlas.recordSize)
+    viTriSao = np.zeros((SO_SAO, SO_LA_SO), dtype=np.uint8)
+    viTriSao[chartAtlas.saoThuTu] = records[:, _SAO:].T
+    viTriSao[:, records[:, _CUNG_MENH] == 0] = 0
+    return viTriSao, records[:, _CUNG_MENH].copy()
+
+
+# Bảng tra theo khoảng cách tới cung gốc (0-11, 12 là sao không được an)
+_vungBang = []
+
+
+def _bangVung():
+    if not _vungBang:
+        from lasotuvi.cachcuc import KHOANG_CACH_VUNG
+        _vungBang.extend(np.isin(np.arange(13), khoangCach)
+                         for khoangCach in KHOANG_CACH_VUNG)
+    return _vungBang
+
+
+def cachCuc_batch(viTriSao, cungMenh, boCachCuc=None):
+    '''def cachCuc_batch(viTriSao, cungMenh, boCachCuc = CACH_CUC): Array
+    version of cachcuc.timCachCuc anchored at Mệnh. viTriSao is an
+    (SO_SAO, n) array of palaces (rows of anSao_batch or viTriSaoAtlas),
+    cungMenh the n Mệnh palaces. Returns a (len(boCachCuc), n) bool array;
+    charts with cungMenh == 0 never match.'''
+    if boCachCuc is None:
+        from lasotuvi.cachcuc import CACH_CUC
+        boCachCuc = CACH_CUC
+    vungBang = _bangVung()
+    cungMenh = np.asarray(cungMenh, dtype=np.int64)
+    khoangCach = {}
+
+    def khoangCachSao(saoID):
+        kc = khoangCach.get(saoID)
+        if kc is None:
+            viTri = np.asarray(viTriSao[saoID], dtype=np.int64)
+            kc = np.where(viTri > 0, (viTri - cungMenh) % 12, 12)
+            khoangCach[saoID] = kc
+        return kc
+
+    khop = np.zeros((len(boCachCuc), cungMenh.shape[0]), dtype=bool)
+    for i, cc in enumerate(boCachCuc):
+        ok = cungMenh > 0
+        for vung, mask, toiThieu, toiDa in cc.dieuKien:
+            bang = vungBang[vung]
+            dem = np.zeros(cungMenh.shape[0], dtype=np.int64)
+            for saoID in range(mask.bit_length()):
+                if mask >> saoID & 1:
+                    dem += bang[khoangCachSao(saoID)]
+            ok &= (dem >= toiThieu) & (dem <= toiDa)
+        for saoID, cungMask in cc.viTri:
+            bang = np.array([cungMask >> cungSo & 1 for cungSo in range(13)],
+                            dtype=bool)
+            ok &= bang[np.asarray(viTriSao[saoID], dtype=np.int64)]
+        khop[i] = ok
+    return khop
+
+
+_TU_HOA_BANG = np.array([(0, 0, 0, 0)] + list(TU_HOA[1:]), dtype=np.int64)
+
+
+def luuNien_batch(goc, nam):
+    '''def luuNien_batch(goc, nam): Array version of luunien.luuNien for
+    many years of one natal chart (luunien.LaSoGoc). Returns a LuuNien whose
+    fields are arrays over nam; tuHoaSao and tuHoa are (4, n).'''
+    from lasotuvi.luunien import LUU_LOC_TON, LUU_THIEN_MA, LuuNien
+    nam = np.atleast_1d(np.asarray(nam, dtype=np.int64))
+    canNam = (nam + 6) % 10 + 1
+    chiNam = (nam + 8) % 12 + 1
+    tuoi = nam - goc.namSinh + 1
+    locTon = _bangArray(LUU_LOC_TON)[canNam]
+    tuHoaSao = _TU_HOA_BANG[canNam].T
+    viTriSao = np.frombuffer(goc.viTriSao, dtype=np.uint8).astype(np.int64)
+    thu = (tuoi - goc.cuc) // 10
+    cungTheoDaiHan = np.array(goc.cungTheoDaiHan + (0,), dtype=np.int64)
+    daiHan = cungTheoDaiHan[np.where((thu >= 0) & (thu < 12), thu, 12)]
+    return LuuNien(nam, canNam, chiNam, tuoi, chiNam, locTon,
+                   locTon % 12 + 1, (locTon - 2) % 12 + 1,
+                   _bangArray(LUU_THIEN_MA)[chiNam], tuHoaSao,
+                   viTriSao[tuHoaSao],
+                   daiHan, np.asarray(goc.tieuHan, dtype=np.int64)[chiNam])
+
+
+_hopTuoiCache = {}
+
+
+def _bangHopTuoi():
+    if not _hopTuoiCache:
+        from lasotuvi import hoptuoi
+        for ten in ('QUAN_HE_CHI', 'QUAN_HE_CAN', 'HANH_NAP_AM', 'NAP_AM',
+                    'BANG_DIEM_CHI', 'BANG_DIEM_CAN', 'BANG_DIEM_PHU_THE',
+                    'DIEM_NAP_AM'):
+            _hopTuoiCache[ten] = np.asarray(getattr(hoptuoi, ten),
+                                            dtype=np.int64)
+    return _hopTuoiCache
+
+
+def _phuThe_batch(o1, o2, phuThe, menh):
+    from lasotuvi import engine
+    trungSao = np.zeros(np.broadcast(phuThe, menh).shape, dtype=np.int64)
+    for saoID in engine.NHOM_SAO["chinh_tinh"]:
+        trungSao += (o1[saoID] == phuThe) & (o2[saoID] == menh)
+    return _bangHopTuoi()['QUAN_HE_CHI'][phuThe, menh], trungSao
+
+
+def hopTuoi_batch(o1, o):
+    '''def hopTuoi_batch(o1, o): Array version of hoptuoi.hopTuoi scoring
+    one chart o1 (an engine.anSao slot list) against every chart of o (an
+    (engine.SO_O, n) array from anSao_batch). Returns a KetQuaHop whose
+    fields are arrays of length n.'''
+    from lasotuvi import engine, hoptuoi
+    bang = _bangHopTuoi()
+    o1 = np.asarray(o1, dtype=np.int64)
+    o = np.asarray(o, dtype=np.int64)
+    can1, chi1 = o1[engine.CAN], o1[engine.CHI]
+    can, chi = o[engine.CAN], o[engine.CHI]
+    quanHeChi = bang['QUAN_HE_CHI'][chi1, chi]
+    quanHeCan = bang['QUAN_HE_CAN'][can1, can]
+    hanh = bang['HANH_NAP_AM'][(chi - 1) * 10 + can - 1]
+    napAm = bang['NAP_AM'][bang['HANH_NAP_AM'][(chi1 - 1) * 10 + can1 - 1],
+                           hanh]
+    phuThe1 = (o1[engine.MENH] + hoptuoi.PHU_THE - 1) % 12 + 1
+    phuThe = (o[engine.MENH] + hoptuoi.PHU_THE - 1) % 12 + 1
+    phuThe12, trungSao12 = _phuThe_batch(o1, o, phuThe1, o[engine.MENH])
+    phuThe21, trungSao21 = _phuThe_batch(o, o1, phuThe, o1[engine.MENH])
+    diem = bang['BANG_DIEM_CHI'][quanHeChi] \
+        + bang['BANG_DIEM_CAN'][quanHeCan] + bang['DIEM_NAP_AM'][napAm] \
+        + bang['BANG_DIEM_PHU_THE'][phuThe12] \
+        + bang['BANG_DIEM_PHU_THE'][phuThe21] \
+        + hoptuoi.DIEM_TRUNG_SAO * (trungSao12 + trungSao21)
+    return hoptuoi.KetQuaHop(quanHeChi, quanHeCan, napAm, phuThe12,
+                             phuThe21, trungSao12, trungSao21, diem)
+
+
+_xemNgayCache = {}
+
+
+def _bangXemNgay():
+    if not _xemNgayCache:
+        from lasotuvi import hoptuoi, xemngay
+        for module, ten in ((hoptuoi, 'QUAN_HE_CHI'), (hoptuoi, 'QUAN_HE_CAN'),
+                            (hoptuoi, 'BANG_DIEM_CAN'),
+                            (xemngay, 'DIEM_THAN'),
+                            (xemngay, 'BANG_DIEM_CHI'),
+                            (xemngay, 'BANG_DIEM_NGAY_KY')):
+            _xemNgayCache[ten] = np.asarray(getattr(module, ten),
+                                            dtype=np.int64)
+    return _xemNgayCache
+
+
+def xemNgay_batch(jd, canNam, chiNam, timeZone=7):
+    '''def xemNgay_batch(jd, canNam, chiNam, timeZone = 7): Array version of
+    xemngay.xemNgay over the days of jd for one birth year can/chi. Lunar
+    months come from S2L_batch and the Tu ly / Tu tuyet days from
+    solarTermOf_batch on the following day. Returns an XemNgay whose fields
+    are arrays.'''
+    from lasotuvi import xemngay
+    bang = _bangXemNgay()
+    jd = np.asarray(jd, dtype=np.int64)
+    ngayAm, thangAm, namAm, thangNhuan = S2L_batch(*jdToDate_batch(jd),
+                                                   timeZone=timeZone)
+    canNgay, chiNgay = (jd + 9) % 10 + 1, (jd + 1) % 12 + 1
+    thanhLong = (2 * ((thangAm + 1) % 12) + 8) % 12 + 1
+    than = (chiNgay - thanhLong) % 12
+    quanHeChi = bang['QUAN_HE_CHI'][chiNam, chiNgay]
+    quanHeCan = bang['QUAN_HE_CAN'][canNam, canNgay]
+    tiet, vaoTiet = solarTermOf_batch(jd + 1, timeZone)
+    truocTiet = vaoTiet == jd + 1
+    ngayKy = np.where(np.isin(ngayAm, xemngay.NGAY_TAM_NUONG),
+                      xemngay.TAM_NUONG, 0) \
+        | np.where(np.isin(ngayAm, xemngay.NGAY_NGUYET_KY),
+                   xemngay.NGUYET_KY, 0) \
+        | np.where(truocTiet & np.isin(tiet, xemngay.TIET_TU_LY),
+                   xemngay.TU_LY, 0) \
+        | np.where(truocTiet & np.isin(tiet, xemngay.TIET_TU_TUYET),
+                   xemngay.TU_TUYET, 0)
+    diem = bang['DIEM_THAN'][than] + bang['BANG_DIEM_CHI'][quanHeChi] \
+        + bang['BANG_DIEM_CAN'][quanHeCan] \
+        + bang['BANG_DIEM_NGAY_KY'][ngayKy]
+    return xemngay.XemNgay(jd, ngayAm, thangAm, namAm, thangNhuan, canNgay,
+                           chiNgay, than, quanHeChi, quanHeCan, ngayKy, diem)
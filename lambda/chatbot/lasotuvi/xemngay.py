@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Xem ngày tốt: chấm điểm các ngày trong một khoảng theo tuổi người xem.
+
+Mỗi ngày được chấm theo:
+
+    than        thần trực ngày (Thanh Long, Minh Đường,...) theo chi tháng
+                âm và chi ngày; sáu thần hoàng đạo cộng điểm, sáu thần hắc
+                đạo trừ điểm (cùng quy tắc với tables.GIO_HOANG_DAO)
+    quanHeChi   cờ quan hệ giữa chi ngày và chi năm sinh (hoptuoi.TAM_HOP,
+                LUC_HOP, LUC_XUNG,...)
+    quanHeCan   cờ can hợp / can xung giữa can ngày và can năm sinh
+    ngayKy      cờ ngày kỵ: Tam nương, Nguyệt kỵ (theo ngày âm), Tứ ly,
+                Tứ tuyệt (ngày liền trước tiết phân, chí và tiết lập)
+    diem        tổng điểm theo các bảng DIEM_*
+
+ngayTot chấm cả khoảng ngày một lượt bằng vectorized.xemNgay_batch (tháng
+âm tra từ LunarTable, tiết khí từ SolarTermTable, can chi ngày tính thẳng
+từ số ngày Julius) rồi lấy các ngày điểm cao nhất.
+
+    tuNgay = jdFromDate(1, 11, 2026)
+    for ngay in ngayTot(tuNgay, tuNgay + 90, canNam, chiNam):
+        jdToDate(ngay.jd), ngay.diem, lyDo(ngay)
+"""
+from collections import namedtuple
+
+from lasotuvi.hoptuoi import (BANG_DIEM_CAN, LUC_HAI, LUC_HOP, LUC_XUNG,
+                              QUAN_HE_CAN, QUAN_HE_CHI, TAM_HOP,
+                              TEN_QUAN_HE_CAN, TEN_QUAN_HE_CHI, TU_HANH_XUNG,
+                              bangDiem)
+from lasotuvi.Lich_HND import S2L, jdToDate, solarTermOf
+
+# Thập nhị thần trực ngày, bắt đầu từ Thanh Long
+THAP_NHI_THAN = ("Thanh Long", "Minh Đường", "Thiên Hình", "Chu Tước",
+                 "Kim Quỹ", "Kim Đường", "Bạch Hổ", "Ngọc Đường",
+                 "Thiên Lao", "Huyền Vũ", "Tư Mệnh", "Câu Trận")
+HOANG_DAO = (0, 1, 4, 5, 7, 10)
+
+# Cờ ngày kỵ
+TAM_NUONG, NGUYET_KY, TU_LY, TU_TUYET = 1, 2, 4, 8
+TEN_NGAY_KY = ((TAM_NUONG, "Tam nương"), (NGUYET_KY, "Nguyệt kỵ"),
+               (TU_LY, "Tứ ly"), (TU_TUYET, "Tứ tuyệt"))
+NGAY_TAM_NUONG = (3, 7, 13, 18, 22, 27)
+NGAY_NGUYET_KY = (5, 14, 23)
+# Số thứ tự tiết khí (Lich_HND.SOLAR_TERM_NAMES) mà ngày liền trước là Tứ
+# ly (Xuân phân, Hạ chí, Thu phân, Đông chí) hoặc Tứ tuyệt (Lập hạ, Lập
+# thu, Lập đông, Lập xuân)
+TIET_TU_LY = (0, 6, 12, 18)
+TIET_TU_TUYET = (3, 9, 15, 21)
+
+# Điểm của thần trực ngày, quan hệ với tuổi và ngày kỵ; lục xung cũng là
+# tứ hành xung nên bị trừ cả hai. Can ngày chấm như hoptuoi.DIEM_CAN.
+DIEM_THAN = tuple(2 if than in HOANG_DAO else -1 for than in range(12))
+DIEM_CHI = {TAM_HOP: 2, LUC_HOP: 2, LUC_XUNG: -2, TU_HANH_XUNG: -1,
+            LUC_HAI: -1}
+DIEM_NGAY_KY = {TAM_NUONG: -2, NGUYET_KY: -2, TU_LY: -3, TU_TUYET: -3}
+
+
+# Điểm tra thẳng theo giá trị cờ
+BANG_DIEM_CHI = bangDiem(DIEM_CHI, 64)
+BANG_DIEM_NGAY_KY = bangDiem(DIEM_NGAY_KY, 16)
+
+XemNgay = namedtuple('XemNgay', [
+    'jd', 'ngayAm', 'thangAm', 'namAm', 'thangNhuan', 'canNgay', 'chiNgay',
+    'than', 'quanHeChi', 'quanHeCan', 'ngayKy', 'diem'])
+XemNgay.__doc__ = """Kết quả chấm một ngày. than là chỉ số trong
+THAP_NHI_THAN, ngayKy là các cờ TAM_NUONG, NGUYET_KY, TU_LY, TU_TUYET."""
+
+
+def chiThang(thangAm):
+    """Chi của tháng âm: tháng Giêng là Dần"""
+    return (thangAm + 1) % 12 + 1
+
+
+def thanTrucNgay(thangAm, chiNgay):
+    """Chỉ số thần trực ngày trong THAP_NHI_THAN
+
+    Thanh Long của tháng Dần, Thân khởi ở ngày Tý, mỗi cặp tháng sau tiến
+    thêm hai chi, như tables.GIO_HOANG_DAO với chi tháng thay cho chi ngày.
+    """
+    thanhLong = (2 * (chiThang(thangAm) - 1) + 8) % 12 + 1
+    return (chiNgay - thanhLong) % 12
+
+
+def _ngayKyTiet(jd, timeZone):
+    tiet = solarTermOf(jd + 1, timeZone)
+    if tiet.jd != jd + 1:
+        return 0
+    return TU_LY if tiet.term in TIET_TU_LY else \
+        TU_TUYET if tiet.term in TIET_TU_TUYET else 0
+
+
+def xemNgay(jd, canNam, chiNam, timeZone=7):
+    """Chấm một ngày cho người có can, chi năm sinh canNam, chiNam
+
+    Args:
+        jd (int): Số ngày Julius (Lich_HND.jdFromDate)
+        canNam (int): Can năm sinh (1: Giáp,...)
+        chiNam (int): Chi năm sinh (1: Tý,...)
+
+    Returns:
+        XemNgay
+    """
+    ngayAm, thangAm, namAm, thangNhuan = S2L(*jdToDate(jd), timeZone)
+    canNgay, chiNgay = (jd + 9) % 10 + 1, (jd + 1) % 12 + 1
+    than = thanTrucNgay(thangAm, chiNgay)
+    quanHeChi = QUAN_HE_CHI[chiNam][chiNgay]
+    quanHeCan = QUAN_HE_CAN[canNam][canNgay]
+    ngayKy = (TAM_NUONG if ngayAm in NGAY_TAM_NUONG else 0) \
+        | (NGUYET_KY if ngayAm in NGAY_NGUYET_KY else 0) \
+        | _ngayKyTiet(jd, timeZone)
+    diem = DIEM_THAN[than] + BANG_DIEM_CHI[quanHeChi] \
+        + BANG_DIEM_CAN[quanHeCan] + BANG_DIEM_NGAY_KY[ngayKy]
+    return XemNgay(jd, ngayAm, thangAm, namAm, thangNhuan, canNgay, chiNgay,
+                   than, quanHeChi, quanHeCan, ngayKy, diem)
+
+
+def ngayTot(tuNgay, denNgay, canNam, chiNam, soNgay=10, timeZone=7):
+    """Các ngày điểm cao nhất trong khoảng [tuNgay, denNgay]
+
+    Args:
+        tuNgay, denNgay (int): Số ngày Julius của ngày đầu và ngày cuối
+        canNam (int): Can năm sinh (1: Giáp,...)
+        chiNam (int): Chi năm sinh (1: Tý,...)
+        soNgay (int, optional): Số ngày cần lấy
+
+    Returns:
+        list: Tối đa soNgay XemNgay, điểm giảm dần, cùng điểm thì ngày sớm
+            trước
+    """
+    if denNgay < tuNgay:
+        raise Exception("Ngày cuối phải sau ngày đầu")
+    # NumPy chỉ cần khi chấm cả khoảng ngày, xemNgay không phụ thuộc vào nó
+    import numpy as np
+
+    from lasotuvi.vectorized import xemNgay_batch
+
+    cot = xemNgay_batch(np.arange(tuNgay, denNgay + 1), canNam, chiNam,
+                        timeZone)
+    thuTu = np.lexsort((cot.jd, -cot.diem))[:soNgay]
+    return [XemNgay(*hang) for hang in zip(*(v[thuTu].tolist() for v in cot))]
+
+
+def lyDo(ngay):
+    """Các lý do (tiếng Việt) làm nên điểm của một XemNgay"""
+    than = THAP_NHI_THAN[ngay.than]
+    dong = [("Hoàng đạo (%s)" if ngay.than in HOANG_DAO else
+             "Hắc đạo (%s)") % than]
+    for co, ten in TEN_QUAN_HE_CHI:
+        if ngay.quanHeChi & co and co in DIEM_CHI:
+            dong.append("%s với tuổi" % ten)
+    for co, ten in TEN_QUAN_HE_CAN:
+        if ngay.quanHeCan & co:
+            dong.append("%s với tuổi" % ten)
+    for co, ten in TEN_NGAY_KY:
+        if ngay.ngayKy & co:
+            dong.append(ten)
+    return dong
@@ -0,0 +1,41 @@
+"""Charts/sec of lasotuvi.batch.build_charts by worker count.
+
+Run from lambda/metaphysical:
+
+    python benchmarks/bench_batch.py --charts 20000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lasotuvi.batch import build_charts  # noqa: E402
+
+
+def random_records(count, seed=0):
+    rng = random.Random(seed)
+    return [(rng.randint(1, 28), rng.randint(1, 12), rng.randint(1940, 2010),
+             rng.randint(1, 12), rng.choice((1, -1)))
+            for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--charts', type=int, default=5000)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    records = random_records(args.charts)
+    for workers in args.workers:
+        start = time.perf_counter()
+        count = sum(1 for _ in build_charts(records, workers=workers))
+        elapsed = time.perf_counter() - start
+        print("workers=%-3d %8.0f charts/sec" % (workers, count / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Integer jdFromDate / jdToDate against the original float versions.
+
+Scalar calls, the list variants and the NumPy batch variants over every
+day of 1900-2100. Run from lambda/metaphysical:
+
+    python benchmarks/bench_julian.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lasotuvi.Lich_HND import (jdFromDate, jdFromDate_list,  # noqa: E402
+                               jdToDate, jdToDate_list)
+from lasotuvi.vectorized import jdFromDate_batch, jdToDate_batch  # noqa: E402
+
+
+def jdFromDate_float(dd, mm, yy):
+    a = int((14 - mm) / 12.)
+    y = yy + 4800 - a
+    m = mm + 12 * a - 3
+    jd = dd + int((153 * m + 2) / 5.) + 365 * y + int(y / 4.) \
+        - int(y / 100.) + int(y / 400.) - 32045
+    if (jd < 2299161):
+        jd = dd + int((153 * m + 2) / 5.) + 365 * y + int(y / 4.) - 32083
+    return jd
+
+
+def jdToDate_float(jd):
+    if (jd > 2299160):
+        a = jd + 32044
+        b = int((4 * a + 3) / 146097.)
+        c = a - int((b * 146097) / 4.)
+    else:
+        b = 0
+        c = jd + 32082
+    d = int((4 * c + 3) / 1461.)
+    e = c - int((1461 * d) / 4.)
+    m = int((5 * e + 2) / 153.)
+    return [e - int((153 * m + 2) / 5.) + 1, m + 3 - 12 * int(m / 10.),
+            b * 100 + d - 4800 + int(m / 10.)]
+
+
+def best_of(fn, number, repeat=5):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def main():
+    jds = list(range(jdFromDate(1, 1, 1900), jdFromDate(1, 1, 2101)))
+    dates = jdToDate_list(jds)
+    dd, mm, yy = (list(column) for column in zip(*dates))
+    rows = [
+        ("jdFromDate float", lambda: jdFromDate_float(15, 8, 2000), 1),
+        ("jdFromDate", lambda: jdFromDate(15, 8, 2000), 1),
+        ("jdToDate float", lambda: jdToDate_float(2451772), 1),
+        ("jdToDate", lambda: jdToDate(2451772), 1),
+        ("jdFromDate float loop",
+         lambda: [jdFromDate_float(*date) for date in dates], len(jds)),
+        ("jdFromDate_list", lambda: jdFromDate_list(dates), len(jds)),
+        ("jdFromDate_batch", lambda: jdFromDate_batch(dd, mm, yy), len(jds)),
+        ("jdToDate float loop",
+         lambda: [jdToDate_float(jd) for jd in jds], len(jds)),
+        ("jdToDate_list", lambda: jdToDate_list(jds), len(jds)),
+        ("jdToDate_batch", lambda: jdToDate_batch(jds), len(jds)),
+    ]
+    for name, fn, count in rows:
+        number = 100000 if count == 1 else 3
+        print("%-24s %8.3f us/date" % (name, best_of(fn, number) / count
+                                       * 1e6))
+
+
+if __name__ == '__main__':
+    main()
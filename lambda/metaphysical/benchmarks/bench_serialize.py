@@ -0,0 +1,63 @@
+"""Encode / decode throughput of lasotuvi.serialize against json.dumps of the
+object graph (vars of lapThienBan, every cung with its star dicts).
+
+Run from lambda/metaphysical:
+
+    python benchmarks/bench_serialize.py --number 2000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lasotuvi.batch import lapLaSo  # noqa: E402
+from lasotuvi.serialize import (decodeBinary, decodeJSON,  # noqa: E402
+                                encodeBinary, encodeJSON)
+
+RECORD = (15, 8, 2000, 1, -1, "Test")
+
+
+def object_graph(db, tb):
+    """Lá số như cách đọc thẳng các đối tượng Python"""
+    return {
+        "thienBan": {k: dict(v) if isinstance(v, dict) else v
+                     for k, v in vars(tb).items()},
+        "diaBan": [dict({k: v for k, v in vars(cung).items()
+                         if k != 'cungSao'},
+                        cungSao=[{k: sao[k] for k in sao.keys()}
+                                 for sao in cung.cungSao])
+                   for cung in db.thapNhiCung[1:]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=2000)
+    args = parser.parse_args()
+
+    db, tb = lapLaSo(RECORD)
+    graph = json.dumps(object_graph(db, tb), ensure_ascii=False)
+    compact, packed = encodeJSON(db, tb), encodeBinary(db, tb)
+    cases = [
+        ("json.dumps(object graph)",
+         lambda: json.dumps(object_graph(db, tb), ensure_ascii=False),
+         lambda: json.loads(graph), graph.encode('utf-8')),
+        ("encodeJSON / decodeJSON", lambda: encodeJSON(db, tb),
+         lambda: decodeJSON(compact), compact.encode('utf-8')),
+        ("encodeBinary / decodeBinary", lambda: encodeBinary(db, tb),
+         lambda: decodeBinary(packed), packed),
+    ]
+    print("%-30s %12s %12s %8s" % ("", "encode/s", "decode/s", "bytes"))
+    for name, encode, decode, data in cases:
+        rates = [args.number / min(timeit.repeat(fn, number=args.number,
+                                                 repeat=5))
+                 for fn in (encode, decode)]
+        print("%-30s %12.0f %12.0f %8d"
+              % (name, rates[0], rates[1], len(data)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Micro-benchmark for the lasotuvi lookup helpers and per-chart cost.
+
+Run from lambda/metaphysical:
+
+    python benchmarks/bench_tables.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lasotuvi.AmDuong import (nguHanh, nguHanhNapAm, timLuuTru,  # noqa: E402
+                              timThienKhoi, timThienQuanThienPhuc, timTriet)
+from lasotuvi.App import lapDiaBan  # noqa: E402
+from lasotuvi.DiaBan import diaBan, timDacTinh  # noqa: E402
+from lasotuvi.ThienBan import lapThienBan  # noqa: E402
+
+HELPERS = [
+    ("nguHanh", lambda: nguHanh("H")),
+    ("nguHanhNapAm", lambda: nguHanhNapAm(5, 3)),
+    ("nguHanhNapAm banMenh", lambda: nguHanhNapAm(5, 3, True)),
+    ("timDacTinh", lambda: timDacTinh(14, 7)),
+    ("timThienKhoi", lambda: timThienKhoi(7)),
+    ("timThienQuanThienPhuc", lambda: timThienQuanThienPhuc(7)),
+    ("timLuuTru", lambda: timLuuTru(7)),
+    ("timTriet", lambda: timTriet(7)),
+    ("diaBan()", lambda: diaBan(5, 7)),
+]
+
+
+def chart():
+    db = lapDiaBan(diaBan, 15, 8, 2000, 1, -1, True, 7)
+    lapThienBan(15, 8, 2000, 1, -1, "Test", db)
+
+
+def best_of(fn, number, repeat=5):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def main():
+    for name, fn in HELPERS:
+        print("%-24s %8.3f us/call" % (name, best_of(fn, 20000) * 1e6))
+    print("%-24s %8.1f us/chart"
+          % ("lapDiaBan+lapThienBan", best_of(chart, 300) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Benchmark suite for the lasotuvi engine.
+
+Reports per-function timings, whole-chart throughput and peak allocations
+(tracemalloc) over the golden corpus inputs. Run from lambda/metaphysical:
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --json after.json --compare before.json
+
+Pair it with the golden corpus test (tests/test_golden.py) to check that an
+optimization is both bit-for-bit equivalent and faster.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from lasotuvi import engine  # noqa: E402
+from lasotuvi.AmDuong import DateFacts  # noqa: E402
+from lasotuvi.App import lapDiaBan, lapLaSo  # noqa: E402
+from lasotuvi.DiaBan import diaBan  # noqa: E402
+from lasotuvi.Lich_HND import (L2S, S2L, astronomicalS2L,  # noqa: E402
+                               getSunLongitude, jdFromDate, jdToDate,
+                               solarTermOf)
+from lasotuvi.ThienBan import lapThienBan  # noqa: E402
+from tests.golden import corpus_inputs  # noqa: E402
+
+BIRTH = (15, 8, 2000, 1, -1)
+FACTS = DateFacts(15, 8, 2000, 1)
+BOARD = lapDiaBan(diaBan, *BIRTH, True, 7)
+
+FUNCTIONS = [
+    ("jdFromDate", lambda: jdFromDate(15, 8, 2000)),
+    ("jdToDate", lambda: jdToDate(2451772)),
+    ("getSunLongitude", lambda: getSunLongitude(2451772, 7)),
+    ("solarTermOf", lambda: solarTermOf(2451772)),
+    ("S2L", lambda: S2L(15, 8, 2000)),
+    ("astronomicalS2L", lambda: astronomicalS2L(15, 8, 2000)),
+    ("L2S", lambda: L2S(16, 7, 2000, 0)),
+    ("DateFacts", lambda: DateFacts(15, 8, 2000, 1)),
+    ("engine.anSao", lambda: engine.anSao(FACTS.ngayAm, FACTS.thangAm,
+                                          FACTS.canNam, FACTS.chiNam, 1, -1)),
+    ("lapDiaBan", lambda: lapDiaBan(diaBan, *BIRTH, True, 7,
+                                    dateFacts=FACTS)),
+    ("lapThienBan", lambda: lapThienBan(15, 8, 2000, 1, -1, "", BOARD,
+                                        dateFacts=FACTS)),
+    ("LaSo Menh chinh_tinh", lambda: lapLaSo(*BIRTH, True, 7).palace(
+        "Mệnh", groups={"chinh_tinh"})),
+]
+
+
+def build_chart(record):
+    facts = DateFacts(*record[:4])
+    db = lapDiaBan(diaBan, *record, True, 7, dateFacts=facts)
+    return db, lapThienBan(*record, "", db, dateFacts=facts)
+
+
+def time_functions(number):
+    results = {}
+    for name, fn in FUNCTIONS:
+        best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+        results[name] = best * 1e6
+    return results
+
+
+def charts_per_second(records):
+    start = time.perf_counter()
+    for record in records:
+        build_chart(record)
+    return len(records) / (time.perf_counter() - start)
+
+
+def peak_allocations(records):
+    """Peak traced bytes for one chart and for keeping all charts alive"""
+    tracemalloc.start()
+    build_chart(records[0])
+    one = tracemalloc.get_traced_memory()[1]
+    tracemalloc.reset_peak()
+    charts = [build_chart(record) for record in records]
+    many = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del charts
+    return {"one_chart_bytes": one,
+            "per_kept_chart_bytes": many // len(records)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=2000,
+                        help="Calls per timing repeat")
+    parser.add_argument('--json', help="Write results to this file")
+    parser.add_argument('--compare', help="Earlier --json output to compare")
+    args = parser.parse_args()
+
+    records = list(corpus_inputs())
+    results = {
+        "us_per_call": time_functions(args.number),
+        "charts_per_sec": charts_per_second(records),
+        "memory": peak_allocations(records[:1000]),
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    for name, us in results["us_per_call"].items():
+        line = "%-24s %10.2f us" % (name, us)
+        if baseline and name in baseline["us_per_call"]:
+            line += "   x%.2f" % (baseline["us_per_call"][name] / us)
+        print(line)
+    line = "%-24s %10.0f" % ("charts/sec", results["charts_per_sec"])
+    if baseline:
+        line += "   x%.2f" % (results["charts_per_sec"]
+                              / baseline["charts_per_sec"])
+    print(line)
+    for name, value in results["memory"].items():
+        print("%-24s %10d" % (name, value))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,21 +3,69 @@ import boto3
 import os
 import sys
 import traceback
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 # Import thư viện Tử Vi (Giả định đã có trong Layer hoặc package)
 # Nếu chạy local mà không có folder này sẽ lỗi, nhưng trong môi trường Test chúng ta sẽ Mock nó hoặc chấp nhận lỗi import nếu không test sâu vào hàm library.
 try:
-    from lasotuvi.App import lapDiaBan
+    from lasotuvi.AmDuong import DateFacts
+    from lasotuvi.chartcache import DynamoDBStore, canonicalSignature, getChartCache, lapDiaBan
     from lasotuvi.DiaBan import diaBan as DiaBanClass
     from lasotuvi.ThienBan import lapThienBan
 except ImportError:
     # Fallback giả định để code không crash ngay khi import nếu thiếu thư viện (hữu ích khi chạy test local thiếu lib)
     print("WARNING: Không tìm thấy thư viện lasotuvi. Các chức năng Tử Vi sẽ không hoạt động.")
+    DateFacts = None
+    DynamoDBStore = None
+    canonicalSignature = None
+    getChartCache = None
     lapDiaBan = None
     DiaBanClass = None
     lapThienBan = None
 
+# Các tính năng bổ sung import riêng từng khối: thiếu một module chỉ tắt tính năng đó, không tắt lá số
+try:
+    from lasotuvi.battu import TRU, tuTru
+except ImportError:
+    TRU = None
+    tuTru = None
+
+try:
+    from lasotuvi.bitset import LaSoBit
+    from lasotuvi.cachcuc import timCachCuc
+except ImportError:
+    LaSoBit = None
+    timCachCuc = None
+
+try:
+    from lasotuvi.hoptuoi import hopTuoi, moTaHopTuoi
+except ImportError:
+    hopTuoi = None
+    moTaHopTuoi = None
+
+try:
+    from lasotuvi.Lich_HND import SOLAR_TERM_NAMES, jdFromDate, jdToDate
+    from lasotuvi.lichvannien import thangLich
+except ImportError:
+    SOLAR_TERM_NAMES = None
+    jdFromDate = None
+    jdToDate = None
+    thangLich = None
+
+try:
+    from lasotuvi.serialize import toDict
+except ImportError:
+    toDict = None
+
+try:
+    from lasotuvi.xemngay import HOANG_DAO, THAP_NHI_THAN, lyDo, ngayTot
+except ImportError:
+    HOANG_DAO = None
+    THAP_NHI_THAN = None
+    lyDo = None
+    ngayTot = None
+
 from prompts import get_tarot_prompt, get_astrology_prompt, get_numerology_prompt, get_horoscope_prompt
 
 # ==========================================
@@ -27,6 +75,8 @@ BEDROCK_REGION = os.environ.get("BEDROCK_REGION", "ap-southeast-1")
 # Model ID mặc định là Nova Pro như bạn yêu cầu
 LLM_MODEL_ID = os.environ.get("BEDROCK_MODEL_ID", "apac.amazon.nova-pro-v1:0") 
 DYNAMODB_TABLE_NAME = os.environ.get("DYNAMODB_TABLE_NAME", "SorcererXStreme_Metaphysical_Table")
+# Bảng lưu lá số Tử Vi dùng chung với chatbot (khóa category / entity_name), bỏ trống thì chỉ giữ trong tiến trình
+TUVI_CHART_TABLE = os.environ.get("TUVI_CHART_TABLE")
 
 # === KHỞI TẠO CLIENTS ===
 # Lưu ý: Khởi tạo global giúp tận dụng connection reuse trong Lambda
@@ -34,6 +84,8 @@ try:
     bedrock_client = boto3.client('bedrock-runtime', region_name=BEDROCK_REGION)
     dynamodb = boto3.resource('dynamodb', region_name=BEDROCK_REGION)
     table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+    if TUVI_CHART_TABLE and getChartCache is not None:
+        getChartCache().store = DynamoDBStore(dynamodb.Table(TUVI_CHART_TABLE))
 except Exception as e:
     print(f"INIT ERROR: Không thể khởi tạo AWS Clients. {e}")
     bedrock_client = None
@@ -210,6 +262,12 @@ def handle_astrology(body):
         === ĐÁNH GIÁ ĐỘ HỢP TỪ DỮ LIỆU ===
         Kết luận sơ bộ: {match_status}
         """
+        tuvi_compatibility = calculate_tuvi_compatibility(user_context, partner_context)
+        if tuvi_compatibility:
+            combined_context += f"""
+        === HỢP TUỔI THEO TỬ VI ===
+        {tuvi_compatibility}
+        """
         
         love_query = f"Phân tích độ hợp nhau giữa {user_zodiac} và {partner_zodiac}. Dựa trên 'Đánh giá độ hợp' đã cung cấp để đưa ra lời khuyên."
         prompt = get_astrology_prompt('love', f"{user_zodiac} & {partner_zodiac}", f"{dob_str} - {p_dob_str}", combined_context, love_query, user_gender)
@@ -320,6 +378,22 @@ def map_gender_tuvi(gender_str):
     if not gender_str: return 1
     return 1 if str(gender_str).lower() in ['male', 'nam', '1'] else -1
 
+def calculate_tuvi_compatibility(user_context, partner_context):
+    """Hợp tuổi Tử Vi giữa hai người, "" nếu thiếu thư viện hoặc dữ liệu"""
+    if hopTuoi is None or getChartCache is None:
+        return ""
+    try:
+        la_so = []
+        for ctx in (user_context, partner_context):
+            dob = parse_date(ctx.get('birth_date'))
+            chi_gio = parse_time_to_chi(ctx.get('birth_time', '12:00'))
+            facts = DateFacts(dob.day, dob.month, dob.year, chi_gio, timeZone=7)
+            signature = canonicalSignature(dob.day, dob.month, dob.year, chi_gio,
+                                           map_gender_tuvi(ctx.get('gender')), dateFacts=facts)
+            la_so.append(getChartCache().anSao(signature))
+        return "\n        ".join(moTaHopTuoi(hopTuoi(*la_so)))
+    except: return ""
+
 def extract_tuvi_metadata(thien_ban, dia_ban):
     try:
         ten_cung_menh = dia_ban.thapNhiCung[dia_ban.cungMenh].cungTen
@@ -335,8 +409,28 @@ def extract_tuvi_metadata(thien_ban, dia_ban):
         }
     except: return {}
 
-def generate_tuvi_context_text(thien_ban, dia_ban):
+def encode_tuvi_chart(dia_ban, thien_ban):
+    """Lá số dạng JSON gọn (lasotuvi.serialize), None nếu không mã hóa được"""
+    if toDict is None:
+        return None
+    try:
+        return toDict(dia_ban, thien_ban)
+    except: return None
+
+def detect_tuvi_patterns(dia_ban):
+    """Các cách cục của cung Mệnh, [] nếu không nhận diện được"""
+    if timCachCuc is None:
+        return []
+    try:
+        return timCachCuc(LaSoBit.tuDiaBan(dia_ban))
+    except: return []
+
+def generate_tuvi_context_text(thien_ban, dia_ban, tu_tru=None, cach_cuc=None):
     lines = [f"Đương số: {thien_ban.ten}, Mệnh: {thien_ban.banMenh}, Cục: {thien_ban.tenCuc}"]
+    if tu_tru:
+        lines.append("Bát tự: Năm {}, tháng {}, ngày {}, giờ {}".format(*(tru.ten for tru in tu_tru)))
+    if cach_cuc:
+        lines.append("Cách cục: " + "; ".join(f"{cc.ten} ({cc.moTa})" for cc in cach_cuc))
     for i in range(1, 13):
         cung = dia_ban.thapNhiCung[i]
         sao_chinh = [s['saoTen'] for s in cung.cungSao if s.get('saoLoai') == 1]
@@ -361,11 +455,19 @@ def handle_horoscope(body):
         if lapDiaBan is None:
             raise ImportError("Thư viện lasotuvi không khả dụng.")
 
-        db = lapDiaBan(DiaBanClass, dd, mm, yy, chi_gio, gender_input, duongLich=True, timeZone=7)
-        tb = lapThienBan(dd, mm, yy, chi_gio, gender_input, name, db, duongLich=True, timeZone=7)
+        # Chuyển đổi âm lịch & can chi đúng một lần, dùng chung cho 2 bàn
+        # Địa Bàn dựng từ bộ nhớ đệm lá số theo chữ ký âm lịch (lasotuvi.chartcache)
+        facts = DateFacts(dd, mm, yy, chi_gio, timeZone=7)
+        db = lapDiaBan(DiaBanClass, dd, mm, yy, chi_gio, gender_input, duongLich=True, timeZone=7, dateFacts=facts)
+        tb = lapThienBan(dd, mm, yy, chi_gio, gender_input, name, db, duongLich=True, timeZone=7, dateFacts=facts)
         
         summary_data = extract_tuvi_metadata(tb, db)
-        rag_context = generate_tuvi_context_text(tb, db)
+        tu_tru = tuTru(dd, mm, yy, chi_gio, timeZone=7) if tuTru is not None else None
+        if tu_tru:
+            summary_data["bat_tu"] = ", ".join(tru.ten for tru in tu_tru)
+        cach_cuc = detect_tuvi_patterns(db)
+        summary_data["cach_cuc"] = [cc.ten for cc in cach_cuc]
+        rag_context = generate_tuvi_context_text(tb, db, tu_tru, cach_cuc)
         
         prompt = get_horoscope_prompt(rag_context, user_context)
         ai_response = call_bedrock_llm(prompt, temperature=0.7)
@@ -373,6 +475,7 @@ def handle_horoscope(body):
         return {
             "summary": summary_data,
             "analysis": ai_response,
+            "chart": encode_tuvi_chart(db, tb),
             "metadata": {
                 "name": name,
                 "dob_solar": f"{dd}/{mm}/{yy}",
@@ -383,6 +486,95 @@ def handle_horoscope(body):
         print(f"TUVI ERROR: {e}")
         return {"error": str(e)}
 
+# === CALENDAR (LỊCH VẠN NIÊN) ===
+CALENDAR_TIMEZONE = 7
+CALENDAR_CACHE_VERSION = "v1"
+_TEN_CHI_GIO = ["Tý", "Sửu", "Dần", "Mão", "Thìn", "Tỵ", "Ngọ", "Mùi", "Thân", "Dậu", "Tuất", "Hợi"]
+
+def calendar_month_key(year, month):
+    return f"calendar:{CALENDAR_CACHE_VERSION}:{year:04d}-{month:02d}"
+
+@lru_cache(maxsize=240)
+def build_calendar_month(year, month):
+    """Lưới lịch tháng dạng JSON, giữ lại theo khóa tháng cho các lần gọi sau"""
+    days = []
+    for ngay in thangLich(month, year, CALENDAR_TIMEZONE):
+        hoang_dao = set(ngay.gioHoangDao)
+        days.append({
+            "date": f"{ngay.nam:04d}-{ngay.thang:02d}-{ngay.ngay:02d}",
+            "in_month": ngay.trongThang,
+            "lunar": {"day": ngay.ngayAm, "month": ngay.thangAm, "year": ngay.namAm, "leap": bool(ngay.thangNhuan)},
+            "can_chi_ngay": ngay.canChiNgay.ten,
+            "gio_hoang_dao": [_TEN_CHI_GIO[chi - 1] for chi in ngay.gioHoangDao],
+            "gio_hac_dao": [ten for chi, ten in enumerate(_TEN_CHI_GIO, 1) if chi not in hoang_dao],
+            "tiet_khi": SOLAR_TERM_NAMES[ngay.tietKhi],
+            "vao_tiet": ngay.vaoTiet
+        })
+    return {"cache_key": calendar_month_key(year, month), "year": year, "month": month, "week_start": "monday", "days": days}
+
+GOOD_DAYS_DEFAULT_RANGE = 90
+GOOD_DAYS_MAX_RANGE = 366
+GOOD_DAYS_MAX_LIMIT = 31
+
+def find_good_days(birth_date, start, num_days, limit):
+    """Các ngày tốt nhất cho tuổi của người sinh ngày birth_date, chấm một lượt cả khoảng ngày"""
+    facts = DateFacts(birth_date.day, birth_date.month, birth_date.year, 1, timeZone=CALENDAR_TIMEZONE)
+    first = jdFromDate(start.day, start.month, start.year)
+    last = first + num_days - 1
+    days = []
+    for ngay in ngayTot(first, last, facts.canNam, facts.chiNam, limit, CALENDAR_TIMEZONE):
+        dd, mm, yy = jdToDate(ngay.jd)
+        days.append({
+            "date": f"{yy:04d}-{mm:02d}-{dd:02d}",
+            "lunar": {"day": ngay.ngayAm, "month": ngay.thangAm, "year": ngay.namAm, "leap": bool(ngay.thangNhuan)},
+            "can_chi_ngay": TRU[(ngay.jd + 49) % 60].ten,
+            "truc": THAP_NHI_THAN[ngay.than],
+            "hoang_dao": ngay.than in HOANG_DAO,
+            "score": ngay.diem,
+            "reasons": lyDo(ngay)
+        })
+    return {
+        "tuoi": TRU[(facts.namAm - 4) % 60].ten,
+        "from": "{2:04d}-{1:02d}-{0:02d}".format(*jdToDate(first)),
+        "to": "{2:04d}-{1:02d}-{0:02d}".format(*jdToDate(last)),
+        "days": days
+    }
+
+def handle_good_days(body, today):
+    if ngayTot is None or TRU is None:
+        return {"error": "Thư viện lasotuvi không khả dụng."}
+    user_context = body.get('user_context', {})
+    dob_date = parse_date(user_context.get('birth_date'))
+    if not dob_date: return {"error": "Ngày sinh lỗi"}
+    start = parse_date(body.get('start_date')) or today
+    try:
+        num_days = int(body.get('days', GOOD_DAYS_DEFAULT_RANGE))
+        limit = int(body.get('limit', 10))
+    except (TypeError, ValueError):
+        return {"error": "Số ngày không hợp lệ"}
+    if not (1 <= num_days <= GOOD_DAYS_MAX_RANGE and 1 <= limit <= GOOD_DAYS_MAX_LIMIT):
+        return {"error": "Số ngày không hợp lệ"}
+    try:
+        return find_good_days(dob_date, start, num_days, limit)
+    except Exception as e:
+        print(f"GOOD DAYS ERROR: {e}")
+        return {"error": str(e)}
+
+def handle_calendar(body):
+    if thangLich is None:
+        return {"error": "Thư viện lasotuvi không khả dụng."}
+    today = datetime.now(timezone(timedelta(hours=CALENDAR_TIMEZONE)))
+    if body.get('feature_type') == 'good_days':
+        return handle_good_days(body, today)
+    try:
+        year = int(body.get('year') or today.year)
+        month = int(body.get('month') or today.month)
+    except (TypeError, ValueError):
+        return {"error": "Tháng / năm không hợp lệ"}
+    if not (1 <= month <= 12 and 1800 <= year <= 2199):
+        return {"error": "Tháng / năm không hợp lệ"}
+    return build_calendar_month(year, month)
+
 # === MAIN HANDLER ===
 def lambda_handler(event, context):
     try:
@@ -401,15 +593,22 @@ def lambda_handler(event, context):
             ans = handle_numerology(body)
         elif domain == 'horoscope':
             ans = handle_horoscope(body)
+        elif domain == 'calendar':
+            ans = handle_calendar(body)
         else:
             return {'statusCode': 400, 'body': json.dumps({'error': f'Invalid domain: {domain}'})}
             
+        headers = {
+            'Content-Type': 'application/json', 
+            'Access-Control-Allow-Origin': '*'
+        }
+        if domain == 'calendar' and 'cache_key' in ans:
+            # Lưới của một tháng không đổi, CDN / client có thể giữ theo khóa tháng
+            headers['Cache-Control'] = 'public, max-age=86400'
+            headers['ETag'] = f'"{ans["cache_key"]}"'
         return {
             'statusCode': 200, 
-            'headers': {
-                'Content-Type': 'application/json', 
-                'Access-Control-Allow-Origin': '*'
-            },
+            'headers': headers,
             'body': json.dumps({
                 'domain': domain, 
                 'feature': body.get('feature_type'),
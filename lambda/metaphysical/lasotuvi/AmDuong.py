@@ -4,6 +4,10 @@
 """
 
 from lasotuvi.Lich_HND import S2L, L2S, jdFromDate
+from lasotuvi.tables import (CAN_GIO_TY, HANH_ID, LUU_HA, NAP_AM_BAN_MENH,
+                             NAP_AM_HANH, NGU_HANH, SINH_KHAC, THIEN_KHOI,
+                             THIEN_PHUC, THIEN_QUAN, THIEN_TRU, TRIET,
+                             chiSoCanChi)
 
 
 thienCan = [
@@ -266,16 +270,16 @@ def canChiNgay(nn, tt, nnnn, duongLich=True, timeZone=7, thangNhuan=False):
 
 
 def canChiGio(canNgay, gio):
-    """Phần này có lẽ chưa cần thiết và sẽ bổ sung sau.
+    """Can chi của giờ, khởi từ can giờ Tý của ngày (xem CAN_GIO_TY).
 
     Args:
         canNgay (int): Can của ngày cần xem, 1: Giáp, 2: Ất, 3: Bính,...
         gio (int): Chi của giờ, 1: Tý, 2: Sửu,...
 
     Returns:
-        TYPE: Description
+        list: [canGio, chiGio]
     """
-    return False
+    return [(CAN_GIO_TY[canNgay] + gio - 2) % 10 + 1, gio]
 
 
 def ngayThangNamCanChi(nn, tt, nnnn, duongLich=True, timeZone=7):
@@ -305,6 +309,46 @@ def ngayThangNamCanChi(nn, tt, nnnn, duongLich=True, timeZone=7):
     return [canThang, canNamSinh, chiNam]
 
 
+class DateFacts(object):
+    """Các dữ kiện ngày sinh dùng chung cho lapDiaBan và lapThienBan.
+
+    Được tính một lần duy nhất từ ngày dương lịch và múi giờ: mọi phép
+    chuyển đổi âm lịch và tính can chi của một lá số đều diễn ra ở đây.
+
+    Args:
+        nn (int): Ngày dương lịch
+        tt (int): Tháng dương lịch
+        nnnn (int): Năm dương lịch
+        gioSinh (int): Chi của giờ sinh, 1: Tý, 2: Sửu,...
+        timeZone (int, optional): Múi giờ
+
+    Raises:
+        Exception: Ngày, tháng, năm không hợp lệ
+    """
+
+    def __init__(self, nn, tt, nnnn, gioSinh, timeZone=7):
+        super(DateFacts, self).__init__()
+        self.ngayDuong, self.thangDuong, self.namDuong = nn, tt, nnnn
+        self.gioSinh = gioSinh
+        self.timeZone = timeZone
+        self.jd = jdFromDate(nn, tt, nnnn)
+
+        self.ngayAm, self.thangAm, self.namAm, self.thangNhuan = \
+            ngayThangNam(nn, tt, nnnn, True, timeZone)
+        self.canThang, self.canNam, self.chiNam = \
+            ngayThangNamCanChi(self.ngayAm, self.thangAm, self.namAm,
+                               False, timeZone)
+        self.chiThang = self.thangAm
+
+        self.canNgay = (self.jd + 9) % 10 + 1
+        self.chiNgay = (self.jd + 1) % 12 + 1
+        self.canGio, self.chiGio = canChiGio(self.canNgay, gioSinh)
+
+        # Ngũ hành nạp âm của năm sinh
+        self.menh = nguHanhNapAm(self.chiNam, self.canNam)
+        self.banMenh = nguHanhNapAm(self.chiNam, self.canNam, True)
+
+
 def nguHanh(tenHanh):
     """
     Args:
@@ -312,27 +356,14 @@ def nguHanh(tenHanh):
         Thuy hoặc T, Hoa hoặc H, Tho hoặc O
 
     Returns:
-        Dictionary: ID của Hành, tên đầy đủ của Hành, số Cục của Hành
+        Mapping (chỉ đọc): ID của Hành, tên đầy đủ của Hành, số Cục của Hành
 
     Raises:
         Exception: Description
     """
-    if tenHanh in ["Kim", "K"]:
-        return {"id": 1, "tenHanh": "Kim", "cuc": 4, "tenCuc": "Kim tứ Cục",
-                "css": "hanhKim"}
-    elif tenHanh == "Moc" or tenHanh == "M":
-        return {"id": 2, "tenHanh": "Mộc", "cuc": 3, "tenCuc": "Mộc tam Cục",
-                "css": "hanhMoc"}
-    elif tenHanh == "Thuy" or tenHanh == "T":
-        return {"id": 3, "tenHanh": "Thủy", "cuc": 2, "tenCuc": "Thủy nhị Cục",
-                "css": "hanhThuy"}
-    elif tenHanh == "Hoa" or tenHanh == "H":
-        return {"id": 4, "tenHanh": "Hỏa", "cuc": 6, "tenCuc": "Hỏa lục Cục",
-                "css": "hanhHoa"}
-    elif tenHanh == "Tho" or tenHanh == "O":
-        return {"id": 5, "tenHanh": "Thổ", "cuc": 5, "tenCuc": "Thổ ngũ Cục",
-                "css": "hanhTho"}
-    else:
+    try:
+        return NGU_HANH[HANH_ID[tenHanh]]
+    except (KeyError, TypeError):
         raise Exception(
             "Tên Hành phải thuộc Kim (K), Mộc (M), Thủy (T), \
              Hỏa (H) hoặc Thổ (O)")
@@ -347,15 +378,7 @@ def sinhKhac(hanh1, hanh2):
     Returns:
         TYPE: Description
     """
-    matranSinhKhac = [
-        [None, None, None, None, None, None],
-        [None, 0, -1, 1, -1j, 1j],
-        [None, -1j, 0, 1j, 1, -1],
-        [None, 1j, 1, 0, 1, -1j],
-        [None, -1, 1j, -1j, 0, 1],
-        [None, 1, -1j, -1, 1j, 0]
-    ]
-    return matranSinhKhac[hanh1][hanh2]
+    return SINH_KHAC[hanh1][hanh2]
 
 
 def nguHanhNapAm(diaChi, thienCan, xuatBanMenh=False):
@@ -368,61 +391,13 @@ def nguHanhNapAm(diaChi, thienCan, xuatBanMenh=False):
     Returns:
         Trả về chữ viết tắt Hành của năm (K, T, H, O, M)
     """
-    banMenh = {
-        "K1": "HẢI TRUNG KIM",
-        "T1": "GIÁNG HẠ THỦY",
-        "H1": "TÍCH LỊCH HỎA",
-        "O1": "BÍCH THƯỢNG THỔ",
-        "M1": "TANG ÐỐ MỘC",
-        "T2": "ÐẠI KHÊ THỦY",
-        "H2": "LƯ TRUNG HỎA",
-        "O2": "THÀNH ÐẦU THỔ",
-        "M2": "TÒNG BÁ MỘC",
-        "K2": "KIM BẠCH KIM",
-        "H3": "PHÚ ÐĂNG HỎA",
-        "O3": "SA TRUNG THỔ",
-        "M3": "ÐẠI LÂM MỘC",
-        "K3": "BẠCH LẠP KIM",
-        "T3": "TRƯỜNG LƯU THỦY",
-        "K4": "SA TRUNG KIM",
-        "T4": "THIÊN HÀ THỦY",
-        "H4": "THIÊN THƯỢNG HỎA",
-        "O4": "LỘ BÀN THỔ",
-        "M4": "DƯƠNG LIỄU MỘC",
-        "T5": "TRUYỀN TRUNG THỦY",
-        "H5": "SƠN HẠ HỎA",
-        "O5": "ÐẠI TRẠCH THỔ",
-        "M5": "THẠCH LỰU MỘC",
-        "K5": "KIẾM PHONG KIM",
-        "H6": "SƠN ÐẦU HỎA",
-        "O6": "ỐC THƯỢNG THỔ",
-        "M6": "BÌNH ÐỊA MỘC",
-        "K6": "XOA XUYẾN KIM",
-        "T6": "ÐẠI HẢI THỦY"}
-    matranNapAm = [
-        [0, "G", "Ất", "Bính", "Đinh", "Mậu", "Kỷ", "Canh", "Tân", "N", "Q"],
-        [1, "K1", False, "T1", False, "H1", False, "O1", False, "M1", False],
-        [2, False, "K1", False, "T1", False, "H1", False, "O1", False, "M1"],
-        [3, "T2", False, "H2", False, "O2", False, "M2", False, "K2", False],
-        [4, False, "T2", False, "H2", False, "O2", False, "M2", False, "K2"],
-        [5, "H3", False, "O3", False, "M3", False, "K3", False, "T3", False],
-        [6, False, "H3", False, "O3", False, "M3", False, "K3", False, "T3"],
-        [7, "K4", False, "T4", False, "H4", False, "O4", False, "M4", False],
-        [8, False, "K4", False, "T4", False, "H4", False, "O4", False, "M4"],
-        [9, "T5", False, "H5", False, "O5", False, "M5", False, "K5", False],
-        [10, False, "T5", False, "H5", False, "O5", False, "M5", False, "K5"],
-        [11, "H6", False, "O6", False, "M6", False, "K6", False, "T6", False],
-        [12, False, "H6", False, "O6", False, "M6", False, "K6", False, "T6"]
-    ]
-    try:
-        nh = matranNapAm[diaChi][thienCan]
-        if nh[0] in ["K", "M", "T", "H", "O"]:
-            if xuatBanMenh is True:
-                return banMenh[nh]
-            else:
-                return nh[0]
-    except:
+    nh = None
+    if 1 <= diaChi <= 12 and 1 <= thienCan <= 10:
+        bang = NAP_AM_BAN_MENH if xuatBanMenh is True else NAP_AM_HANH
+        nh = bang[chiSoCanChi(diaChi, thienCan)]
+    if nh is None:
         raise Exception(nguHanhNapAm.__doc__)
+    return nh
 
 
 def dichCung(cungBanDau, *args):
@@ -532,25 +507,15 @@ def timHoaLinh(chiNamSinh, gioSinh, gioiTinh, amDuongNamSinh):
 
 
 def timThienKhoi(canNam):
-    khoiViet = [None, 2, 1, 12, 10, 8, 1, 8, 7, 6, 4]
     try:
-        return khoiViet[canNam]
+        return THIEN_KHOI[canNam]
     except:
         raise Exception("Không tìm được vị trí Khôi-Việt")
 
 
 def timThienQuanThienPhuc(canNam):
-    # Giáp dương Nhâm khuyển Ất long nghi
-    # Mậu thổ Canh chư Quý mã thượng
-    # Kỳ nhân quý hiển khả tiên tri
-    thienQuan = [None, 8, 5, 6, 3, 4, 10, 12, 10, 11, 7]
-
-    # Giáp ái kim kê Ất ái hầu
-    # Đinh chư Bính thử Kỷ hổ đầu
-    # Tân quý phùng xà phúc lộc nhiêu
-    thienPhuc = [None, 10, 9, 1, 12, 4, 3, 7, 6, 7, 6]
     try:
-        return thienQuan[canNam], thienPhuc[canNam]
+        return THIEN_QUAN[canNam], THIEN_PHUC[canNam]
     except:
         raise Exception("Không tìm được Quan-Phúc")
 
@@ -593,33 +558,13 @@ def timPhaToai(chiNam):
 
 
 def timTriet(canNam):
-    # Giáp Kỷ, Thân Dậu cung
-    if canNam in [1, 6]:
-        return 9, 10
-
-    # Ất Canh, Ngọ Mùi cung
-    elif canNam in [2, 7]:
-        return 7, 8
-
-    # Bính Tân, Thìn Tị cung
-    elif canNam in [3, 8]:
-        return 5, 6
-
-    # Đinh Nhâm, Dần Mão cung
-    elif canNam in [4, 9]:
-        return 3, 4
-
-    # Mậu Quý, Tý Sửu cung
-    elif canNam in [5, 10]:
-        return 1, 2
-    else:
+    if not 1 <= canNam <= 10:
         raise Exception("Không tìm được Triệt")
+    return TRIET[canNam]
 
 
 def timLuuTru(canNam):
-    maTranLuuHa = [None, 10, 11, 8, 5, 6, 7, 9, 4, 12, 3]
-    maTranThienTru = [None, 6, 7, 1, 6, 7, 9, 3, 7, 10, 11]
     try:
-        return maTranLuuHa[canNam], maTranThienTru[canNam]
+        return LUU_HA[canNam], THIEN_TRU[canNam]
     except:
         raise Exception("Không tìm được Lưu - Trù")
@@ -5,21 +5,30 @@ from the book "Astronomical Algorithms" by Jean Meeus, 1998
 """
 
 import math
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
+
+# Number of (year, timeZone) anchors kept by getLunarMonth11 and
+# getLeapMonthOffset. Birth years cluster, a few hundred covers a warm
+# container comfortably.
+LUNAR_CACHE_SIZE = 512
 
 
 def jdFromDate(dd, mm, yy):
     '''def jdFromDate(dd, mm, yy): Compute the (integral) Julian day number of
     day dd/mm/yyyy, i.e., the number of days between 1/1/4713 BC
-    (Julian calendar) and dd/mm/yyyy.'''
-    a = int((14 - mm) / 12.)
+    (Julian calendar) and dd/mm/yyyy. Integer arithmetic only; floor
+    division equals the original int() truncation for every date after
+    4800 BC.'''
+    a = (14 - mm) // 12
     y = yy + 4800 - a
     m = mm + 12 * a - 3
-    jd = dd + int((153 * m + 2) / 5.) \
-        + 365 * y + int(y / 4.) - int(y / 100.) \
-        + int(y / 400.) - 32045
+    jd = dd + (153 * m + 2) // 5 + 365 * y + y // 4 - y // 100 \
+        + y // 400 - 32045
     if (jd < 2299161):
-        jd = dd + int((153 * m + 2) / 5.) \
-            + 365 * y + int(y / 4.) - 32083
+        jd = dd + (153 * m + 2) // 5 + 365 * y + y // 4 - 32083
     return jd
 
 
@@ -29,20 +38,32 @@ def jdToDate(jd):
     if (jd > 2299160):
         # After 5/10/1582, Gregorian calendar
         a = jd + 32044
-        b = int((4 * a + 3) / 146097.)
-        c = a - int((b * 146097) / 4.)
+        b = (4 * a + 3) // 146097
+        c = a - (b * 146097) // 4
     else:
         b = 0
         c = jd + 32082
-    d = int((4 * c + 3) / 1461.)
-    e = c - int((1461 * d) / 4.)
-    m = int((5 * e + 2) / 153.)
-    day = e - int((153 * m + 2) / 5.) + 1
-    month = m + 3 - 12 * int(m / 10.)
-    year = b * 100 + d - 4800 + int(m / 10.)
+    d = (4 * c + 3) // 1461
+    e = c - (1461 * d) // 4
+    m = (5 * e + 2) // 153
+    day = e - (153 * m + 2) // 5 + 1
+    month = m + 3 - 12 * (m // 10)
+    year = b * 100 + d - 4800 + m // 10
     return [day, month, year]
 
 
+def jdFromDate_list(dates):
+    '''def jdFromDate_list(dates): jdFromDate of every (dd, mm, yy) in
+    dates, as a list.'''
+    return [jdFromDate(dd, mm, yy) for dd, mm, yy in dates]
+
+
+def jdToDate_list(jds):
+    '''def jdToDate_list(jds): jdToDate of every Julian day number in jds,
+    as a list of [day, month, year].'''
+    return [jdToDate(jd) for jd in jds]
+
+
 def NewMoon(k):
     '''def NewMoon(k): Compute the time of the k-th new moon after
     the new moon of 1/1/1900 13:52 UCT (measured as the number of
@@ -127,7 +148,9 @@ After that, return 1, 2, 3 ...'''
         SunLongitude(dayNumber - 0.5 - timeZone / 24.) / math.pi * 6)
 
 
-def getSunLongitude(jdn, timeZone):
+def getSunLongitudeRad(jdn, timeZone):
+    '''def getSunLongitudeRad(jdn, timeZone): Sun longitude in radians,
+    in [0, 2*math.pi), at local midnight of the day jdn.'''
     T = (jdn - 2451545.5 - timeZone/24.) / 36525.
     T2 = T**2
     dr = math.pi / 180.
@@ -140,7 +163,22 @@ def getSunLongitude(jdn, timeZone):
     L = L - 0.00569 - 0.00478 * math.sin(omega * dr)
     L = L*dr
     L = L - math.pi*2*(math.floor(L/(math.pi*2)))
-    return int(L/math.pi*6)
+    return L
+
+
+def getSunLongitude(jdn, timeZone):
+    '''def getSunLongitude(jdn, timeZone): Index 0..11 of the major term
+    (30 degrees) the sun is in at local midnight of the day jdn, 0 from the
+    March equinox.'''
+    return int(getSunLongitudeRad(jdn, timeZone)/math.pi*6)
+
+
+def getSolarTerm(jdn, timeZone):
+    '''def getSolarTerm(jdn, timeZone): Index 0..23 of the solar term
+    (15 degrees) the sun is in at local midnight of the day jdn, 0 for
+    Xuân phân. getSolarTerm(jdn, timeZone) // 2 == getSunLongitude(jdn,
+    timeZone).'''
+    return int(getSunLongitudeRad(jdn, timeZone)/math.pi*12)
 
 
 def getNewMoonDay(k, timeZone):
@@ -150,13 +188,24 @@ def getNewMoonDay(k, timeZone):
     return int(NewMoon(k) + 0.5 + timeZone / 24.)
 
 
+def getMonthIndex(monthStart):
+    '''def getMonthIndex(monthStart): Index k of the new moon that starts on
+    the Julian day number monthStart, i.e. getNewMoonDay(k, timeZone) ==
+    monthStart. Rounds with floor so that dates before 1900 (negative k)
+    resolve to the same month as after it.'''
+    return int(math.floor(
+        0.5 + (monthStart - 2415021.076998695) / 29.530588853))
+
+
+@lru_cache(maxsize=LUNAR_CACHE_SIZE)
 def getLunarMonth11(yy, timeZone):
     '''def getLunarMonth11(yy, timeZone):  Find the day that starts the luner month
-    11of the given year for the given time zone.'''
+    11of the given year for the given time zone. Results are memoized per
+    (yy, timeZone), see lunarCacheStats.'''
     # off = jdFromDate(31, 12, yy) \
     #            - 2415021.076998695
     off = jdFromDate(31, 12, yy) - 2415021.
-    k = int(off / 29.530588853)
+    k = int(math.floor(off / 29.530588853))
     nm = getNewMoonDay(k, timeZone)
     sunLong = getSunLongitude(nm, timeZone)
     # sun longitude at local midnight
@@ -165,18 +214,20 @@ def getLunarMonth11(yy, timeZone):
     return nm
 
 # print getLunarMonth11(1992, 7)
+@lru_cache(maxsize=LUNAR_CACHE_SIZE)
 def getLeapMonthOffset(a11, timeZone):
     '''def getLeapMonthOffset(a11, timeZone): Find the index of the leap month
-    after the month starting on the day a11.'''
-    k = int((a11 - 2415021.076998695) / 29.530588853 + 0.5)
+    after the month starting on the day a11. a11 identifies the lunar year,
+    so results are memoized per (year, timeZone) like getLunarMonth11.'''
+    k = getMonthIndex(a11)
     last = 0
     i = 1  # start with month following lunar month 11
-    arc = getSunLongitude(
+    arc = majorTermOf(
         getNewMoonDay(k + i, timeZone), timeZone)
     while True:
         last = arc
         i += 1
-        arc = getSunLongitude(
+        arc = majorTermOf(
             getNewMoonDay(k + i, timeZone),
             timeZone)
         if not (arc != last and i < 14):
@@ -184,14 +235,37 @@ def getLeapMonthOffset(a11, timeZone):
     return i - 1
 
 
-def S2L(dd, mm, yy, timeZone=7):
-    '''def S2L(dd, mm, yy, timeZone = 7): Convert solar date dd/mm/yyyy to
-    the corresponding lunar date.'''
+def lunarCacheStats():
+    '''def lunarCacheStats(): Hit / miss counters of the getLunarMonth11 and
+    getLeapMonthOffset caches, e.g. for logging from a warm container.'''
+    stats = {}
+    for fn in (getLunarMonth11, getLeapMonthOffset):
+        info = fn.cache_info()
+        stats[fn.__name__] = {'hits': info.hits, 'misses': info.misses,
+                              'size': info.currsize,
+                              'maxsize': info.maxsize}
+    return stats
+
+
+def clearLunarCache():
+    '''def clearLunarCache(): Empty both caches and reset their counters.'''
+    getLunarMonth11.cache_clear()
+    getLeapMonthOffset.cache_clear()
+
+
+def astronomicalS2L(dd, mm, yy, timeZone=7):
+    '''def astronomicalS2L(dd, mm, yy, timeZone = 7): Convert solar date
+    dd/mm/yyyy to the corresponding lunar date by evaluating the new moons
+    and month-11 anchors directly.'''
     dayNumber = jdFromDate(dd, mm, yy)
-    k = int((dayNumber - 2415021.076998695) / 29.530588853)
+    k = int(math.floor(
+        (dayNumber - 2415021.076998695) / 29.530588853))
     monthStart = getNewMoonDay(k + 1, timeZone)
     if (monthStart > dayNumber):
         monthStart = getNewMoonDay(k, timeZone)
+        # k is only an estimate, the k-th new moon may still be too late
+        if (monthStart > dayNumber):
+            monthStart = getNewMoonDay(k - 1, timeZone)
     # alert(dayNumber + " -> " + monthStart)
     a11 = getLunarMonth11(yy, timeZone)
     b11 = a11
@@ -223,17 +297,17 @@ def S2L(dd, mm, yy, timeZone=7):
         [lunarDay, lunarMonth, lunarYear, lunarLeap]
 
 
-def L2S(lunarD, lunarM, lunarY, lunarLeap, tZ=7):
-    '''def L2S(lunarD, lunarM, lunarY, lunarLeap, tZ = 7): Convert a lunar date
-    to the corresponding solar date.'''
+def astronomicalL2S(lunarD, lunarM, lunarY, lunarLeap, tZ=7):
+    '''def astronomicalL2S(lunarD, lunarM, lunarY, lunarLeap, tZ = 7): Convert
+    a lunar date to the corresponding solar date by evaluating the new moons
+    and month-11 anchors directly.'''
     if (lunarM < 11):
         a11 = getLunarMonth11(lunarY - 1, tZ)
         b11 = getLunarMonth11(lunarY, tZ)
     else:
         a11 = getLunarMonth11(lunarY, tZ)
         b11 = getLunarMonth11(lunarY + 1, tZ)
-    k = int(0.5 +
-            (a11 - 2415021.076998695) / 29.530588853)
+    k = getMonthIndex(a11)
     off = lunarM - 11
     if (off < 0):
         off += 12
@@ -248,3 +322,368 @@ def L2S(lunarD, lunarM, lunarY, lunarLeap, tZ=7):
             off += 1
     monthStart = getNewMoonDay(k + off, tZ)
     return jdToDate(monthStart + lunarD - 1)
+
+
+TABLE_FIRST_YEAR = 1800
+TABLE_LAST_YEAR = 2200
+
+
+class LunarTable(object):
+    '''class LunarTable(firstYear, lastYear, timeZone): Precomputed lunar
+    calendar for the lunar years firstYear..lastYear.
+
+    Lunar year yy spans [a11(yy - 1), a11(yy)), the two surrounding starts
+    of lunar month 11. The table holds:
+        month11: Julian day numbers of a11 for firstYear - 1 .. lastYear
+        leapOffsets: getLeapMonthOffset of every lunar year, 0 if none
+        monthStarts: Julian day numbers of every month start in the range
+        lunarMonths, lunarLeaps, lunarYears: lunar labels of monthStarts
+
+    Solar to lunar is then a bisect over monthStarts and lunar to solar is
+    index arithmetic.'''
+
+    def __init__(self, firstYear, lastYear, timeZone):
+        super(LunarTable, self).__init__()
+        self.firstYear = firstYear
+        self.lastYear = lastYear
+        self.timeZone = timeZone
+
+        # The table covers these years itself, keep them out of the cache
+        month11 = getLunarMonth11.__wrapped__
+        self.month11 = array('l', [month11(yy, timeZone)
+                                   for yy in range(firstYear - 1,
+                                                   lastYear + 1)])
+        self.kFirst = getMonthIndex(self.month11[0])
+        kLast = getMonthIndex(self.month11[-1])
+        self.monthStarts = array('l', [getNewMoonDay(k, timeZone)
+                                       for k in range(self.kFirst,
+                                                      kLast + 1)])
+
+        self.leapOffsets = array('b')
+        self.lunarMonths = array('b')
+        self.lunarLeaps = array('b')
+        self.lunarYears = array('h')
+        for yy in range(firstYear, lastYear + 1):
+            a11 = self.month11[yy - firstYear]
+            b11 = self.month11[yy - firstYear + 1]
+            k = getMonthIndex(a11)
+            leapOffset = 0
+            if (b11 - a11 > 365):
+                leapOffset = self._leapMonthOffset(k)
+            self.leapOffsets.append(leapOffset)
+            for diff in range(getMonthIndex(b11) - k):
+                lunarMonth = diff + 11
+                lunarLeap = 0
+                if leapOffset and diff >= leapOffset:
+                    lunarMonth = diff + 10
+                    if diff == leapOffset:
+                        lunarLeap = 1
+                if (lunarMonth > 12):
+                    lunarMonth = lunarMonth - 12
+                lunarYear = yy
+                if (lunarMonth >= 11 and diff < 4):
+                    lunarYear -= 1
+                self.lunarMonths.append(lunarMonth)
+                self.lunarLeaps.append(lunarLeap)
+                self.lunarYears.append(lunarYear)
+
+    def _leapMonthOffset(self, k):
+        # Same as getLeapMonthOffset, new moons are read from the table
+        i = 1
+        arc = majorTermOf(self.monthStarts[k + i - self.kFirst],
+                          self.timeZone)
+        while True:
+            last = arc
+            i += 1
+            arc = majorTermOf(self.monthStarts[k + i - self.kFirst],
+                              self.timeZone)
+            if not (arc != last and i < 14):
+                break
+        return i - 1
+
+    def containsDay(self, dayNumber):
+        return self.month11[0] <= dayNumber < self.month11[-1]
+
+    def containsYear(self, lunarY, lunarM):
+        yy = lunarY if lunarM < 11 else lunarY + 1
+        return self.firstYear <= yy <= self.lastYear
+
+    def S2L(self, dayNumber):
+        i = bisect_right(self.monthStarts, dayNumber) - 1
+        return [dayNumber - self.monthStarts[i] + 1, self.lunarMonths[i],
+                self.lunarYears[i], self.lunarLeaps[i]]
+
+    def L2S(self, lunarD, lunarM, lunarY, lunarLeap):
+        yy = lunarY if lunarM < 11 else lunarY + 1
+        a11 = self.month11[yy - self.firstYear]
+        off = lunarM - 11
+        if (off < 0):
+            off += 12
+        leapOff = self.leapOffsets[yy - self.firstYear]
+        if leapOff:
+            leapM = leapOff - 2
+            if (leapM < 0):
+                leapM += 12
+            if (lunarLeap != 0 and lunarM != leapM):
+                return [0, 0, 0]
+            elif (lunarLeap != 0 or off >= leapOff):
+                off += 1
+        monthStart = self.monthStarts[getMonthIndex(a11) + off
+                                      - self.kFirst]
+        return jdToDate(monthStart + lunarD - 1)
+
+
+_lunarTables = {}
+
+
+def getLunarTable(timeZone=7):
+    '''def getLunarTable(timeZone = 7): Return the LunarTable of the given
+    time zone, building it on first use. Tables are kept for the lifetime
+    of the process (one build per container).'''
+    table = _lunarTables.get(timeZone)
+    if table is None:
+        table = LunarTable(TABLE_FIRST_YEAR, TABLE_LAST_YEAR, timeZone)
+        _lunarTables[timeZone] = table
+    return table
+
+
+SOLAR_TERM_NAMES = (
+    "Xuân phân", "Thanh minh", "Cốc vũ", "Lập hạ", "Tiểu mãn", "Mang chủng",
+    "Hạ chí", "Tiểu thử", "Đại thử", "Lập thu", "Xử thử", "Bạch lộ",
+    "Thu phân", "Hàn lộ", "Sương giáng", "Lập đông", "Tiểu tuyết",
+    "Đại tuyết", "Đông chí", "Tiểu hàn", "Đại hàn", "Lập xuân", "Vũ thủy",
+    "Kinh trập")
+
+SolarTerm = namedtuple('SolarTerm', ['term', 'jd'])
+
+
+class SolarTermTable(object):
+    '''class SolarTermTable(firstYear, lastYear, timeZone): Entry days of
+    every solar term from 1/1/firstYear to the end of lastYear.
+
+        entries: Julian day numbers of the days on which each term starts,
+            i.e. the sun crosses the term's longitude before the next local
+            midnight
+        firstTerm: index of the term starting on entries[0]
+
+    The first year is found by stepping 15 days from term to term. Every
+    later entry lies 365 or 366 days after the same term one year before,
+    so it costs a single longitude evaluation.'''
+
+    def __init__(self, firstYear, lastYear, timeZone):
+        super(SolarTermTable, self).__init__()
+        self.firstYear = firstYear
+        self.lastYear = lastYear
+        self.timeZone = timeZone
+
+        # Days whose local midnight is the first one past each term
+        jd = jdFromDate(1, 1, firstYear)
+        term = getSolarTerm(jd, timeZone)
+        while getSolarTerm(jd - 1, timeZone) == term:
+            jd -= 1
+        self.firstTerm = term
+        midnights = [jd]
+        for _ in range(23):
+            jd += 15
+            if getSolarTerm(jd, timeZone) == term:
+                while getSolarTerm(jd, timeZone) == term:
+                    jd += 1
+            else:
+                while getSolarTerm(jd - 1, timeZone) != term:
+                    jd -= 1
+            term = (term + 1) % 24
+            midnights.append(jd)
+        stop = jdFromDate(1, 1, lastYear + 1)
+        while jd < stop:
+            term = (term + 1) % 24
+            jd = midnights[-24] + 365
+            if getSolarTerm(jd, timeZone) != term:
+                jd += 1
+            midnights.append(jd)
+        # A list bisects faster than an array, at ~350 kB for 1799-2201
+        self.entries = [jd - 1 for jd in midnights]
+
+    def containsDay(self, dayNumber):
+        return self.entries[0] <= dayNumber < self.entries[-1]
+
+    def termIndex(self, dayNumber):
+        return (self.firstTerm + bisect_right(self.entries, dayNumber) - 1) \
+            % 24
+
+    def solarTermOf(self, dayNumber):
+        i = bisect_right(self.entries, dayNumber) - 1
+        return SolarTerm((self.firstTerm + i) % 24, self.entries[i])
+
+    def nextSolarTerm(self, dayNumber):
+        i = bisect_right(self.entries, dayNumber)
+        return SolarTerm((self.firstTerm + i) % 24, self.entries[i])
+
+
+_solarTermTables = {}
+
+
+def getSolarTermTable(timeZone=7):
+    '''def getSolarTermTable(timeZone = 7): Return the SolarTermTable of the
+    given time zone over the LunarTable years, building it on first use.'''
+    table = _solarTermTables.get(timeZone)
+    if table is None:
+        table = SolarTermTable(TABLE_FIRST_YEAR - 1, TABLE_LAST_YEAR + 1,
+                               timeZone)
+        _solarTermTables[timeZone] = table
+    return table
+
+
+def solarTermOf(jd, timeZone=7):
+    '''def solarTermOf(jd, timeZone = 7): SolarTerm(term, jd) of the solar
+    term the day jd belongs to: its index 0..23 (see SOLAR_TERM_NAMES) and
+    the day it started. A day on which the sun enters a term belongs to the
+    new term, as printed in calendars.'''
+    table = getSolarTermTable(timeZone)
+    if table.containsDay(jd):
+        return table.solarTermOf(jd)
+    term = getSolarTerm(jd + 1, timeZone)
+    while getSolarTerm(jd, timeZone) == term:
+        jd -= 1
+    return SolarTerm(term, jd)
+
+
+def nextSolarTerm(jd, timeZone=7):
+    '''def nextSolarTerm(jd, timeZone = 7): SolarTerm(term, jd) of the first
+    solar term starting after the day jd.'''
+    table = getSolarTermTable(timeZone)
+    if table.containsDay(jd):
+        return table.nextSolarTerm(jd)
+    term = getSolarTerm(jd + 1, timeZone)
+    jd += 1
+    while getSolarTerm(jd + 1, timeZone) == term:
+        jd += 1
+    return SolarTerm((term + 1) % 24, jd)
+
+
+def majorTermOf(jd, timeZone=7):
+    '''def majorTermOf(jd, timeZone = 7): Same as getSunLongitude(jd,
+    timeZone), read from the SolarTermTable when it covers jd. The sun
+    position at the midnight starting day jd is the term of day jd - 1.'''
+    table = getSolarTermTable(timeZone)
+    if table.entries[0] < jd <= table.entries[-1]:
+        return table.termIndex(jd - 1) // 2
+    return getSunLongitude(jd, timeZone)
+
+
+def S2L(dd, mm, yy, timeZone=7):
+    '''def S2L(dd, mm, yy, timeZone = 7): Convert solar date dd/mm/yyyy to
+    the corresponding lunar date. Dates covered by the LunarTable are looked
+    up, the others fall back to astronomicalS2L.'''
+    dayNumber = jdFromDate(dd, mm, yy)
+    table = getLunarTable(timeZone)
+    if table.containsDay(dayNumber):
+        return table.S2L(dayNumber)
+    return astronomicalS2L(dd, mm, yy, timeZone)
+
+
+def L2S(lunarD, lunarM, lunarY, lunarLeap, tZ=7):
+    '''def L2S(lunarD, lunarM, lunarY, lunarLeap, tZ = 7): Convert a lunar date
+    to the corresponding solar date. Years covered by the LunarTable are
+    looked up, the others fall back to astronomicalL2S.'''
+    table = getLunarTable(tZ)
+    if table.containsYear(lunarY, lunarM):
+        return table.L2S(lunarD, lunarM, lunarY, lunarLeap)
+    return astronomicalL2S(lunarD, lunarM, lunarY, lunarLeap, tZ)
+
+
+LunarDay = namedtuple('LunarDay', ['jd', 'day', 'month', 'year',
+                                   'lunarDay', 'lunarMonth', 'lunarYear',
+                                   'lunarLeap', 'canNgay', 'chiNgay'])
+
+
+class LunarYear(object):
+    '''class LunarYear(lunarY, timeZone = 7): The lunar year lunarY, from its
+    Tết to the next one.
+
+        monthStarts: Julian day numbers of the 12 or 13 month starts
+        lunarMonths, lunarLeaps: lunar labels of monthStarts
+        leapMonth: the month that is repeated, 0 if none
+        end: Julian day number of the next Tết
+
+    days() then walks the year one solar day at a time, without any new
+    moon computation.'''
+
+    def __init__(self, lunarY, timeZone=7):
+        super(LunarYear, self).__init__()
+        self.lunarYear = lunarY
+        self.timeZone = timeZone
+        first = jdFromDate(*L2S(1, 1, lunarY, 0, timeZone))
+        self.end = jdFromDate(*L2S(1, 1, lunarY + 1, 0, timeZone))
+        kFirst, kEnd = getMonthIndex(first), getMonthIndex(self.end)
+        table = getLunarTable(timeZone)
+        if table.containsDay(first) and table.containsDay(self.end):
+            # Months already labelled by the table
+            i, j = kFirst - table.kFirst, kEnd - table.kFirst
+            self.monthStarts = table.monthStarts[i:j].tolist()
+            self.lunarMonths = table.lunarMonths[i:j].tolist()
+            self.lunarLeaps = table.lunarLeaps[i:j].tolist()
+        else:
+            self.monthStarts = [first] + [getNewMoonDay(k, timeZone)
+                                          for k in range(kFirst + 1, kEnd)]
+            self.lunarMonths = []
+            self.lunarLeaps = []
+            for monthStart in self.monthStarts:
+                _, lunarMonth, _, lunarLeap = S2L(*jdToDate(monthStart),
+                                                  timeZone=timeZone)
+                self.lunarMonths.append(lunarMonth)
+                self.lunarLeaps.append(lunarLeap)
+        self.leapMonth = 0
+        if 1 in self.lunarLeaps:
+            self.leapMonth = self.lunarMonths[self.lunarLeaps.index(1)]
+
+    def containsDay(self, dayNumber):
+        return self.monthStarts[0] <= dayNumber < self.end
+
+    def days(self, first=None, stop=None):
+        '''def days(first = None, stop = None): Yield a LunarDay for every
+        Julian day number in [first, stop), clipped to the year. Each step
+        only advances counters.'''
+        jd = self.monthStarts[0] if first is None \
+            else max(first, self.monthStarts[0])
+        stop = self.end if stop is None else min(stop, self.end)
+        if jd >= stop:
+            return
+        i = bisect_right(self.monthStarts, jd) - 1
+        lunarDay = jd - self.monthStarts[i] + 1
+        nextStart = self.monthStarts[i + 1] \
+            if i + 1 < len(self.monthStarts) else self.end
+        canNgay = (jd + 9) % 10 + 1
+        chiNgay = (jd + 1) % 12 + 1
+        dd, mm, yy = jdToDate(jd)
+        while jd < stop:
+            if jd == nextStart:
+                i += 1
+                lunarDay = 1
+                nextStart = self.monthStarts[i + 1] \
+                    if i + 1 < len(self.monthStarts) else self.end
+            yield LunarDay(jd, dd, mm, yy, lunarDay, self.lunarMonths[i],
+                           self.lunarYear, self.lunarLeaps[i],
+                           canNgay, chiNgay)
+            jd += 1
+            dd += 1
+            if dd > 28:
+                # Only month ends need the full conversion
+                dd, mm, yy = jdToDate(jd)
+            lunarDay += 1
+            canNgay = canNgay % 10 + 1
+            chiNgay = chiNgay % 12 + 1
+
+
+def lunarDays(dd, mm, yy, count, timeZone=7):
+    '''def lunarDays(dd, mm, yy, count, timeZone = 7): Yield a LunarDay for
+    count consecutive solar days starting at dd/mm/yyyy, crossing lunar
+    years as needed.'''
+    jd = jdFromDate(dd, mm, yy)
+    stop = jd + count
+    lunarY = S2L(dd, mm, yy, timeZone)[2]
+    while jd < stop:
+        year = LunarYear(lunarY, timeZone)
+        for day in year.days(jd, stop):
+            yield day
+        jd = year.end
+        lunarY += 1
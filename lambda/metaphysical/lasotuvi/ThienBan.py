@@ -2,23 +2,26 @@
 """
 (c) 2016 doanguyen <dungnv2410@gmail.com>.
 """
-from lasotuvi.AmDuong import (canChiNgay, diaChi, ngayThangNam, ngayThangNamCanChi,
-                     nguHanh, nguHanhNapAm, thienCan, timCuc, sinhKhac)
+from lasotuvi.AmDuong import (canChiGio, canChiNgay, diaChi, ngayThangNam,
+                              ngayThangNamCanChi, nguHanh, nguHanhNapAm,
+                              thienCan, timCuc, sinhKhac)
 import time
 from lasotuvi.Lich_HND import jdFromDate
 
 
 class lapThienBan(object):
     def __init__(self, nn, tt, nnnn, gioSinh, gioiTinh, ten, diaBan,
-                 duongLich=True, timeZone=7):
+                 duongLich=True, timeZone=7, dateFacts=None):
         super(lapThienBan, self).__init__()
         self.gioiTinh = 1 if gioiTinh == 1 else -1
         self.namNu = "Nam" if gioiTinh == 1 else "Nữ"
 
         chiGioSinh = diaChi[gioSinh]
-        canGioSinh = ((jdFromDate(nn, tt, nnnn) - 1) * 2 % 10 + gioSinh) % 10
-        if canGioSinh == 0:
-            canGioSinh = 10
+        if dateFacts is not None:
+            canGioSinh = dateFacts.canGio
+        else:
+            canGioSinh = canChiGio(
+                (jdFromDate(nn, tt, nnnn) + 9) % 10 + 1, gioSinh)[0]
         self.chiGioSinh = chiGioSinh
         self.canGioSinh = canGioSinh
         self.gioSinh = "{} {}".format(thienCan[canGioSinh]['tenCan'],
@@ -28,26 +31,36 @@ class lapThienBan(object):
         self.today = time.strftime("%d/%m/%Y")
         self.ngayDuong, self.thangDuong, self.namDuong, self.ten = \
             nn, tt, nnnn, ten
-        if duongLich is True:
+        if dateFacts is not None:
             self.ngayAm, self.thangAm, self.namAm, self.thangNhuan = \
-                ngayThangNam(self.ngayDuong, self.thangDuong, self.namDuong,
-                             True, self.timeZone)
+                dateFacts.ngayAm, dateFacts.thangAm, dateFacts.namAm, \
+                dateFacts.thangNhuan
+            self.canThang, self.canNam, self.chiNam = \
+                dateFacts.canThang, dateFacts.canNam, dateFacts.chiNam
         else:
-            self.ngayAm, self.thangAm, self.namAm = self.ngayDuong,\
-                self.thangDuong, self.namDuong
+            if duongLich is True:
+                self.ngayAm, self.thangAm, self.namAm, self.thangNhuan = \
+                    ngayThangNam(self.ngayDuong, self.thangDuong,
+                                 self.namDuong, True, self.timeZone)
+            else:
+                self.ngayAm, self.thangAm, self.namAm = self.ngayDuong,\
+                    self.thangDuong, self.namDuong
 
-        self.canThang, self.canNam, self.chiNam = \
-            ngayThangNamCanChi(self.ngayAm, self.thangAm,
-                               self.namAm, False, self.timeZone)
+            self.canThang, self.canNam, self.chiNam = \
+                ngayThangNamCanChi(self.ngayAm, self.thangAm,
+                                   self.namAm, False, self.timeZone)
         self.chiThang = self.thangAm
         self.canThangTen = thienCan[self.canThang]['tenCan']
         self.canNamTen = thienCan[self.canNam]['tenCan']
         self.chiThangTen = diaChi[self.thangAm]['tenChi']
         self.chiNamTen = diaChi[self.chiNam]['tenChi']
 
-        self.canNgay, self.chiNgay = canChiNgay(
-            self.ngayDuong, self.thangDuong, self.namDuong,
-            duongLich, timeZone)
+        if dateFacts is not None:
+            self.canNgay, self.chiNgay = dateFacts.canNgay, dateFacts.chiNgay
+        else:
+            self.canNgay, self.chiNgay = canChiNgay(
+                self.ngayDuong, self.thangDuong, self.namDuong,
+                duongLich, timeZone)
         self.canNgayTen = thienCan[self.canNgay]['tenCan']
         self.chiNgayTen = diaChi[self.chiNgay]['tenChi']
 
@@ -65,7 +78,10 @@ class lapThienBan(object):
         self.menhChu = diaChi[self.canNam]['menhChu']
         self.thanChu = diaChi[self.canNam]['thanChu']
 
-        self.menh = nguHanhNapAm(self.chiNam, self.canNam)
+        if dateFacts is not None:
+            self.menh = dateFacts.menh
+        else:
+            self.menh = nguHanhNapAm(self.chiNam, self.canNam)
         menhId = nguHanh(self.menh)['id']
         menhCuc = sinhKhac(menhId, self.hanhCuc)
         if menhCuc == 1:
@@ -79,4 +95,7 @@ class lapThienBan(object):
         else:
             self.sinhKhac = "Cục hòa Bản Mệnh"
 
-        self.banMenh = nguHanhNapAm(self.chiNam, self.canNam, True)
+        if dateFacts is not None:
+            self.banMenh = dateFacts.banMenh
+        else:
+            self.banMenh = nguHanhNapAm(self.chiNam, self.canNam, True)
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Bộ nhớ đệm lá số dùng chung giữa các dịch vụ.
+
+Lá số chỉ phụ thuộc vào chữ ký chuẩn sau khi đổi sang âm lịch:
+
+    (ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh)
+
+nên nhiều người dùng có chung một lá số. Lá số được lưu ở dạng gọn là mảng
+ô của engine.anSao (SO_O byte có dấu) trong một LRU trong tiến trình; khi
+có kho phía sau (DynamoDBStore), lần trượt LRU sẽ đọc kho trước khi tính
+lại và lá số mới tính được ghi vào kho, để dịch vụ khác dùng lại.
+
+    sig = canonicalSignature(nn, tt, nnnn, gioSinh, gioiTinh)
+    db = getChartCache().lapDiaBan(diaBan, sig)
+
+hoặc thay thẳng cho App.lapDiaBan / App.lapLaSo:
+
+    db = lapDiaBan(diaBan, nn, tt, nnnn, gioSinh, gioiTinh, True, 7)
+    laSo = lapLaSo(nn, tt, nnnn, gioSinh, gioiTinh, True, 7)
+
+Lambda bật kho DynamoDB khi biến môi trường TUVI_CHART_TABLE trỏ tới một
+bảng có khóa (category, entity_name) như bảng của dịch vụ metaphysical.
+"""
+import threading
+from array import array
+from collections import OrderedDict
+
+from lasotuvi import engine
+from lasotuvi.AmDuong import ngayThangNam, ngayThangNamCanChi
+from lasotuvi.atlas import recordIndex
+
+# Tăng khi cách mã hóa lá số hoặc bộ quy tắc an sao thay đổi, để không đọc
+# lại các bản ghi cũ trong kho
+VERSION = 1
+CATEGORY = 'tuvi_chart'
+CACHE_SIZE = 4096
+
+
+def canonicalSignature(nn, tt, nnnn, gioSinh, gioiTinh, duongLich=True,
+                       timeZone=7, dateFacts=None):
+    """Chữ ký chuẩn của lá số
+
+    Args:
+        nn, tt, nnnn (int): Ngày sinh, dương lịch nếu duongLich
+        gioSinh (int): Chi giờ sinh, 1: Tý,...
+        gioiTinh (int): 1 nam, -1 nữ
+        dateFacts (DateFacts, optional): Dữ kiện ngày sinh đã tính, bỏ qua
+            bước đổi ngày
+
+    Returns:
+        tuple: (ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh)
+    """
+    if gioiTinh not in (1, -1) or not 1 <= gioSinh <= 12:
+        raise Exception("Giờ sinh hoặc giới tính không hợp lệ")
+    if dateFacts is not None:
+        return (dateFacts.ngayAm, dateFacts.thangAm, dateFacts.canNam,
+                dateFacts.chiNam, gioSinh, gioiTinh)
+    if duongLich is True:
+        nn, tt, nnnn, thangNhuan = \
+            ngayThangNam(nn, tt, nnnn, duongLich, timeZone)
+    canThang, canNam, chiNam = \
+        ngayThangNamCanChi(nn, tt, nnnn, False, timeZone)
+    return nn, tt, canNam, chiNam, gioSinh, gioiTinh
+
+
+def chartKey(signature):
+    """Khóa của lá số trong kho"""
+    return "v%d:%d" % (VERSION, recordIndex(*signature))
+
+
+def encodeChart(o):
+    """Mảng ô của engine.anSao thành SO_O byte"""
+    return array('b', o).tobytes()
+
+
+def decodeChart(data):
+    """Ngược lại của encodeChart"""
+    if len(data) != engine.SO_O:
+        raise Exception("Lá số mã hóa phải dài %d byte" % engine.SO_O)
+    return array('b', data).tolist()
+
+
+class DynamoDBStore(object):
+    """Kho lá số trên một bảng DynamoDB (boto3 Table) khóa (category,
+    entity_name)"""
+
+    def __init__(self, table, category=CATEGORY):
+        super(DynamoDBStore, self).__init__()
+        self.table = table
+        self.category = category
+
+    def get(self, key):
+        item = self.table.get_item(
+            Key={'category': self.category, 'entity_name': key}).get('Item')
+        if not item or 'chart' not in item:
+            return None
+        # boto3 trả thuộc tính nhị phân dưới dạng Binary
+        chart = item['chart']
+        return bytes(getattr(chart, 'value', chart))
+
+    def put(self, key, data):
+        self.table.put_item(Item={'category': self.category,
+                                  'entity_name': key, 'chart': data})
+
+
+class ChartCache(object):
+    """LRU lá số theo chữ ký chuẩn, có thể đặt thêm một kho phía sau
+
+    Args:
+        store (object, optional): Kho có get(key) và put(key, data), ví dụ
+            DynamoDBStore. Lỗi của kho được bỏ qua, lá số khi đó được tính
+            lại.
+        maxsize (int, optional): Số lá số giữ trong tiến trình
+    """
+
+    def __init__(self, store=None, maxsize=CACHE_SIZE):
+        super(ChartCache, self).__init__()
+        self.store = store
+        self.maxsize = maxsize
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.storeHits = self.misses = 0
+
+    def _tuKho(self, key):
+        if self.store is None:
+            return None
+        try:
+            data = self.store.get(key)
+            return None if data is None else decodeChart(data)
+        except Exception:
+            return None
+
+    def _ghiKho(self, key, data):
+        if self.store is not None:
+            try:
+                self.store.put(key, data)
+            except Exception:
+                pass
+
+    def anSao(self, signature):
+        """Mảng ô (engine.anSao) của lá số, lấy từ LRU, kho hoặc tính mới"""
+        key = chartKey(signature)
+        with self._lock:
+            data = self._lru.get(key)
+            if data is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return decodeChart(data)
+        o = self._tuKho(key)
+        if o is not None:
+            self.storeHits += 1
+            data = encodeChart(o)
+        else:
+            self.misses += 1
+            o = engine.anSao(*signature)
+            data = encodeChart(o)
+            self._ghiKho(key, data)
+        with self._lock:
+            self._lru[key] = data
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+        return o
+
+    def lapDiaBan(self, diaBan, signature):
+        """Địa Bàn của lá số, mỗi lần gọi là một Địa Bàn mới"""
+        return engine.dungDiaBan(diaBan, self.anSao(signature))
+
+    def lapLaSo(self, signature):
+        """engine.LaSo đã tính đủ của lá số"""
+        return engine.LaSo.tuO(self.anSao(signature))
+
+    def stats(self):
+        """Số lần trúng LRU, trúng kho, phải tính mới và số lá số đang giữ"""
+        return {'hits': self.hits, 'storeHits': self.storeHits,
+                'misses': self.misses, 'size': len(self._lru)}
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self.hits = self.storeHits = self.misses = 0
+
+
+_chartCache = ChartCache()
+
+
+def getChartCache():
+    """Bộ nhớ đệm dùng chung của tiến trình"""
+    return _chartCache
+
+
+def lapDiaBan(diaBan, nn, tt, nnnn, gioSinh, gioiTinh, duongLich, timeZone,
+              dateFacts=None):
+    """Như App.lapDiaBan nhưng qua bộ nhớ đệm dùng chung"""
+    return _chartCache.lapDiaBan(diaBan, canonicalSignature(
+        nn, tt, nnnn, gioSinh, gioiTinh, duongLich, timeZone, dateFacts))
+
+
+def lapLaSo(nn, tt, nnnn, gioSinh, gioiTinh, duongLich, timeZone,
+            dateFacts=None):
+    """Như App.lapLaSo nhưng qua bộ nhớ đệm dùng chung"""
+    return _chartCache.lapLaSo(canonicalSignature(
+        nn, tt, nnnn, gioSinh, gioiTinh, duongLich, timeZone, dateFacts))
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Chỉ mục ngược: từ vị trí sao tới các lá số.
+
+Với mỗi sao và mỗi cung, chỉ mục giữ tập các lá số có sao đó ở cung đó,
+dưới dạng bitmap 518.400 bit theo thứ tự atlas.recordIndex, nén zlib. Mỗi
+sao có hai bộ 12 bitmap: theo cung trên địa bàn (Tý, Sửu,...) và theo cung
+chủ (Mệnh, Phụ mẫu,...). Đặc tính (miếu, vượng,...) chỉ phụ thuộc sao và
+cung nên được ghép từ các bitmap theo cung lúc truy vấn.
+
+    chiMuc = ChiMuc("index.bin")
+    tap = chiMuc.sao(saoTuVi.saoID, cungChu="Mệnh") \\
+        & chiMuc.sao(saoThienPhu.saoID, cungChu="Mệnh")
+    tap.dem()               # số lá số, không dựng lá số nào
+    next(tap.laSo())        # (ngayAm, thangAm, canNam, chiNam, gioSinh,
+                            #  gioiTinh)
+
+Dựng chỉ mục (chạy offline, khoảng vài giây với vectorized.anSao_batch):
+    python -m lasotuvi.chimuc index.bin
+hoặc cùng lúc với atlas:
+    python -m lasotuvi.atlas atlas.bin --index index.bin
+"""
+import argparse
+import struct
+import zlib
+
+import numpy as np
+
+from lasotuvi import engine
+from lasotuvi.atlas import (SO_CAN_CHI, SO_GIO, SO_GIOI_TINH, SO_LA_SO,
+                            SO_NGAY, SO_THANG, recordSignature)
+from lasotuvi.tables import CUNG_CHU, DAC_TINH, SO_SAO, chiSoDacTinh
+from lasotuvi.vectorized import anSao_batch, viTriSaoAtlas
+
+MAGIC = b'TVINDEX\x00'
+VERSION = 1
+_HEADER = struct.Struct('<8sHII')
+_MUC = struct.Struct('<QI')
+
+# Hai loại khóa của mỗi sao
+THEO_CUNG, THEO_CUNG_CHU = 0, 1
+SO_LA_SO_MOT_NGAY = SO_LA_SO // SO_NGAY
+
+# Số bit bật của mỗi giá trị byte
+_SO_BIT = np.array([bin(b).count("1") for b in range(256)], dtype=np.int64)
+
+
+def _soMuc(saoID, loai, so):
+    return ((saoID - 1) * 2 + loai) * 12 + so - 1
+
+
+class TapLaSo(object):
+    """Tập lá số dạng bitmap, hỗ trợ & (AND), | (OR), - (AND NOT), ~"""
+
+    __slots__ = ('bit', 'soLaSo')
+
+    def __init__(self, bit, soLaSo):
+        super(TapLaSo, self).__init__()
+        self.bit = bit
+        self.soLaSo = soLaSo
+
+    def __and__(self, other):
+        return TapLaSo(self.bit & other.bit, self.soLaSo)
+
+    def __or__(self, other):
+        return TapLaSo(self.bit | other.bit, self.soLaSo)
+
+    def __sub__(self, other):
+        return TapLaSo(self.bit & ~other.bit, self.soLaSo)
+
+    def __invert__(self):
+        bit = ~self.bit
+        du = self.soLaSo % 8
+        if du:
+            bit[-1] &= (0xff << (8 - du)) & 0xff
+        return TapLaSo(bit, self.soLaSo)
+
+    def dem(self):
+        """Số lá số trong tập"""
+        return int(_SO_BIT[self.bit].sum())
+
+    __len__ = dem
+
+    def chiSo(self):
+        """Mảng recordIndex của các lá số trong tập, tăng dần"""
+        return np.flatnonzero(np.unpackbits(self.bit, count=self.soLaSo))
+
+    def laSo(self):
+        """Duyệt (ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh)"""
+        for chiSo in self.chiSo().tolist():
+            yield recordSignature(chiSo)
+
+
+class ChiMuc(object):
+    """Đọc chỉ mục ngược; bitmap được giải nén khi cần và giữ lại"""
+
+    def __init__(self, path):
+        super(ChiMuc, self).__init__()
+        with open(path, 'rb') as f:
+            self._duLieu = f.read()
+        magic, version, self.soLaSo, soMuc = \
+            _HEADER.unpack_from(self._duLieu, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception("File chỉ mục không hợp lệ: %s" % path)
+        self._muc = [_MUC.unpack_from(self._duLieu,
+                                      _HEADER.size + i * _MUC.size)
+                     for i in range(soMuc)]
+        self._bitmap = {}
+
+    def _tap(self, soMuc):
+        bit = self._bitmap.get(soMuc)
+        if bit is None:
+            offset, length = self._muc[soMuc]
+            bit = np.frombuffer(
+                zlib.decompress(self._duLieu[offset:offset + length]),
+                dtype=np.uint8)
+            self._bitmap[soMuc] = bit
+        return TapLaSo(bit, self.soLaSo)
+
+    def tatCa(self):
+        """Tập mọi lá số trong chỉ mục"""
+        return ~TapLaSo(np.zeros((self.soLaSo + 7) // 8, dtype=np.uint8),
+                        self.soLaSo)
+
+    def sao(self, saoID, cungSo=None, cungChu=None, dacTinh=None):
+        """Các lá số có sao ở cung cho trước
+
+        Args:
+            saoID (int): Sao cần tìm
+            cungSo (int, optional): Cung trên địa bàn (1: Tý,...)
+            cungChu (str, optional): Tên cung chủ (Mệnh, Phụ mẫu,...)
+            dacTinh (str, optional): Một hay nhiều đặc tính, ví dụ "M" hoặc
+                ("M", "V", "Đ")
+
+        Returns:
+            TapLaSo
+        """
+        if not 1 <= saoID < SO_SAO:
+            raise Exception("Không có sao %s" % saoID)
+        tap = None
+        if cungChu is not None:
+            if cungChu not in CUNG_CHU:
+                raise Exception("Không có cung %s" % cungChu)
+            tap = self._tap(_soMuc(saoID, THEO_CUNG_CHU,
+                                   CUNG_CHU.index(cungChu) + 1))
+        if cungSo is not None or dacTinh is not None:
+            cacCung = range(1, 13) if cungSo is None else (cungSo,)
+            if dacTinh is not None:
+                # "M" là một đặc tính chứ không so chuỗi con; cung không có
+                # đặc tính (None) không khớp với tuple nào
+                dacTinh = (dacTinh,) if isinstance(dacTinh, str) \
+                    else tuple(dacTinh)
+                cacCung = [c for c in cacCung
+                           if DAC_TINH[chiSoDacTinh(saoID, c)] in dacTinh]
+            theoCung = TapLaSo(np.zeros((self.soLaSo + 7) // 8,
+                                        dtype=np.uint8), self.soLaSo)
+            for c in cacCung:
+                theoCung = theoCung | self._tap(_soMuc(saoID, THEO_CUNG, c))
+            tap = theoCung if tap is None else tap & theoCung
+        return self.tatCa() if tap is None else tap
+
+
+def ghiChiMuc(path, viTriSao, cungMenh):
+    """Ghi chỉ mục từ vị trí sao của mọi lá số
+
+    Args:
+        viTriSao (array): Mảng (SO_SAO, n) cung của từng sao, theo thứ tự
+            recordIndex
+        cungMenh (array): Cung Mệnh của n lá số
+    """
+    soLaSo = viTriSao.shape[1]
+    soMuc = _soMuc(SO_SAO - 1, THEO_CUNG_CHU, 12) + 1
+    cungMenh = np.asarray(cungMenh, dtype=np.int16)
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, soLaSo, soMuc))
+        f.write(b'\x00' * (soMuc * _MUC.size))
+        muc = []
+        offset = _HEADER.size + soMuc * _MUC.size
+        for saoID in range(1, SO_SAO):
+            cungSo = np.asarray(viTriSao[saoID], dtype=np.int16)
+            # Cung chủ 1 là Mệnh; 0 với lá số chưa có sao (atlas chưa tính)
+            cungChu = np.where(cungSo > 0, (cungSo - cungMenh) % 12 + 1, 0)
+            for bang in (cungSo, cungChu):
+                for so in range(1, 13):
+                    nen = zlib.compress(np.packbits(bang == so).tobytes(), 9)
+                    f.write(nen)
+                    muc.append(_MUC.pack(offset, len(nen)))
+                    offset += len(nen)
+        f.seek(_HEADER.size)
+        f.write(b''.join(muc))
+
+
+def _tatCaLaSo(ngayAm):
+    """Đầu vào của mọi lá số trong một ngày âm, theo thứ tự recordIndex"""
+    i = np.arange(SO_LA_SO_MOT_NGAY)
+    gioiTinh = np.where(i % SO_GIOI_TINH == 0, 1, -1)
+    i //= SO_GIOI_TINH
+    gioSinh = i % SO_GIO + 1
+    i //= SO_GIO
+    canChi = i % SO_CAN_CHI
+    thangAm = i // SO_CAN_CHI % SO_THANG + 1
+    return (np.full(SO_LA_SO_MOT_NGAY, ngayAm), thangAm, canChi % 10 + 1,
+            canChi % 12 + 1, gioSinh, gioiTinh)
+
+
+def xayChiMuc(path, chartAtlas=None, soNgay=SO_NGAY):
+    """Dựng chỉ mục cho toàn bộ lá số
+
+    Args:
+        path (str): File chỉ mục đầu ra
+        chartAtlas (ChartAtlas, optional): Đọc vị trí sao từ atlas thay vì
+            tính lại bằng vectorized.anSao_batch
+        soNgay (int, optional): Chỉ lấy các ngày âm 1..soNgay (dùng khi
+            thử nghiệm)
+    """
+    if chartAtlas is not None:
+        viTriSao, cungMenh = viTriSaoAtlas(chartAtlas)
+        soLaSo = soNgay * SO_LA_SO_MOT_NGAY
+        viTriSao, cungMenh = viTriSao[:, :soLaSo], cungMenh[:soLaSo]
+    else:
+        viTriSao = np.empty((SO_SAO, soNgay * SO_LA_SO_MOT_NGAY),
+                            dtype=np.uint8)
+        cungMenh = np.empty(viTriSao.shape[1], dtype=np.uint8)
+        for ngayAm in range(1, soNgay + 1):
+            o = anSao_batch(*_tatCaLaSo(ngayAm))
+            cot = slice((ngayAm - 1) * SO_LA_SO_MOT_NGAY,
+                        ngayAm * SO_LA_SO_MOT_NGAY)
+            viTriSao[:, cot] = o[:SO_SAO]
+            cungMenh[cot] = o[engine.MENH]
+    ghiChiMuc(path, viTriSao, cungMenh)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Dựng chỉ mục ngược lá số")
+    parser.add_argument('path', help="File chỉ mục đầu ra")
+    parser.add_argument('--atlas', default=None,
+                        help="Đọc vị trí sao từ file atlas có sẵn")
+    args = parser.parse_args()
+    chartAtlas = None
+    if args.atlas:
+        from lasotuvi.atlas import ChartAtlas
+        chartAtlas = ChartAtlas(args.atlas)
+    xayChiMuc(args.path, chartAtlas)
@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+"""
+An sao theo bảng quy tắc.
+
+Vị trí của mọi sao trên Địa Bàn được mô tả bằng một dãy bước (Buoc), mỗi
+bước ghi một số nguyên vào một ô của mảng ô:
+
+    ô 0..SO_SAO-1       cung của sao có saoID tương ứng
+    các ô còn lại       dữ kiện đầu vào (NGAY, THANG, ...) và giá trị trung
+                        gian (MENH, CUC, ...)
+
+Mỗi bước tính khoa = hangSo + tổng(heSo * ô) rồi:
+    - tra bảng: ô đích = bang[khoa]
+    - dịch cung: ô đích = dichCung(ô neo, khoa * ô chieu)
+
+App.lapDiaBan dùng QUY_TAC (theo sách cụ Thiên Lương); một trường phái
+khác chỉ cần thay vài bước bằng BoQuyTac.thay, ví dụ QUY_TAC_VU_THIEN.
+Cùng một bảng quy tắc được vectorized.anSao_batch chạy trên mảng NumPy.
+"""
+from collections import namedtuple
+
+from lasotuvi import Sao
+from lasotuvi.AmDuong import (diaChi, dichCung, nguHanh, thienCan,
+                              timCoThan, timCuc, timHoaLinh, timPhaToai,
+                              timThienMa, timTrangSinh, timTuVi)
+from lasotuvi.Sao import (saoAnQuang, saoBachHo, saoBacSy, saoBatToa, saoBenh,
+                          saoBenhPhu, saoCoThan, saoCuMon, saoDaiHao, saoDaLa,
+                          saoDaoHoa, saoDauQuan, saoDeVuong, saoDiaGiai,
+                          saoDiaKhong, saoDiaKiep, saoDiaVong, saoDieuKhach,
+                          saoDuong, saoDuongPhu, saoGiaiThan, saoHoaCai,
+                          saoHoaKhoa, saoHoaKy, saoHoaLoc, saoHoaQuyen,
+                          saoHoaTinh, saoHongLoan, saoHuuBat, saoHyThan,
+                          saoKiepSat, saoKinhDuong, saoLamQuan, saoLiemTrinh,
+                          saoLinhTinh, saoLocTon, saoLongDuc, saoLongTri,
+                          saoLucSi, saoLuuHa, saoMo, saoMocDuc, saoNguyetDuc,
+                          saoPhaQuan, saoPhaToai, saoPhiLiem, saoPhongCao,
+                          saoPhucBinh, saoPhucDuc, saoPhuongCac, saoQuanDoi,
+                          saoQuanPhu2, saoQuanPhu3, saoQuaTu, saoQuocAn,
+                          saoSuy, saoTamThai, saoTangMon, saoTaPhu,
+                          saoTauThu, saoThai, saoThaiAm, saoThaiDuong,
+                          saoThaiPhu, saoThaiTue, saoThamLang, saoThanhLong,
+                          saoThatSat, saoThienCo, saoThienDong, saoThienDuc,
+                          saoThienGiai, saoThienHinh, saoThienHu, saoThienHy,
+                          saoThienKhoc, saoThienKhoi, saoThienKhong,
+                          saoThienLa, saoThienLuong, saoThienMa, saoThienPhu,
+                          saoThienPhuc, saoThienQuan, saoThienQuy,
+                          saoThienRieu, saoThienSu, saoThienTai, saoThienTho,
+                          saoThienThuong, saoThienTru, saoThienTuong,
+                          saoThienViet, saoThienY, saoThieuAm, saoThieuDuong,
+                          saoTieuHao, saoTrangSinh, saoTrucPhu, saoTu,
+                          saoTuePha, saoTuongQuan, saoTuPhu, saoTuVi,
+                          saoTuyet, saoVanKhuc, saoVanTinh, saoVanXuong,
+                          saoVuKhuc)
+from lasotuvi.DiaBan import timDacTinh
+from lasotuvi.Sao import SaoCung
+from lasotuvi.tables import (CUNG_CHU, LUU_HA, SO_SAO, THIEN_KHOI,
+                             THIEN_PHUC, THIEN_QUAN, THIEN_TRU, TRIET, TU_HOA)
+
+# Các ô đầu vào
+NGAY, THANG, GIO, GIOI_TINH, CAN, CHI = range(SO_SAO, SO_SAO + 6)
+# Các ô trung gian
+(MENH, THAN, NO_BOC, TAT_ACH, CHIEU, CUC, KHOI_HOA, KHOI_LINH,
+ HOA_LOC, HOA_QUYEN, HOA_KHOA, HOA_KY,
+ TUAN_1, TUAN_2, TRIET_1, TRIET_2) = range(SO_SAO + 6, SO_SAO + 22)
+SO_O = SO_SAO + 22
+
+Buoc = namedtuple('Buoc', ['dich', 'bang', 'neo', 'hangSo', 'heSo', 'chieu',
+                           'gianTiep'])
+
+
+def _o(o):
+    return o.saoID if isinstance(o, Sao.Sao) else o
+
+
+def tra(dich, bang, *heSo, hangSo=0):
+    """Bước tra bảng: ô dich = bang[hangSo + tổng(heSo * ô)]"""
+    return Buoc(_o(dich), bang, None, hangSo,
+                tuple((_o(o), h) for o, h in heSo), None, False)
+
+
+def dich(dich, neo=None, hangSo=0, *heSo, chieu=None, gianTiep=False):
+    """Bước dịch cung: ô dich = dichCung(ô neo, khoa * ô chieu)
+
+    Args:
+        neo: Ô (hoặc sao) làm mốc, None nếu mốc là cung 0
+        chieu: Ô chứa chiều dịch (1 hoặc -1), None nếu luôn thuận
+        gianTiep (bool): Ô neo chứa saoID, mốc là cung của sao đó
+    """
+    return Buoc(_o(dich), None, None if neo is None else _o(neo), hangSo,
+                tuple((_o(o), h) for o, h in heSo), chieu, gianTiep)
+
+
+class BoQuyTac(object):
+    """Dãy bước an sao, theo đúng thứ tự nhập sao vào Địa Bàn"""
+
+    def __init__(self, buoc):
+        super(BoQuyTac, self).__init__()
+        self.buoc = tuple(buoc)
+        self.thuTuSao = tuple(b.dich for b in self.buoc if b.dich < SO_SAO)
+        self.theoDich = {b.dich: b for b in self.buoc}
+        self.hangSao = {saoID: i for i, saoID in enumerate(self.thuTuSao)}
+
+    def thay(self, *buocMoi):
+        """Bộ quy tắc mới, thay các bước có cùng ô đích bằng buocMoi"""
+        moi = {b.dich: b for b in buocMoi}
+        return BoQuyTac(moi.get(b.dich, b) for b in self.buoc)
+
+
+def _bang(khoa, ham):
+    bang = [None] * (max(khoa) + 1)
+    for k in khoa:
+        bang[k] = ham(k)
+    return tuple(bang)
+
+
+# Bảng tra dựng từ các hàm trong AmDuong, khóa ghi bên cạnh
+_CUC = _bang([m * 11 + c for m in range(1, 13) for c in range(1, 11)],
+             lambda k: nguHanh(timCuc(k // 11, k % 11))['cuc'])  # MENH, CAN
+_TU_VI = _bang([c * 31 + n for c in range(2, 7) for n in range(1, 31)],
+               lambda k: timTuVi(k // 31, k % 31))  # CUC, NGAY
+_TRANG_SINH = _bang(range(2, 7), timTrangSinh)  # CUC
+_LOC_TON = _bang(range(1, 11), lambda c: thienCan[c]['vitriDiaBan'])  # CAN
+_CHIEU = _bang([g * 11 + c + 11 for g in (-1, 1) for c in range(1, 11)],
+               lambda k: (k // 11 - 1) * thienCan[k % 11]['amDuong'])
+_KHOI_HOA = _bang(range(1, 13), lambda c: timHoaLinh(c, 1, 1, 1)[0])  # CHI
+_KHOI_LINH = _bang(range(1, 13), lambda c: timHoaLinh(c, 1, 1, 1)[1])
+_CO_THAN = _bang(range(1, 13), timCoThan)  # CHI
+_THIEN_MA = _bang(range(1, 13), timThienMa)
+_PHA_TOAI = _bang(range(1, 13), timPhaToai)
+_TRIET_1 = tuple(t and t[0] for t in TRIET)  # CAN
+_TRIET_2 = tuple(t and t[1] for t in TRIET)
+_TU_HOA = [tuple(t and t[i] for t in TU_HOA) for i in range(4)]  # CAN
+
+QUY_TAC = BoQuyTac([
+    # Cung Mệnh, Thân, Nô bộc, Tật ách
+    dich(MENH, None, 3, (THANG, 1), (GIO, -1)),
+    dich(THAN, None, 1, (THANG, 1), (GIO, 1)),
+    dich(NO_BOC, MENH, 5),
+    dich(TAT_ACH, MENH, 7),
+    # Âm dương nam nữ: 1 thuận, -1 nghịch
+    tra(CHIEU, _CHIEU, (GIOI_TINH, 11), (CAN, 1), hangSo=11),
+    tra(CUC, _CUC, (MENH, 11), (CAN, 1)),
+
+    # Tử vi tinh hệ
+    tra(saoTuVi, _TU_VI, (CUC, 31), (NGAY, 1)),
+    dich(saoLiemTrinh, saoTuVi, 4),
+    dich(saoThienDong, saoTuVi, 7),
+    dich(saoVuKhuc, saoTuVi, 8),
+    dich(saoThaiDuong, saoTuVi, 9),
+    dich(saoThienCo, saoTuVi, 11),
+
+    # Thiên phủ tinh hệ
+    dich(saoThienPhu, None, 6, (saoTuVi, -1)),
+    dich(saoThaiAm, saoThienPhu, 1),
+    dich(saoThamLang, saoThienPhu, 2),
+    dich(saoCuMon, saoThienPhu, 3),
+    dich(saoThienTuong, saoThienPhu, 4),
+    dich(saoThienLuong, saoThienPhu, 5),
+    dich(saoThatSat, saoThienPhu, 6),
+    dich(saoPhaQuan, saoThienPhu, 10),
+
+    # Vòng Lộc tồn, Bác sỹ ở cùng cung với Lộc tồn
+    tra(saoLocTon, _LOC_TON, (CAN, 1)),
+    dich(saoBacSy, saoLocTon),
+    dich(saoLucSi, saoLocTon, 1, chieu=CHIEU),
+    dich(saoThanhLong, saoLocTon, 2, chieu=CHIEU),
+    dich(saoTieuHao, saoLocTon, 3, chieu=CHIEU),
+    dich(saoTuongQuan, saoLocTon, 4, chieu=CHIEU),
+    dich(saoTauThu, saoLocTon, 5, chieu=CHIEU),
+    dich(saoPhiLiem, saoLocTon, 6, chieu=CHIEU),
+    dich(saoHyThan, saoLocTon, 7, chieu=CHIEU),
+    dich(saoBenhPhu, saoLocTon, 8, chieu=CHIEU),
+    dich(saoDaiHao, saoLocTon, 9, chieu=CHIEU),
+    dich(saoPhucBinh, saoLocTon, 10, chieu=CHIEU),
+    dich(saoQuanPhu2, saoLocTon, 11, chieu=CHIEU),
+
+    # Vòng Địa chi - Thái tuế
+    dich(saoThaiTue, CHI),
+    dich(saoThieuDuong, saoThaiTue, 1),
+    dich(saoThienKhong, saoThaiTue, 1),
+    dich(saoTangMon, saoThaiTue, 2),
+    dich(saoThieuAm, saoThaiTue, 3),
+    dich(saoQuanPhu3, saoThaiTue, 4),
+    dich(saoTuPhu, saoThaiTue, 5),
+    dich(saoNguyetDuc, saoThaiTue, 5),
+    dich(saoTuePha, saoThaiTue, 6),
+    dich(saoLongDuc, saoThaiTue, 7),
+    dich(saoBachHo, saoThaiTue, 8),
+    dich(saoPhucDuc, saoThaiTue, 9),
+    dich(saoThienDuc, saoThaiTue, 9),
+    dich(saoDieuKhach, saoThaiTue, 10),
+    dich(saoTrucPhu, saoThaiTue, 11),
+
+    # Vòng Tràng sinh: Dương nam, Âm nữ thuận; Âm nam, Dương nữ nghịch
+    tra(saoTrangSinh, _TRANG_SINH, (CUC, 1)),
+    dich(saoMocDuc, saoTrangSinh, 1, chieu=CHIEU),
+    dich(saoQuanDoi, saoTrangSinh, 2, chieu=CHIEU),
+    dich(saoLamQuan, saoTrangSinh, 3, chieu=CHIEU),
+    dich(saoDeVuong, saoTrangSinh, 4, chieu=CHIEU),
+    dich(saoSuy, saoTrangSinh, 5, chieu=CHIEU),
+    dich(saoBenh, saoTrangSinh, 6, chieu=CHIEU),
+    dich(saoTu, saoTrangSinh, 7, chieu=CHIEU),
+    dich(saoMo, saoTrangSinh, 8, chieu=CHIEU),
+    dich(saoTuyet, saoTrangSinh, 9, chieu=CHIEU),
+    dich(saoThai, saoTrangSinh, -1, chieu=CHIEU),
+    dich(saoDuong, saoTrangSinh, -2, chieu=CHIEU),
+
+    # Kình dương - Đà la
+    dich(saoDaLa, saoLocTon, -1),
+    dich(saoKinhDuong, saoLocTon, 1),
+
+    # Không - Kiếp: khởi giờ Tý ở cung Hợi, đếm thuận đến giờ sinh
+    dich(saoDiaKiep, None, 11, (GIO, 1)),
+    dich(saoDiaKhong, None, 24, (saoDiaKiep, -1)),
+
+    # Hỏa - Linh
+    tra(KHOI_HOA, _KHOI_HOA, (CHI, 1)),
+    tra(KHOI_LINH, _KHOI_LINH, (CHI, 1)),
+    dich(saoHoaTinh, KHOI_HOA, -1, (GIO, 1), chieu=CHIEU),
+    dich(saoLinhTinh, KHOI_LINH, 1, (GIO, -1), chieu=CHIEU),
+
+    dich(saoLongTri, None, 4, (CHI, 1)),
+    dich(saoPhuongCac, None, 4, (saoLongTri, -1)),
+    dich(saoGiaiThan, None, 4, (saoLongTri, -1)),
+    dich(saoTaPhu, None, 4, (THANG, 1)),
+    dich(saoHuuBat, None, 4, (saoTaPhu, -1)),
+    dich(saoVanKhuc, None, 4, (GIO, 1)),
+    dich(saoVanXuong, None, 4, (saoVanKhuc, -1)),
+    dich(saoTamThai, None, 3, (THANG, 1), (NGAY, 1)),
+    dich(saoBatToa, None, 4, (saoTamThai, -1)),
+
+    # Ân Quang: kể cung Văn Xương là mồng một, đếm thuận đến ngày sinh,
+    # lùi lại một cung. Thiên Quý đối với Ân Quang qua trục Sửu Mùi
+    dich(saoAnQuang, saoVanXuong, -2, (NGAY, 1)),
+    dich(saoThienQuy, None, 4, (saoAnQuang, -1)),
+
+    tra(saoThienKhoi, THIEN_KHOI, (CAN, 1)),
+    dich(saoThienViet, None, 10, (saoThienKhoi, -1)),
+    dich(saoThienHu, None, 6, (CHI, 1)),
+    dich(saoThienKhoc, None, 8, (CHI, -1)),
+    dich(saoThienTai, MENH, -1, (CHI, 1)),
+    dich(saoThienTho, THAN, -1, (CHI, 1)),
+    dich(saoHongLoan, None, 5, (CHI, -1)),
+    dich(saoThienHy, saoHongLoan, 6),
+
+    # Thiên Quan - Thiên Phúc
+    tra(saoThienQuan, THIEN_QUAN, (CAN, 1)),
+    tra(saoThienPhuc, THIEN_PHUC, (CAN, 1)),
+
+    dich(saoThienHinh, None, 9, (THANG, 1)),
+    dich(saoThienRieu, saoThienHinh, 4),
+    dich(saoThienY, saoThienHinh, 4),
+    tra(saoCoThan, _CO_THAN, (CHI, 1)),
+    dich(saoQuaTu, saoCoThan, -4),
+    dich(saoVanTinh, saoKinhDuong, 2),
+    dich(saoDuongPhu, saoVanTinh, 2),
+    dich(saoQuocAn, saoDuongPhu, 3),
+
+    # Thai phụ - Phong Cáo
+    dich(saoThaiPhu, saoVanKhuc, 2),
+    dich(saoPhongCao, saoVanKhuc, -2),
+
+    # Thiên giải - Địa giải: lấy cung Thân làm tháng Giêng, đếm thuận
+    # nhưng nhảy cung
+    dich(saoThienGiai, None, 7, (THANG, 2)),
+    dich(saoDiaGiai, saoTaPhu, 3),
+
+    # Thiên la - Địa võng, Thiên thương - Thiên sứ
+    dich(saoThienLa, None, 5),
+    dich(saoDiaVong, None, 11),
+    dich(saoThienThuong, NO_BOC),
+    dich(saoThienSu, TAT_ACH),
+
+    # Vòng Thiên mã
+    tra(saoThienMa, _THIEN_MA, (CHI, 1)),
+    dich(saoHoaCai, saoThienMa, 2),
+    dich(saoKiepSat, saoThienMa, 3),
+    dich(saoDaoHoa, saoKiepSat, 4),
+
+    tra(saoPhaToai, _PHA_TOAI, (CHI, 1)),
+    dich(saoDauQuan, CHI, 0, (THANG, -1), (GIO, 1)),
+
+    # Tứ Hóa: tra saoID mang Hóa theo can năm (tables.TU_HOA), rồi an
+    # cùng cung với sao đó
+    tra(HOA_LOC, _TU_HOA[0], (CAN, 1)),
+    tra(HOA_QUYEN, _TU_HOA[1], (CAN, 1)),
+    tra(HOA_KHOA, _TU_HOA[2], (CAN, 1)),
+    tra(HOA_KY, _TU_HOA[3], (CAN, 1)),
+    dich(saoHoaLoc, HOA_LOC, gianTiep=True),
+    dich(saoHoaQuyen, HOA_QUYEN, gianTiep=True),
+    dich(saoHoaKhoa, HOA_KHOA, gianTiep=True),
+    dich(saoHoaKy, HOA_KY, gianTiep=True),
+
+    # Lưu Hà - Thiên Trù
+    tra(saoLuuHa, LUU_HA, (CAN, 1)),
+    tra(saoThienTru, THIEN_TRU, (CAN, 1)),
+
+    # Tuần, Triệt
+    dich(TUAN_1, CHI, 11, (CAN, -1)),
+    dich(TUAN_2, CHI, 12, (CAN, -1)),
+    tra(TRIET_1, _TRIET_1, (CAN, 1)),
+    tra(TRIET_2, _TRIET_2, (CAN, 1)),
+])
+
+# Ân Quang theo cụ Vu Thiên: lấy cung Thìn làm mồng 1 đếm thuận đến ngày
+# sinh, lui lại một cung làm giờ Tý đếm thuận đến giờ sinh
+QUY_TAC_VU_THIEN = QUY_TAC.thay(
+    dich(saoAnQuang, None, 2, (NGAY, 1), (GIO, 1)),
+)
+
+
+def anSao(ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh,
+          quyTac=QUY_TAC):
+    """Chạy bộ quy tắc cho một lá số
+
+    Returns:
+        list: Mảng SO_O ô, ô saoID là cung của sao đó
+    """
+    o = [0] * SO_O
+    o[NGAY], o[THANG], o[GIO] = ngayAm, thangAm, gioSinh
+    o[GIOI_TINH], o[CAN], o[CHI] = gioiTinh, canNam, chiNam
+    for oDich, bang, neo, khoa, heSo, chieu, gianTiep in quyTac.buoc:
+        for oHeSo, h in heSo:
+            khoa += h * o[oHeSo]
+        if bang is not None:
+            o[oDich] = bang[khoa]
+            continue
+        if chieu is not None:
+            khoa *= o[chieu]
+        if neo is not None:
+            khoa += o[o[neo]] if gianTiep else o[neo]
+        o[oDich] = (khoa - 1) % 12 + 1
+    return o
+
+
+_SAO_THEO_ID = {sao.saoID: sao for sao in vars(Sao).values()
+                if isinstance(sao, Sao.Sao)}
+
+
+def lapDiaBan(diaBan, ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh,
+              quyTac=QUY_TAC):
+    """Dựng Địa Bàn từ ngày, tháng âm lịch và can chi năm sinh
+
+    Args:
+        diaBan (class): Lớp Địa Bàn (DiaBan.diaBan hoặc lớp con)
+        quyTac (BoQuyTac, optional): Bộ quy tắc an sao
+
+    Returns:
+        diaBan: Địa Bàn đã an đủ sao, Tuần, Triệt, đại hạn, tiểu hạn
+    """
+    return dungDiaBan(diaBan, anSao(ngayAm, thangAm, canNam, chiNam,
+                                    gioSinh, gioiTinh, quyTac), quyTac)
+
+
+def dungDiaBan(diaBan, o, quyTac=QUY_TAC):
+    """Dựng Địa Bàn từ mảng ô đã tính (kết quả của anSao)
+
+    Args:
+        diaBan (class): Lớp Địa Bàn (DiaBan.diaBan hoặc lớp con)
+        o (list): Mảng SO_O ô của anSao
+        quyTac (BoQuyTac, optional): Bộ quy tắc đã dùng để tính o
+
+    Returns:
+        diaBan: Địa Bàn đã an đủ sao, Tuần, Triệt, đại hạn, tiểu hạn
+    """
+    gioiTinh, chiNam = o[GIOI_TINH], o[CHI]
+    db = diaBan(o[THANG], o[GIO])
+    # Dương Nam - Âm Nữ theo chiều thuận, Âm Nam - Dương Nữ theo chiều nghịch
+    db.nhapDaiHan(o[CUC], gioiTinh * diaChi[chiNam]['amDuong'])
+    db.nhapTieuHan(dichCung(11, -3 * (chiNam - 1)), gioiTinh, chiNam)
+    for saoID in quyTac.thuTuSao:
+        db.nhapSao(o[saoID], _SAO_THEO_ID[saoID])
+    db.nhapTuan(o[TUAN_1], o[TUAN_2])
+    db.nhapTriet(o[TRIET_1], o[TRIET_2])
+    return db
+
+
+# Nhóm sao cho LaSo.palace
+NHOM_SAO = {
+    "chinh_tinh": frozenset(range(1, 15)),
+    "vong_thai_tue": frozenset(list(range(15, 27)) + [71, 72, 108]),
+    "vong_loc_ton": frozenset(list(range(27, 39)) + [109]),
+    "vong_trang_sinh": frozenset(range(39, 51)),
+    "tu_hoa": frozenset(range(92, 96)),
+}
+NHOM_SAO["phu_tinh"] = frozenset(
+    set(range(1, SO_SAO)).difference(*NHOM_SAO.values()))
+
+CungLaSo = namedtuple('CungLaSo', ['cungSo', 'cungChu', 'cungSao'])
+
+
+class LaSo(object):
+    """Lá số tính lười: chỉ chạy các bước quy tắc cần cho phần được hỏi
+
+    Ví dụ chỉ lấy chính tinh ở cung Mệnh:
+        LaSo(...).palace("Mệnh", groups={"chinh_tinh"})
+    """
+
+    def __init__(self, ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh,
+                 quyTac=QUY_TAC):
+        super(LaSo, self).__init__()
+        self.quyTac = quyTac
+        self._o = [None] * SO_O
+        self._o[NGAY], self._o[THANG], self._o[GIO] = \
+            ngayAm, thangAm, gioSinh
+        self._o[GIOI_TINH], self._o[CAN], self._o[CHI] = \
+            gioiTinh, canNam, chiNam
+        self._nhom = {}
+
+    @classmethod
+    def tuO(cls, o, quyTac=QUY_TAC):
+        """Lá số từ mảng ô đã tính đủ (anSao hoặc chartcache)"""
+        laSo = cls(o[NGAY], o[THANG], o[CAN], o[CHI], o[GIO], o[GIOI_TINH],
+                   quyTac)
+        laSo._o = list(o)
+        return laSo
+
+    def viTri(self, o):
+        """Giá trị của một ô (cung của sao nếu o là saoID), tính khi cần"""
+        giaTri = self._o[o]
+        if giaTri is not None:
+            return giaTri
+        buoc = self.quyTac.theoDich[o]
+        khoa = buoc.hangSo
+        for oHeSo, h in buoc.heSo:
+            khoa += h * self.viTri(oHeSo)
+        if buoc.bang is not None:
+            giaTri = buoc.bang[khoa]
+        else:
+            if buoc.chieu is not None:
+                khoa *= self.viTri(buoc.chieu)
+            if buoc.neo is not None:
+                neo = self.viTri(buoc.neo)
+                khoa += self.viTri(neo) if buoc.gianTiep else neo
+            giaTri = (khoa - 1) % 12 + 1
+        self._o[o] = giaTri
+        return giaTri
+
+    def nhom(self, tenNhom):
+        """Các sao của một nhóm (SaoCung), theo thứ tự an sao"""
+        saoCung = self._nhom.get(tenNhom)
+        if saoCung is None:
+            if tenNhom not in NHOM_SAO:
+                raise Exception("Không có nhóm sao %s" % tenNhom)
+            saoIDs = NHOM_SAO[tenNhom]
+            saoCung = []
+            for saoID in self.quyTac.thuTuSao:
+                if saoID in saoIDs:
+                    cungSo = self.viTri(saoID)
+                    saoCung.append(SaoCung(saoID, cungSo,
+                                           timDacTinh(saoID, cungSo)))
+            self._nhom[tenNhom] = saoCung
+        return saoCung
+
+    def palace(self, tenCung, groups=None):
+        """Một cung theo tên cung chủ (Mệnh, Phụ mẫu,...)
+
+        Args:
+            tenCung (str): Tên cung chủ, xem tables.CUNG_CHU
+            groups (set, optional): Tên các nhóm sao trong NHOM_SAO, mặc định
+                lấy tất cả
+
+        Returns:
+            CungLaSo: (cungSo, cungChu, cungSao), cungSao theo thứ tự an sao
+        """
+        if tenCung not in CUNG_CHU:
+            raise Exception("Không có cung %s" % tenCung)
+        cungSo = dichCung(self.viTri(MENH), CUNG_CHU.index(tenCung))
+        if groups is None:
+            groups = NHOM_SAO.keys()
+        cungSao = [sao for tenNhom in groups for sao in self.nhom(tenNhom)
+                   if sao.cungSo == cungSo]
+        if len(groups) > 1:
+            cungSao.sort(key=lambda sao: self.quyTac.hangSao[sao.saoID])
+        return CungLaSo(cungSo, tenCung, cungSao)
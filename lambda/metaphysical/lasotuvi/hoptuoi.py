@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Hợp tuổi: so hai lá số Tử Vi.
+
+Mỗi lá số là mảng ô của engine.anSao (can chi năm, cung Mệnh và cung của
+mọi sao đều nằm trong đó). Kết quả gồm:
+
+    quanHeChi       cờ quan hệ giữa hai chi năm: tam hợp, lục hợp, lục
+                    xung, tứ hành xung, lục hại
+    quanHeCan       cờ can hợp / can xung của hai can năm
+    napAm           sinh khắc giữa hành nạp âm của hai năm
+    phuThe12        cờ quan hệ giữa cung Phu Thê của người 1 và cung Mệnh
+                    của người 2 (cùng cung, tam hợp,...), phuThe21 ngược lại
+    trungSao12      số chính tinh ở Phu Thê người 1 cũng ở Mệnh người 2,
+                    trungSao21 ngược lại
+    diem            tổng điểm theo các bảng DIEM_*
+
+Mọi quan hệ được tra từ bảng số nguyên dựng sẵn; bản NumPy chấm một người
+với nhiều người là vectorized.hopTuoi_batch.
+
+    o1 = engine.anSao(ngayAm, thangAm, canNam, chiNam, gioSinh, gioiTinh)
+    ketQua = hopTuoi(o1, o2)
+    moTaHopTuoi(ketQua)
+"""
+from collections import namedtuple
+
+from lasotuvi import engine
+from lasotuvi.tables import CUNG_CHU, HANH_ID, NAP_AM_HANH, chiSoCanChi
+
+# Cờ quan hệ giữa hai chi (hoặc hai cung, cung số cũng là chi)
+TRUNG, TAM_HOP, LUC_HOP, LUC_XUNG, TU_HANH_XUNG, LUC_HAI = \
+    1, 2, 4, 8, 16, 32
+TEN_QUAN_HE_CHI = ((TRUNG, "Trùng"), (TAM_HOP, "Tam hợp"),
+                   (LUC_HOP, "Lục hợp"), (LUC_XUNG, "Lục xung"),
+                   (TU_HANH_XUNG, "Tứ hành xung"), (LUC_HAI, "Lục hại"))
+# Cờ quan hệ giữa hai can
+CAN_HOP, CAN_XUNG = 1, 2
+TEN_QUAN_HE_CAN = ((CAN_HOP, "Can hợp"), (CAN_XUNG, "Can xung"))
+# Sinh khắc nạp âm, theo góc nhìn của người 1
+BINH_HOA, SINH_XUAT, SINH_NHAP, KHAC_XUAT, KHAC_NHAP = range(5)
+TEN_NAP_AM = ("Bình hòa", "Mệnh người 1 sinh mệnh người 2",
+              "Mệnh người 2 sinh mệnh người 1",
+              "Mệnh người 1 khắc mệnh người 2",
+              "Mệnh người 2 khắc mệnh người 1")
+
+# Điểm của từng quan hệ; lục xung cũng là tứ hành xung nên bị trừ cả hai
+DIEM_CHI = {TAM_HOP: 2, LUC_HOP: 2, LUC_XUNG: -1, TU_HANH_XUNG: -1,
+            LUC_HAI: -1}
+DIEM_CAN = {CAN_HOP: 1, CAN_XUNG: -1}
+DIEM_NAP_AM = (1, 2, 2, -2, -2)
+DIEM_PHU_THE = {TRUNG: 2, TAM_HOP: 1, LUC_HOP: 1, LUC_XUNG: -1}
+DIEM_TRUNG_SAO = 1
+
+
+def _quanHeChi(chi1, chi2):
+    khoangCach = (chi2 - chi1) % 12
+    co = 0
+    if khoangCach == 0:
+        co |= TRUNG
+    elif khoangCach % 4 == 0:
+        co |= TAM_HOP
+    elif khoangCach % 3 == 0:
+        co |= TU_HANH_XUNG
+        if khoangCach == 6:
+            co |= LUC_XUNG
+    if (chi1 + chi2) % 12 == 3:
+        co |= LUC_HOP
+    if (chi1 + chi2) % 12 == 9:
+        co |= LUC_HAI
+    return co
+
+
+def _quanHeCan(can1, can2):
+    khoangCach = abs(can1 - can2)
+    return CAN_HOP if khoangCach == 5 else CAN_XUNG if khoangCach == 6 else 0
+
+
+# Vòng tương sinh Kim -> Thủy -> Mộc -> Hỏa -> Thổ và tương khắc Kim -> Mộc
+# -> Thổ -> Thủy -> Hỏa, theo id hành. Dựng từ vòng chứ không từ
+# tables.SINH_KHAC: ma trận đó ghi Thủy với Hỏa là sinh (xem AmDuong.sinhKhac)
+_SINH = {HANH_ID[a]: HANH_ID[b] for a, b in zip("KTMHO", "TMHOK")}
+_KHAC = {HANH_ID[a]: HANH_ID[b] for a, b in zip("KMOTH", "MOTHK")}
+
+
+def _napAm(hanh1, hanh2):
+    if hanh1 == hanh2:
+        return BINH_HOA
+    if _SINH[hanh1] == hanh2:
+        return SINH_XUAT
+    if _SINH[hanh2] == hanh1:
+        return SINH_NHAP
+    return KHAC_XUAT if _KHAC[hanh1] == hanh2 else KHAC_NHAP
+
+
+# Bảng tra, chỉ số là số thứ tự can, chi, hành (phần tử 0 bỏ qua)
+QUAN_HE_CHI = tuple(tuple(chi1 and chi2 and _quanHeChi(chi1, chi2)
+                          for chi2 in range(13)) for chi1 in range(13))
+QUAN_HE_CAN = tuple(tuple(can1 and can2 and _quanHeCan(can1, can2)
+                          for can2 in range(11)) for can1 in range(11))
+# Id hành nạp âm (trong NGU_HANH), tra theo chiSoCanChi
+HANH_NAP_AM = tuple(HANH_ID[hanh] if hanh else 0 for hanh in NAP_AM_HANH)
+NAP_AM = tuple(tuple(hanh1 and hanh2 and _napAm(hanh1, hanh2)
+                     for hanh2 in range(6)) for hanh1 in range(6))
+
+
+def bangDiem(diem, soMa):
+    """Bảng điểm theo mọi giá trị cờ 0..soMa-1: tổng điểm các cờ được bật"""
+    return tuple(sum(d for co, d in diem.items() if ma & co)
+                 for ma in range(soMa))
+
+
+# Điểm tra thẳng theo giá trị cờ
+BANG_DIEM_CHI = bangDiem(DIEM_CHI, 64)
+BANG_DIEM_CAN = bangDiem(DIEM_CAN, 4)
+BANG_DIEM_PHU_THE = bangDiem(DIEM_PHU_THE, 64)
+
+# Khoảng cách từ cung Mệnh tới cung Phu Thê
+PHU_THE = CUNG_CHU.index("Phu thê")
+_CHINH_TINH = tuple(sorted(engine.NHOM_SAO["chinh_tinh"]))
+
+KetQuaHop = namedtuple('KetQuaHop', [
+    'quanHeChi', 'quanHeCan', 'napAm', 'phuThe12', 'phuThe21',
+    'trungSao12', 'trungSao21', 'diem'])
+
+
+def _phuThe(o1, o2):
+    """Cờ quan hệ, số chính tinh trùng giữa Phu Thê của o1 và Mệnh của o2"""
+    phuThe = (o1[engine.MENH] + PHU_THE - 1) % 12 + 1
+    menh = o2[engine.MENH]
+    trungSao = 0
+    for saoID in _CHINH_TINH:
+        if o1[saoID] == phuThe and o2[saoID] == menh:
+            trungSao += 1
+    return QUAN_HE_CHI[phuThe][menh], trungSao
+
+
+def hopTuoi(o1, o2):
+    """Hợp tuổi giữa hai lá số
+
+    Args:
+        o1, o2 (list): Mảng ô của engine.anSao
+
+    Returns:
+        KetQuaHop
+    """
+    can1, chi1 = o1[engine.CAN], o1[engine.CHI]
+    can2, chi2 = o2[engine.CAN], o2[engine.CHI]
+    quanHeChi = QUAN_HE_CHI[chi1][chi2]
+    quanHeCan = QUAN_HE_CAN[can1][can2]
+    napAm = NAP_AM[HANH_NAP_AM[chiSoCanChi(chi1, can1)]][
+        HANH_NAP_AM[chiSoCanChi(chi2, can2)]]
+    phuThe12, trungSao12 = _phuThe(o1, o2)
+    phuThe21, trungSao21 = _phuThe(o2, o1)
+    diem = BANG_DIEM_CHI[quanHeChi] + BANG_DIEM_CAN[quanHeCan] \
+        + DIEM_NAP_AM[napAm] + BANG_DIEM_PHU_THE[phuThe12] \
+        + BANG_DIEM_PHU_THE[phuThe21] \
+        + DIEM_TRUNG_SAO * (trungSao12 + trungSao21)
+    return KetQuaHop(quanHeChi, quanHeCan, napAm, phuThe12, phuThe21,
+                     trungSao12, trungSao21, diem)
+
+
+def _tenCo(ma, tenCo):
+    return [ten for co, ten in tenCo if ma & co]
+
+
+def moTaHopTuoi(ketQua):
+    """Các dòng mô tả KetQuaHop bằng tiếng Việt"""
+    dong = []
+    quanHe = _tenCo(ketQua.quanHeChi, TEN_QUAN_HE_CHI) \
+        + _tenCo(ketQua.quanHeCan, TEN_QUAN_HE_CAN)
+    if quanHe:
+        dong.append("Tuổi: " + ", ".join(quanHe))
+    dong.append("Nạp âm: " + TEN_NAP_AM[ketQua.napAm])
+    for tieuDe, phuThe, trungSao in (
+            ("Phu Thê người 1 - Mệnh người 2", ketQua.phuThe12,
+             ketQua.trungSao12),
+            ("Phu Thê người 2 - Mệnh người 1", ketQua.phuThe21,
+             ketQua.trungSao21)):
+        quanHe = _tenCo(phuThe, TEN_QUAN_HE_CHI)
+        if trungSao:
+            quanHe.append("%d chính tinh trùng" % trungSao)
+        if quanHe:
+            dong.append("%s: %s" % (tieuDe, ", ".join(quanHe)))
+    dong.append("Điểm: %d" % ketQua.diem)
+    return dong
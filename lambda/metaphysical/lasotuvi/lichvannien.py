@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Lịch vạn niên: lưới ngày của một tháng dương lịch.
+
+    for ngay in thangLich(10, 2026):
+        ngay.ngay, ngay.ngayAm, ngay.canChiNgay, ngay.gioHoangDao
+
+Lưới bắt đầu từ thứ Hai của tuần chứa ngày 1 và kết thúc ở Chủ nhật của
+tuần chứa ngày cuối tháng (tối đa 6 tuần, 42 ô). Cả lưới chỉ cần một lần
+tra tháng âm (Lich_HND.lunarDays dựng LunarYear từ LunarTable rồi đi từng
+ngày) và một lần tra tiết khí; can chi ngày và giờ hoàng đạo là phép tra
+bảng.
+"""
+from collections import namedtuple
+
+from lasotuvi.battu import TRU
+from lasotuvi.Lich_HND import (jdFromDate, jdToDate, lunarDays,
+                               nextSolarTerm, solarTermOf)
+from lasotuvi.tables import GIO_HOANG_DAO
+
+NgayLich = namedtuple('NgayLich', [
+    'jd', 'ngay', 'thang', 'nam', 'trongThang', 'ngayAm', 'thangAm',
+    'namAm', 'thangNhuan', 'canChiNgay', 'gioHoangDao', 'tietKhi',
+    'vaoTiet'])
+NgayLich.__doc__ = """Một ô của lưới lịch. canChiNgay là battu.Tru,
+gioHoangDao là chi của sáu giờ hoàng đạo, tietKhi là số thứ tự tiết khí
+(xem Lich_HND.SOLAR_TERM_NAMES), vaoTiet là True vào ngày giao tiết."""
+
+
+def thangLich(thang, nam, timeZone=7):
+    """Các ô của lưới lịch tháng thang/nam, theo tuần từ thứ Hai
+
+    Returns:
+        list: 28 đến 42 NgayLich
+    """
+    dauThang = jdFromDate(1, thang, nam)
+    cuoiThang = jdFromDate(1, thang % 12 + 1, nam + thang // 12)
+    # Số ngày Julius chia 7 dư 0 vào thứ Hai
+    batDau = dauThang - dauThang % 7
+    soNgay = (cuoiThang - batDau + 6) // 7 * 7
+    tiet = solarTermOf(batDau, timeZone)
+    tietSau = nextSolarTerm(batDau, timeZone)
+    luoi = []
+    for ngay in lunarDays(*jdToDate(batDau), soNgay, timeZone):
+        if ngay.jd == tietSau.jd:
+            tiet = tietSau
+            tietSau = nextSolarTerm(ngay.jd, timeZone)
+        luoi.append(NgayLich(
+            ngay.jd, ngay.day, ngay.month, ngay.year,
+            dauThang <= ngay.jd < cuoiThang, ngay.lunarDay, ngay.lunarMonth,
+            ngay.lunarYear, ngay.lunarLeap, TRU[(ngay.jd + 49) % 60],
+            GIO_HOANG_DAO[ngay.chiNgay], tiet.term, ngay.jd == tiet.jd))
+    return luoi
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Bảng tra dựng sẵn cho AmDuong, DiaBan và App.
+
+Mọi bảng được tính một lần lúc import thành tuple đánh số nguyên, các hàm
+tra cứu (nguHanh, nguHanhNapAm, timDacTinh, timThienKhoi,...) chỉ còn là
+một phép lấy phần tử.
+"""
+from types import MappingProxyType
+
+# Ngũ hành, đánh số theo id của Hành: 1 Kim, 2 Mộc, 3 Thủy, 4 Hỏa, 5 Thổ
+NGU_HANH = (
+    None,
+    MappingProxyType({"id": 1, "tenHanh": "Kim", "cuc": 4,
+                      "tenCuc": "Kim tứ Cục", "css": "hanhKim"}),
+    MappingProxyType({"id": 2, "tenHanh": "Mộc", "cuc": 3,
+                      "tenCuc": "Mộc tam Cục", "css": "hanhMoc"}),
+    MappingProxyType({"id": 3, "tenHanh": "Thủy", "cuc": 2,
+                      "tenCuc": "Thủy nhị Cục", "css": "hanhThuy"}),
+    MappingProxyType({"id": 4, "tenHanh": "Hỏa", "cuc": 6,
+                      "tenCuc": "Hỏa lục Cục", "css": "hanhHoa"}),
+    MappingProxyType({"id": 5, "tenHanh": "Thổ", "cuc": 5,
+                      "tenCuc": "Thổ ngũ Cục", "css": "hanhTho"}),
+)
+
+# Tên (hoặc chữ viết tắt) của Hành -> id
+HANH_ID = MappingProxyType({
+    "Kim": 1, "K": 1,
+    "Moc": 2, "M": 2,
+    "Thuy": 3, "T": 3,
+    "Hoa": 4, "H": 4,
+    "Tho": 5, "O": 5,
+})
+
+# Quan hệ sinh khắc giữa hai Hành, tra theo id: 0 bình hòa, 1 / -1 sinh,
+# 1j / -1j khắc (xem AmDuong.sinhKhac)
+SINH_KHAC = (
+    (None, None, None, None, None, None),
+    (None, 0, -1, 1, -1j, 1j),
+    (None, -1j, 0, 1j, 1, -1),
+    (None, 1j, 1, 0, 1, -1j),
+    (None, -1, 1j, -1j, 0, 1),
+    (None, 1, -1j, -1, 1j, 0),
+)
+
+# Ngũ hành nạp âm của 30 cặp can chi, theo thứ tự hoa giáp
+_NAP_AM = (
+    ("K1", "HẢI TRUNG KIM"), ("H1", "LƯ TRUNG HỎA"),
+    ("M1", "ÐẠI LÂM MỘC"), ("O1", "LỘ BÀN THỔ"),
+    ("K2", "KIẾM PHONG KIM"), ("H2", "SƠN ÐẦU HỎA"),
+    ("T1", "GIÁNG HẠ THỦY"), ("O2", "THÀNH ÐẦU THỔ"),
+    ("K3", "BẠCH LẠP KIM"), ("M2", "DƯƠNG LIỄU MỘC"),
+    ("T2", "TRUYỀN TRUNG THỦY"), ("O3", "ỐC THƯỢNG THỔ"),
+    ("H3", "TÍCH LỊCH HỎA"), ("M3", "TÒNG BÁ MỘC"),
+    ("T3", "TRƯỜNG LƯU THỦY"), ("K4", "SA TRUNG KIM"),
+    ("H4", "SƠN HẠ HỎA"), ("M4", "BÌNH ÐỊA MỘC"),
+    ("O4", "BÍCH THƯỢNG THỔ"), ("K5", "KIM BẠCH KIM"),
+    ("H5", "PHÚ ÐĂNG HỎA"), ("T4", "THIÊN HÀ THỦY"),
+    ("O5", "ÐẠI TRẠCH THỔ"), ("K6", "XOA XUYẾN KIM"),
+    ("M5", "TANG ÐỐ MỘC"), ("T5", "ÐẠI KHÊ THỦY"),
+    ("O6", "SA TRUNG THỔ"), ("H6", "THIÊN THƯỢNG HỎA"),
+    ("M6", "THẠCH LỰU MỘC"), ("T6", "ÐẠI HẢI THỦY"),
+)
+
+
+def chiSoCanChi(diaChi, thienCan):
+    """Chỉ số phẳng của cặp (chi, can) trong các bảng 12 x 10"""
+    return (diaChi - 1) * 10 + (thienCan - 1)
+
+
+# 60 cặp (can, chi) của một vòng hoa giáp, bắt đầu từ Giáp Tý
+HOA_GIAP = tuple((i % 10 + 1, i % 12 + 1) for i in range(60))
+
+
+def _hoaGiapID():
+    bang = [None] * 120
+    for i, (thienCan, diaChi) in enumerate(HOA_GIAP):
+        bang[chiSoCanChi(diaChi, thienCan)] = i
+    return tuple(bang)
+
+
+# Số thứ tự 0-59 trong vòng hoa giáp, tra theo chiSoCanChi
+HOA_GIAP_ID = _hoaGiapID()
+
+
+def _napAm(cot):
+    bang = [None] * 120
+    for canChi in range(60):
+        bang[chiSoCanChi(canChi % 12 + 1, canChi % 10 + 1)] = \
+            _NAP_AM[canChi // 2][cot]
+    return tuple(bang)
+
+
+# Hành nạp âm (K, M, T, H, O) và tên bản mệnh, tra theo chiSoCanChi;
+# None với các cặp can chi không tồn tại (khác âm dương)
+NAP_AM_HANH = tuple(napAm and napAm[0] for napAm in _napAm(0))
+NAP_AM_BAN_MENH = _napAm(1)
+
+# Đặc tính của sao theo cung, hàng là saoID, cột là cung 1-12
+_DAC_TINH = {
+    1: "BĐMBVMMĐMBVB",  # Tử vi
+    2: "VĐVHMHVĐVHMH",  # Liêm trinh
+    3: "VHMĐHĐHHMHHĐ",  # Thiên đồng
+    4: "VMVĐMHVMVĐMH",  # Vũ khúc
+    5: "HĐVVVMMĐHHHH",  # Thái dương
+    6: "ĐĐHMMVĐĐVMMH",  # Thiên cơ
+    8: "VĐHHHHHĐVMMM",  # Thái âm
+    9: "HMĐHVHHMĐHVH",  # Tham lang
+    10: "VHVMHHVHĐMHĐ",  # Cự môn
+    11: "VĐMHVĐVĐMHVĐ",  # Thiên tướng
+    12: "VĐVVMHMĐVHMH",  # Thiên lương
+    13: "MĐMHHVMĐMHHV",  # Thất sát
+    14: "MVHHĐHMVHHĐH",  # Phá quân
+    51: "HĐHHĐHHĐHHĐH",  # Đà la
+    52: "HĐHHĐHHĐHHĐH",  # Kình dương
+    55: "HHĐĐĐĐĐHHHHH",  # Linh tinh
+    56: "HHĐĐĐĐĐHHHHH",  # Hỏa tinh
+    57: "HĐHĐHĐHĐHHĐĐ",  # Văn xương
+    58: "HĐHĐHĐHĐHHĐĐ",  # Văn khúc
+    53: "HHĐHHĐHHĐHHĐ",  # Địa không
+    54: "HHĐHHĐHHĐHHĐ",  # Địa kiếp
+    95: "-Đ--Đ--Đ--Đ-",  # Hóa kỵ
+    36: "--ĐĐ----ĐĐ--",  # Đại hao
+    30: "--ĐĐ----ĐĐ--",  # Tiểu Hao
+    69: "ĐĐ-Đ--ĐĐ-Đ--",  # Thiên khốc
+    70: "ĐĐ-Đ--ĐĐ-Đ--",  # Thiên hư
+    98: "--Đ--Đ------",  # Thiên mã
+    73: "--ĐĐ----ĐĐ--",  # Thiên Hình
+    74: "--ĐĐ-----ĐĐ-",  # Thiên riêu
+}
+SO_SAO = 110
+
+
+def chiSoDacTinh(saoID, cungSo):
+    """Chỉ số phẳng của cặp (saoID, cung) trong DAC_TINH"""
+    return saoID * 13 + cungSo
+
+
+def _dacTinh():
+    bang = [None] * (SO_SAO * 13)
+    for saoID, hang in _DAC_TINH.items():
+        for cungSo, dacTinh in enumerate(hang, 1):
+            if dacTinh != "-":
+                bang[chiSoDacTinh(saoID, cungSo)] = dacTinh
+    return tuple(bang)
+
+
+# M, V, Đ, B, H hoặc None, tra theo chiSoDacTinh
+DAC_TINH = _dacTinh()
+
+# Các bảng tra theo can năm (Giáp = 1, ..., Quý = 10)
+THIEN_KHOI = (None, 2, 1, 12, 10, 8, 1, 8, 7, 6, 4)
+# Giáp dương Nhâm khuyển Ất long nghi
+# Mậu thổ Canh chư Quý mã thượng
+# Kỳ nhân quý hiển khả tiên tri
+THIEN_QUAN = (None, 8, 5, 6, 3, 4, 10, 12, 10, 11, 7)
+# Giáp ái kim kê Ất ái hầu
+# Đinh chư Bính thử Kỷ hổ đầu
+# Tân quý phùng xà phúc lộc nhiêu
+THIEN_PHUC = (None, 10, 9, 1, 12, 4, 3, 7, 6, 7, 6)
+LUU_HA = (None, 10, 11, 8, 5, 6, 7, 9, 4, 12, 3)
+THIEN_TRU = (None, 6, 7, 1, 6, 7, 9, 3, 7, 10, 11)
+# Giáp Kỷ: Thân Dậu, Ất Canh: Ngọ Mùi, Bính Tân: Thìn Tị,
+# Đinh Nhâm: Dần Mão, Mậu Quý: Tý Sửu
+TRIET = (None, (9, 10), (7, 8), (5, 6), (3, 4), (1, 2),
+         (9, 10), (7, 8), (5, 6), (3, 4), (1, 2))
+
+# Can của tháng Dần theo can năm: Giáp Kỷ Bính Dần, Ất Canh Mậu Dần,
+# Bính Tân Canh Dần, Đinh Nhâm Nhâm Dần, Mậu Quý Giáp Dần
+CAN_THANG_DAN = (None, 3, 5, 7, 9, 1, 3, 5, 7, 9, 1)
+# Can của giờ Tý theo can ngày: Giáp Kỷ Giáp Tý, Ất Canh Bính Tý,
+# Bính Tân Mậu Tý, Đinh Nhâm Canh Tý, Mậu Quý Nhâm Tý
+CAN_GIO_TY = (None, 1, 3, 5, 7, 9, 1, 3, 5, 7, 9)
+
+# Giờ hoàng đạo theo chi ngày. Thanh Long khởi ở giờ Thân với ngày Tý, Ngọ,
+# giờ Tuất với ngày Sửu, Mùi,... rồi đi thuận qua Minh Đường, Thiên Hình,
+# Chu Tước, Kim Quỹ, Bảo Quang, Bạch Hổ, Ngọc Đường, Thiên Lao, Nguyên Vũ,
+# Tư Mệnh, Câu Trận; sáu giờ hoàng đạo là Thanh Long, Minh Đường, Kim Quỹ,
+# Bảo Quang, Ngọc Đường, Tư Mệnh
+GIO_HOANG_DAO = (None,) + tuple(
+    tuple(sorted((2 * (chi - 1) + 8 + k) % 12 + 1
+                 for k in (0, 1, 4, 5, 7, 10)))
+    for chi in range(1, 13))
+
+# Tứ Hóa theo can năm: saoID của sao mang Hóa lộc, Hóa quyền, Hóa khoa,
+# Hóa kỵ. An theo 10 câu của cụ Thiên Lương trong cuốn
+# Số tử vi dưới mắt khoa học
+TU_HOA = (
+    None,
+    (2, 14, 4, 5),  # Giáp: Liêm, Phá, Vũ, Dương
+    (6, 12, 1, 8),  # Ất: Cơ, Lương, Tử, Âm
+    (3, 6, 57, 2),  # Bính: Đồng, Cơ, Xương, Liêm
+    (8, 3, 6, 10),  # Đinh: Âm, Đồng, Cơ, Cự
+    (9, 8, 62, 6),  # Mậu: Tham, Âm, Hữu bật, Cơ
+    (4, 9, 12, 58),  # Kỷ: Vũ, Tham, Lương, Khúc
+    (5, 4, 3, 8),  # Canh: Dương, Vũ, Đồng, Âm
+    (10, 5, 58, 57),  # Tân: Cự, Dương, Khúc, Xương
+    (12, 1, 7, 4),  # Nhâm: Lương, Tử, Phủ, Vũ
+    (14, 10, 8, 9),  # Quý: Phá, Cự, Âm, Tham
+)
+
+# Hành của 12 cung trên địa bàn
+HANH_CUNG = (None, "Thủy", "Thổ", "Mộc", "Mộc", "Thổ", "Hỏa",
+             "Hỏa", "Thổ", "Kim", "Kim", "Thổ", "Thủy")
+
+# Tên 12 cung chủ, theo khoảng cách tính từ cung Mệnh
+CUNG_CHU = ("Mệnh", "Phụ mẫu", "Phúc đức", "Điền trạch", "Quan lộc",
+            "Nô bộc", "Thiên di", "Tật Ách", "Tài Bạch", "Tử tức",
+            "Phu thê", "Huynh đệ")
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Thống kê lá số trên toàn bộ một khoảng ngày sinh (chạy offline).
+
+Mỗi ngày dương lịch trong khoảng cho 24 lá số (12 chi giờ sinh x 2 giới
+tính), được an sao theo lô bằng vectorized.anSao_batch. Các lá số chỉ đi
+qua bộ nhớ theo từng phần SO_NGAY_MOT_PHAN ngày; mỗi tiến trình cộng dồn
+vào ba mảng NumPy:
+
+    chinhTinhMenh   (15,)            số lá số có chính tinh 1..14 ở cung
+                                     Mệnh, ô 0 là Mệnh vô chính diệu
+    dacTinh         (SO_SAO, 6)      số lần sao đóng ở cung có đặc tính
+                                     M, V, Đ, B, H hoặc không có đặc tính
+    cucTheoThapKy   (số thập kỷ, 5)  số lá số theo Cục (2..6), chia theo
+                                     thập kỷ năm sinh dương lịch
+
+Khi có trọng số (số người dùng sinh vào mỗi ngày), trọng số một ngày được
+chia đều cho 24 lá số của ngày đó, ngày không có trọng số được bỏ qua, và
+các mảng là số thực.
+
+    python -m lasotuvi.thongke out/ --from 1950-01-01 --to 2009-12-31 \\
+        --workers 8 [--weights users.csv] [--format csv|parquet]
+
+File trọng số là CSV có cột birth_date (YYYY-MM-DD) và cột count tùy
+chọn; thiếu cột count thì mỗi dòng là một người. Định dạng parquet cần
+pyarrow.
+"""
+import argparse
+import csv
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from lasotuvi import engine
+from lasotuvi.AmDuong import NGU_HANH
+from lasotuvi.Lich_HND import jdFromDate, jdToDate
+from lasotuvi.Sao import SAO_THEO_ID
+from lasotuvi.tables import DAC_TINH, SO_SAO
+from lasotuvi.vectorized import S2L_batch, anSao_batch, jdToDate_batch
+
+SO_NGAY_MOT_PHAN = 366
+SO_GIO, SO_GIOI_TINH = 12, 2
+SO_LA_SO_MOT_NGAY = SO_GIO * SO_GIOI_TINH
+SO_CHINH_TINH = 14
+DAC_TINH_TEN = ("M", "V", "Đ", "B", "H", None)
+CUC = (2, 3, 4, 5, 6)
+TEN_CUC = {hanh['cuc']: hanh['tenCuc'] for hanh in NGU_HANH if hanh}
+
+ThongKe = namedtuple('ThongKe', ['tuNgay', 'denNgay', 'thapKyDau',
+                                 'chinhTinhMenh', 'dacTinh',
+                                 'cucTheoThapKy'])
+ThongKe.__doc__ = """Kết quả thống kê; tuNgay, denNgay là số ngày Julius,
+thapKyDau là năm đầu của thập kỷ ứng với hàng 0 của cucTheoThapKy."""
+
+_loaiDacTinh = []
+
+
+def _bangLoaiDacTinh():
+    # Loại đặc tính (chỉ số trong DAC_TINH_TEN) theo chiSoDacTinh
+    if not _loaiDacTinh:
+        _loaiDacTinh.append(np.asarray(
+            [DAC_TINH_TEN.index(v) for v in DAC_TINH], dtype=np.int64))
+    return _loaiDacTinh[0]
+
+
+def _thongKePhan(jdDau, jdCuoi, thapKyDau, soThapKy, trongSo=None,
+                 timeZone=7):
+    # Một phần của khoảng ngày, chạy trong tiến trình con
+    jd = np.arange(jdDau, jdCuoi + 1)
+    if trongSo is not None:
+        coNguoi = trongSo > 0
+        jd, trongSo = jd[coNguoi], trongSo[coNguoi]
+    nn, tt, nnnn = jdToDate_batch(jd)
+    ngayAm, thangAm, namAm, _ = S2L_batch(nn, tt, nnnn, timeZone)
+    lap = SO_LA_SO_MOT_NGAY
+    o = anSao_batch(np.repeat(ngayAm, lap), np.repeat(thangAm, lap),
+                    np.repeat((namAm + 6) % 10 + 1, lap),
+                    np.repeat((namAm + 8) % 12 + 1, lap),
+                    np.tile(np.repeat(np.arange(1, SO_GIO + 1),
+                                      SO_GIOI_TINH), len(jd)),
+                    np.tile((1, -1), SO_GIO * len(jd)))
+    w = None if trongSo is None else np.repeat(trongSo / lap, lap)
+
+    trongMenh = o[1:SO_CHINH_TINH + 1] == o[engine.MENH]
+    sao, cot = np.nonzero(trongMenh)
+    voChinhDieu = np.flatnonzero(~trongMenh.any(axis=0))
+    chinhTinhMenh = np.bincount(
+        np.concatenate((sao + 1, np.zeros(len(voChinhDieu), np.int64))),
+        None if w is None else np.concatenate((w[cot], w[voChinhDieu])),
+        minlength=SO_CHINH_TINH + 1)
+
+    viTri = o[:SO_SAO]
+    sao, cot = np.nonzero(viTri)
+    loai = _bangLoaiDacTinh()[sao * 13 + viTri[sao, cot]]
+    dacTinh = np.bincount(sao * len(DAC_TINH_TEN) + loai,
+                          None if w is None else w[cot],
+                          minlength=SO_SAO * len(DAC_TINH_TEN))
+
+    thapKy = np.repeat(nnnn // 10 - thapKyDau // 10, lap)
+    cuc = np.bincount(thapKy * len(CUC) + o[engine.CUC] - CUC[0], w,
+                      minlength=soThapKy * len(CUC))
+    return (chinhTinhMenh, dacTinh.reshape(SO_SAO, len(DAC_TINH_TEN)),
+            cuc.reshape(soThapKy, len(CUC)))
+
+
+def thongKe(tuNgay, denNgay, workers=None, trongSo=None, timeZone=7):
+    """Thống kê mọi lá số sinh trong khoảng [tuNgay, denNgay]
+
+    Args:
+        tuNgay, denNgay (int): Số ngày Julius của ngày đầu và ngày cuối
+        workers (int, optional): Số tiến trình, mặc định theo số CPU; 1 thì
+            chạy ngay trong tiến trình hiện tại
+        trongSo (array, optional): Trọng số của từng ngày trong khoảng, dài
+            denNgay - tuNgay + 1, ví dụ từ docTrongSo
+
+    Returns:
+        ThongKe
+    """
+    if denNgay < tuNgay:
+        raise Exception("Ngày cuối phải sau ngày đầu")
+    if trongSo is not None:
+        trongSo = np.asarray(trongSo, dtype=np.float64)
+        if trongSo.shape != (denNgay - tuNgay + 1,):
+            raise Exception("Trọng số phải có đúng một giá trị mỗi ngày")
+    thapKyDau = jdToDate(tuNgay)[2] // 10 * 10
+    soThapKy = jdToDate(denNgay)[2] // 10 - thapKyDau // 10 + 1
+    phan = [(dau, min(dau + SO_NGAY_MOT_PHAN - 1, denNgay), thapKyDau,
+             soThapKy, None if trongSo is None else
+             trongSo[dau - tuNgay:dau - tuNgay + SO_NGAY_MOT_PHAN], timeZone)
+            for dau in range(tuNgay, denNgay + 1, SO_NGAY_MOT_PHAN)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(phan) <= 1:
+        ketQua = (_thongKePhan(*p) for p in phan)
+        return ThongKe(tuNgay, denNgay, thapKyDau,
+                       *(sum(m) for m in zip(*ketQua)))
+    with ProcessPoolExecutor(min(workers, len(phan))) as executor:
+        ketQua = executor.map(_thongKePhan, *zip(*phan))
+        tong = [sum(m) for m in zip(*ketQua)]
+    return ThongKe(tuNgay, denNgay, thapKyDau, *tong)
+
+
+def _docNgay(s):
+    # YYYY-MM-DD thành số ngày Julius
+    try:
+        nnnn, tt, nn = (int(v) for v in s.strip().split('-'))
+    except ValueError:
+        raise Exception("Ngày phải có dạng YYYY-MM-DD: %r" % s)
+    return jdFromDate(nn, tt, nnnn)
+
+
+def docTrongSo(path, tuNgay, denNgay):
+    """Đọc file CSV người dùng (birth_date[, count]) thành trọng số từng
+    ngày trong khoảng [tuNgay, denNgay]; ngày sinh ngoài khoảng bị bỏ qua"""
+    trongSo = np.zeros(denNgay - tuNgay + 1, dtype=np.float64)
+    with open(path, newline='', encoding='utf-8') as f:
+        for dong in csv.DictReader(f):
+            jd = _docNgay(dong['birth_date'])
+            if tuNgay <= jd <= denNgay:
+                trongSo[jd - tuNgay] += float(dong.get('count') or 1)
+    return trongSo
+
+
+def bang(ketQua):
+    """Các bảng kết quả dạng dòng, theo tên bảng
+
+    Returns:
+        dict: tên bảng -> (tên cột, list dòng)
+    """
+    chinhTinh = [(0, "Vô chính diệu", ketQua.chinhTinhMenh[0].item())]
+    chinhTinh += [(saoID, SAO_THEO_ID[saoID]['saoTen'],
+                   ketQua.chinhTinhMenh[saoID].item())
+                  for saoID in range(1, SO_CHINH_TINH + 1)]
+    dacTinh = [(saoID, SAO_THEO_ID[saoID]['saoTen'], ten or "",
+                ketQua.dacTinh[saoID, i].item())
+               for saoID in range(1, SO_SAO) if ketQua.dacTinh[saoID].any()
+               for i, ten in enumerate(DAC_TINH_TEN)]
+    cuc = [(ketQua.thapKyDau + 10 * k, TEN_CUC[so],
+            ketQua.cucTheoThapKy[k, i].item())
+           for k in range(len(ketQua.cucTheoThapKy))
+           for i, so in enumerate(CUC)]
+    return {
+        'chinh_tinh_menh': (('sao_id', 'sao', 'count'), chinhTinh),
+        'dac_tinh': (('sao_id', 'sao', 'dac_tinh', 'count'), dacTinh),
+        'cuc_theo_thap_ky': (('decade', 'cuc', 'count'), cuc),
+    }
+
+
+def ghiThongKe(ketQua, thuMuc, dinhDang='csv'):
+    """Ghi các bảng của ThongKe vào thuMuc, mỗi bảng một file
+
+    Returns:
+        list: Đường dẫn các file đã ghi
+    """
+    if dinhDang not in ('csv', 'parquet'):
+        raise Exception("Định dạng phải là csv hoặc parquet")
+    if dinhDang == 'parquet':
+        # pyarrow chỉ cần khi ghi parquet
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise Exception("Ghi parquet cần cài pyarrow")
+    os.makedirs(thuMuc, exist_ok=True)
+    files = []
+    for ten, (cot, dong) in bang(ketQua).items():
+        path = os.path.join(thuMuc, "%s.%s" % (ten, dinhDang))
+        if dinhDang == 'csv':
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(cot)
+                writer.writerows(dong)
+        else:
+            pq.write_table(pa.Table.from_pydict(
+                dict(zip(cot, map(list, zip(*dong))))), path)
+        files.append(path)
+    return files
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Thống kê lá số Tử Vi")
+    parser.add_argument('path', help="Thư mục kết quả")
+    parser.add_argument('--from', dest='tuNgay', required=True,
+                        help="Ngày sinh đầu, YYYY-MM-DD")
+    parser.add_argument('--to', dest='denNgay', required=True,
+                        help="Ngày sinh cuối, YYYY-MM-DD")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--weights', default=None,
+                        help="CSV người dùng: birth_date[, count]")
+    parser.add_argument('--format', choices=('csv', 'parquet'),
+                        default='csv')
+    args = parser.parse_args()
+    tuNgay, denNgay = _docNgay(args.tuNgay), _docNgay(args.denNgay)
+    trongSo = None
+    if args.weights:
+        trongSo = docTrongSo(args.weights, tuNgay, denNgay)
+    ketQua = thongKe(tuNgay, denNgay, args.workers, trongSo)
+    for path in ghiThongKe(ketQua, args.path, args.format):
+        print(path)
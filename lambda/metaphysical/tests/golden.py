@@ -0,0 +1,137 @@
+"""Golden corpus of Tử Vi charts, 1900-2100, every hour, both genders.
+
+Each line of tests/data/golden_charts.tsv.gz holds one birth input, a tab
+and its canonical chart serialization (see canonical_chart), so a failing
+chart shows which palace or star moved. Every year contributes the eve of
+Tết and Tết itself, the days on both edges of its leap month when it has
+one, and one further day spread through the year (see corpus_inputs).
+
+The corpus was generated through batch.lapLaSo, i.e. the rule-table
+engine (lasotuvi.engine, via App.lapDiaBan) and lapThienBan. It was
+cross-checked against the original hand-written lapDiaBan / lapThienBan
+of baseline commit 33b0b11, run from freshly imported modules for every
+chart: all charts match except the ones born in lunar month 8/1900, where
+the lunar-table change corrected the baseline's leap month (lunar 8/1900,
+not leap 7). Any later change to the engine must reproduce the corpus bit
+for bit.
+
+Regenerate (only when the expected output changes on purpose):
+
+    python -m tests.golden --write
+"""
+import argparse
+import gzip
+import json
+import os
+
+from lasotuvi.batch import lapLaSo
+from lasotuvi.Lich_HND import LunarYear, jdToDate
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'data',
+                           'golden_charts.tsv.gz')
+FIRST_YEAR, LAST_YEAR = 1900, 2100
+
+# lapThienBan attributes that depend on the wall clock or the caller
+_SKIPPED = ('today', 'ten')
+
+
+def corpus_days(year):
+    """Solar (day, month, year) dates of the corpus for one year, sorted"""
+    lunarYear = LunarYear(year)
+    tet = lunarYear.monthStarts[0]
+    jds = {tet - 1, tet}
+    if lunarYear.leapMonth:
+        i = lunarYear.lunarLeaps.index(1)
+        leapStart, leapEnd = lunarYear.monthStarts[i:i + 2]
+        jds.update((leapStart - 1, leapStart, leapEnd - 1, leapEnd))
+    days = {tuple(jdToDate(jd)) for jd in jds}
+    days.add((1 + (year * 7) % 28, 1 + (year * 5) % 12, year))
+    return sorted((d for d in days if FIRST_YEAR <= d[2] <= LAST_YEAR),
+                  key=lambda d: d[::-1])
+
+
+def corpus_inputs():
+    """(day, month, year, chi hour, gender) for the corpus, in file order"""
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        for day, month, solarYear in corpus_days(year):
+            for gio in range(1, 13):
+                for gioiTinh in (1, -1):
+                    yield day, month, solarYear, gio, gioiTinh
+
+
+def canonical_chart(db, tb):
+    """One-line JSON serialization of a (diaBan, lapThienBan) pair"""
+    thienBan = {}
+    for key, value in sorted(vars(tb).items()):
+        if key in _SKIPPED:
+            continue
+        thienBan[key] = value['id'] if isinstance(value, dict) else value
+    palaces = []
+    for cung in db.thapNhiCung[1:]:
+        flags = ("T" if cung.cungThan else "") \
+            + ("u" if getattr(cung, 'tuanTrung', False) else "") \
+            + ("r" if getattr(cung, 'trietLo', False) else "")
+        stars = " ".join("%d%s" % (sao.saoID, sao.saoDacTinh or "")
+                         for sao in cung.cungSao)
+        palaces.append("%d %s %d %s %s:%s" % (
+            cung.cungSo, cung.cungChu, cung.cungDaiHan, cung.cungTieuHan,
+            flags, stars))
+    return json.dumps([thienBan, palaces], ensure_ascii=False,
+                      separators=(',', ':'))
+
+
+def chart_line(record):
+    db, tb = lapLaSo(tuple(record) + ("",))
+    return canonical_chart(db, tb)
+
+
+def chart_differences(expected, actual):
+    """Readable differences between two canonical_chart lines"""
+    (expectedBan, expectedCung), (actualBan, actualCung) = \
+        json.loads(expected), json.loads(actual)
+    for key in sorted(set(expectedBan) | set(actualBan)):
+        if expectedBan.get(key) != actualBan.get(key):
+            yield "%s: %r != %r" % (key, expectedBan.get(key),
+                                    actualBan.get(key))
+    for cung, (old, new) in enumerate(zip(expectedCung, actualCung), 1):
+        if old != new:
+            yield "cung %d: %s != %s" % (cung, old, new)
+
+
+def read_corpus(path=CORPUS_PATH):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            fields, chart = line.rstrip("\n").split("\t")
+            yield tuple(int(v) for v in fields.split()), chart
+
+
+def write_corpus(path=CORPUS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.GzipFile(path, 'wb', mtime=0) as raw:
+        for record in corpus_inputs():
+            raw.write(("%d %d %d %d %d\t%s\n"
+                       % (record + (chart_line(record),))).encode('utf-8'))
+
+
+def mismatches(path=CORPUS_PATH):
+    """(input, differences) for every chart that no longer matches"""
+    for record, expected in read_corpus(path):
+        actual = chart_line(record)
+        if actual != expected:
+            yield record, list(chart_differences(expected, actual))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--write', action='store_true',
+                        help="Regenerate the corpus from the current code")
+    args = parser.parse_args()
+    if args.write:
+        write_corpus()
+    else:
+        bad = list(mismatches())
+        for record, differences in bad[:10]:
+            print(record)
+            for difference in differences:
+                print("    " + difference)
+        print("%d mismatching charts" % len(bad))
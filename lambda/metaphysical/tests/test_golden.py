@@ -0,0 +1,8 @@
+from tests import golden
+
+
+def test_golden_corpus():
+    """Mọi lá số 1900-2100 trong corpus phải giữ nguyên từng bit"""
+    bad = list(golden.mismatches())
+    assert not bad, "%d charts changed, first %r:\n%s" % (
+        len(bad), bad[0][0], "\n".join(bad[0][1]))
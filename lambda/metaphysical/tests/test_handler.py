@@ -29,6 +29,7 @@ with patch('boto3.client'), patch('boto3.resource'):
 # 2. HELPER FUNCTIONS & FIXTURES
 # =============================================================================
 
+
 def create_bedrock_stream(text_content):
     """
     Tạo giả lập StreamingBody của AWS bằng io.BytesIO.
@@ -47,6 +48,7 @@ def create_bedrock_stream(text_content):
     body_bytes = json.dumps(mock_response_data).encode('utf-8')
     return io.BytesIO(body_bytes)
 
+
 @pytest.fixture
 def mock_clients():
     """Fixture để kiểm soát Bedrock Client và DynamoDB Table"""
@@ -60,6 +62,7 @@ def mock_clients():
     
     return {"bedrock": mock_bedrock, "table": mock_table}
 
+
 @pytest.fixture
 def mock_lasotuvi_lib():
     """Fixture giả lập thư viện Tử Vi để không cần cài đặt thư viện thật"""
@@ -102,6 +105,7 @@ def mock_lasotuvi_lib():
 # 3. TEST CASES
 # =============================================================================
 
+
 def test_handle_horoscope_tuvi(mock_clients, mock_lasotuvi_lib):
     """Test logic Tử Vi (Horoscope)"""
     bedrock = mock_clients['bedrock']
@@ -129,8 +133,11 @@ def test_handle_horoscope_tuvi(mock_clients, mock_lasotuvi_lib):
     assert 'answer' in res_body
     # Kiểm tra dữ liệu từ Mock Tử Vi có được dùng không
     assert res_body['answer']['summary']['ban_menh'] == "Lộ Bàng Thổ"
+    assert res_body['answer']['summary']['bat_tu'] == \
+        "Kỷ Tỵ, Bính Tý, Bính Dần, Quý Tỵ"
     assert "Luận giải" in res_body['answer']['analysis']
 
+
 def test_handle_tarot_reading(mock_clients):
     """Test logic Tarot"""
     bedrock = mock_clients['bedrock']
@@ -156,6 +163,7 @@ def test_handle_tarot_reading(mock_clients):
     res_body = json.loads(response['body'])
     assert "The Sun" in res_body['answer']
 
+
 def test_handle_astrology(mock_clients):
     """Test logic Chiêm tinh (Astrology)"""
     bedrock = mock_clients['bedrock']
@@ -179,6 +187,7 @@ def test_handle_astrology(mock_clients):
     # Assert này đảm bảo code chạy hết flow
     assert res_body['domain'] == 'astrology'
 
+
 def test_handle_numerology(mock_clients):
     """Test logic Thần số học"""
     bedrock = mock_clients['bedrock']
@@ -200,6 +209,7 @@ def test_handle_numerology(mock_clients):
     res_body = json.loads(response['body'])
     assert res_body['domain'] == 'numerology'
 
+
 def test_missing_domain():
     """Test validation khi thiếu domain"""
     body = {"user_context": {}} # Thiếu key domain
@@ -211,6 +221,7 @@ def test_missing_domain():
     res_body = json.loads(response['body'])
     assert "error" in res_body
 
+
 def test_invalid_domain_value():
     """Test domain không hỗ trợ"""
     body = {"domain": "unknown_magic"}
@@ -218,4 +229,115 @@ def test_invalid_domain_value():
     response = lambda_function.lambda_handler(body, None)
     
     assert response['statusCode'] == 400
-    assert "Invalid domain" in response['body']
\ No newline at end of file
+    assert "Invalid domain" in response['body']
+
+
+def test_handle_astrology_love_adds_tuvi_compatibility(mock_clients):
+    """Tính năng love có thêm phần hợp tuổi Tử Vi vào ngữ cảnh"""
+    mock_clients['bedrock'].invoke_model.return_value = {'body': create_bedrock_stream("Hai bạn khá hợp.")}
+    mock_clients['table'].get_item.return_value = {
+        'Item': {'contexts': json.dumps({'cung-hop': 'Kim Ngưu'})}
+    }
+
+    body = {
+        "domain": "astrology",
+        "feature_type": "love",
+        "user_context": {"birth_date": "01-01-1990", "gender": "male"},
+        "partner_context": {"birth_date": "15-08-1992", "gender": "female"}
+    }
+
+    with patch.object(lambda_function, 'get_astrology_prompt', return_value="prompt") as get_prompt:
+        response = lambda_function.lambda_handler(body, None)
+
+    assert response['statusCode'] == 200
+    context = get_prompt.call_args[0][3]
+    assert "HỢP TUỔI THEO TỬ VI" in context
+    assert "Nạp âm:" in context
+
+
+def test_calendar_month_grid(mock_clients):
+    """Lịch vạn niên: lưới tháng không gọi LLM, không đọc DynamoDB"""
+    body = {"domain": "calendar", "month": 2, "year": 2024}
+
+    response = lambda_function.lambda_handler(body, None)
+
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'] == '"calendar:v1:2024-02"'
+    answer = json.loads(response['body'])['answer']
+    days = answer['days']
+    assert len(days) == 35 and days[0]['date'] == "2024-01-29"
+    assert sum(day['in_month'] for day in days) == 29
+    tet = next(day for day in days if day['date'] == "2024-02-10")
+    assert tet['lunar'] == {"day": 1, "month": 1, "year": 2024, "leap": False}
+    assert tet['can_chi_ngay'] == "Giáp Thìn"
+    assert len(tet['gio_hoang_dao']) == len(tet['gio_hac_dao']) == 6
+    lap_xuan = next(day for day in days if day['vao_tiet'])
+    assert (lap_xuan['date'], lap_xuan['tiet_khi']) == ("2024-02-04", "Lập xuân")
+    mock_clients['bedrock'].invoke_model.assert_not_called()
+    mock_clients['table'].get_item.assert_not_called()
+
+    bad = lambda_function.lambda_handler({"domain": "calendar", "month": 13}, None)
+    assert "error" in json.loads(bad['body'])['answer']
+
+
+def test_calendar_good_days(mock_clients):
+    """Xem ngày tốt: top ngày theo tuổi, kèm lý do, không gọi LLM"""
+    body = {
+        "domain": "calendar",
+        "feature_type": "good_days",
+        "start_date": "2024-02-01",
+        "days": 60,
+        "limit": 5,
+        "user_context": {"birth_date": "1990-05-15"}
+    }
+
+    response = lambda_function.lambda_handler(body, None)
+
+    assert response['statusCode'] == 200
+    answer = json.loads(response['body'])['answer']
+    assert answer['tuoi'] == "Canh Ngọ"
+    assert (answer['from'], answer['to']) == ("2024-02-01", "2024-03-31")
+    days = answer['days']
+    assert len(days) == 5
+    assert [day['score'] for day in days] == sorted((day['score'] for day in days), reverse=True)
+    assert all(day['hoang_dao'] and day['reasons'] for day in days)
+    assert all("2024-02-01" <= day['date'] <= "2024-03-31" for day in days)
+    mock_clients['bedrock'].invoke_model.assert_not_called()
+
+    # Quanh Tết cần năm âm để đọc đúng ngày
+    assert all(day['lunar']['year'] == (2023 if day['lunar']['month'] == 12 else 2024) for day in days)
+
+    for bad_body in (dict(body, days=1000), dict(body, days=0), dict(body, limit=0)):
+        bad = lambda_function.lambda_handler(bad_body, None)
+        assert "error" in json.loads(bad['body'])['answer']
+
+
+def test_tuvi_chart_view_reads_like_board():
+    """Lá số giải mã từ JSON gọn dùng được cho các hàm đọc lá số của Lambda"""
+    from lasotuvi.batch import lapLaSo
+    from lasotuvi.serialize import fromDict
+
+    db, tb = lapLaSo((15, 8, 2000, 1, -1, "Test"))
+    chart = json.loads(json.dumps(lambda_function.encode_tuvi_chart(db, tb)))
+    view = fromDict(chart)
+
+    assert lambda_function.generate_tuvi_context_text(view.thienBan, view.diaBan) == \
+        lambda_function.generate_tuvi_context_text(tb, db)
+    assert lambda_function.extract_tuvi_metadata(view.thienBan, view.diaBan) == \
+        lambda_function.extract_tuvi_metadata(tb, db)
+    assert lambda_function.encode_tuvi_chart(None, None) is None
+
+
+def test_missing_feature_module_keeps_tuvi_chart(monkeypatch):
+    """Thiếu một module tính năng (lịch vạn niên) chỉ tắt tính năng đó, lá số Tử Vi vẫn dựng được"""
+    import importlib.util
+
+    monkeypatch.setitem(sys.modules, 'lasotuvi.lichvannien', None)
+    spec = importlib.util.spec_from_file_location('lambda_function_thieu_lich', lambda_function.__file__)
+    module = importlib.util.module_from_spec(spec)
+    with patch('boto3.client'), patch('boto3.resource'):
+        spec.loader.exec_module(module)
+
+    assert module.thangLich is None and module.jdToDate is None
+    assert module.lapDiaBan is not None and module.ngayTot is not None
+    assert "error" in module.handle_calendar({"year": 2024, "month": 2})
@@ -0,0 +1,643 @@
+import pytest
+
+from lasotuvi.AmDuong import DateFacts
+from lasotuvi.App import lapDiaBan
+from lasotuvi.DiaBan import diaBan
+from lasotuvi.ThienBan import lapThienBan
+
+BIRTHS = [
+    # ngày, tháng, năm, chi giờ sinh, giới tính
+    (1, 1, 1990, 6, 1),
+    (15, 8, 2000, 1, -1),
+    (22, 3, 2023, 12, 1),
+    (31, 12, 1899, 3, -1),
+]
+
+
+def chart_dump(db):
+    return [(cung.cungSo, getattr(cung, 'cungChu', None), cung.cungDaiHan,
+             cung.cungTieuHan, cung.cungThan,
+             getattr(cung, 'tuanTrung', False),
+             getattr(cung, 'trietLo', False),
+             [(sao['saoID'], sao['saoDacTinh']) for sao in cung.cungSao])
+            for cung in db.thapNhiCung[1:]]
+
+
+@pytest.mark.parametrize("nn, tt, nnnn, gio, gioiTinh", BIRTHS)
+def test_date_facts_match_legacy_boards(nn, tt, nnnn, gio, gioiTinh):
+    """Hai bàn dựng từ DateFacts giống hệt khi mỗi bàn tự chuyển đổi ngày"""
+    facts = DateFacts(nn, tt, nnnn, gio, timeZone=7)
+
+    legacy_db = lapDiaBan(diaBan, nn, tt, nnnn, gio, gioiTinh, True, 7)
+    facts_db = lapDiaBan(diaBan, nn, tt, nnnn, gio, gioiTinh, True, 7,
+                         dateFacts=facts)
+    assert chart_dump(facts_db) == chart_dump(legacy_db)
+
+    legacy_tb = lapThienBan(nn, tt, nnnn, gio, gioiTinh, "Test", legacy_db)
+    facts_tb = lapThienBan(nn, tt, nnnn, gio, gioiTinh, "Test", facts_db,
+                           dateFacts=facts)
+    assert vars(facts_tb) == vars(legacy_tb)
+
+
+def test_date_facts_convert_once(monkeypatch):
+    """Mỗi lá số chỉ chuyển đổi âm lịch đúng một lần"""
+    import lasotuvi.AmDuong as AmDuong
+    calls = []
+    real_s2l = AmDuong.S2L
+
+    def counting_s2l(*args, **kwargs):
+        calls.append(args)
+        return real_s2l(*args, **kwargs)
+
+    monkeypatch.setattr(AmDuong, "S2L", counting_s2l)
+    facts = DateFacts(1, 1, 1990, 6)
+    db = lapDiaBan(diaBan, 1, 1, 1990, 6, 1, True, 7, dateFacts=facts)
+    lapThienBan(1, 1, 1990, 6, 1, "Test", db, dateFacts=facts)
+    assert len(calls) == 1
+
+
+def test_chart_atlas_matches_lapDiaBan(tmp_path, monkeypatch):
+    """Địa Bàn đọc từ atlas giống hệt Địa Bàn tính trực tiếp"""
+    from lasotuvi import atlas
+
+    path = str(tmp_path / "atlas.bin")
+    signatures = []
+    with open(path, "wb") as f:
+        recordSize = atlas.writeHeader(f, atlas.thuTuSao())
+        f.truncate(atlas.HEADER_SIZE + atlas.SO_LA_SO * recordSize)
+        for nn, tt, nnnn, gio, gioiTinh in BIRTHS:
+            facts = DateFacts(nn, tt, nnnn, gio)
+            signature = (facts.ngayAm, facts.thangAm, facts.canNam,
+                         facts.chiNam, gio, gioiTinh)
+            f.seek(atlas.HEADER_SIZE
+                   + atlas.recordIndex(*signature) * recordSize)
+            f.write(atlas.encodeRecord(*signature)[1])
+            signatures.append(signature)
+
+    chart_atlas = atlas.ChartAtlas(path)
+    for (nn, tt, nnnn, gio, gioiTinh), signature in zip(BIRTHS, signatures):
+        expected = chart_dump(lapDiaBan(diaBan, nn, tt, nnnn, gio, gioiTinh,
+                                        True, 7))
+        assert chart_dump(chart_atlas.lapDiaBan(diaBan, *signature)) == \
+            expected
+
+    with pytest.raises(KeyError):
+        chart_atlas.lapDiaBan(diaBan, 30, 12, 10, 12, 12, -1)
+
+    # lapDiaBan theo TUVI_ATLAS_PATH tính lại lá số atlas dựng dở chưa có
+    monkeypatch.setattr(atlas, '_atlas', chart_atlas)
+    for nn, tt, nnnn, gio, gioiTinh in BIRTHS + [(2, 2, 1990, 5, -1)]:
+        facts = DateFacts(nn, tt, nnnn, gio)
+        expected = chart_dump(lapDiaBan(diaBan, nn, tt, nnnn, gio, gioiTinh,
+                                        True, 7))
+        assert chart_dump(atlas.lapDiaBan(diaBan, nn, tt, nnnn, gio,
+                                          gioiTinh, True, 7)) == expected
+        assert chart_dump(atlas.lapDiaBan(diaBan, nn, tt, nnnn, gio,
+                                          gioiTinh, True, 7,
+                                          dateFacts=facts)) == expected
+
+
+def test_pattern_detection_matches_board(tmp_path):
+    """Cách cục trên lá số bitset, bản NumPy và atlas khớp với việc đếm sao
+    trực tiếp trên Địa Bàn"""
+    import numpy as np
+    from lasotuvi import atlas, engine
+    from lasotuvi.bitset import LaSoBit
+    from lasotuvi.cachcuc import CACH_CUC, VUNG_CUNG, timCachCuc
+    from lasotuvi.tables import SO_SAO
+    from lasotuvi.vectorized import (anSao_batch, cachCuc_batch,
+                                     viTriSaoAtlas)
+
+    def khop(db, cc):
+        for vung, mask, toiThieu, toiDa in cc.dieuKien:
+            dem = sum(1 for cungSo in VUNG_CUNG[db.cungMenh][vung]
+                      for sao in db.thapNhiCung[cungSo].cungSao
+                      if mask >> sao['saoID'] & 1)
+            if not toiThieu <= dem <= toiDa:
+                return False
+        return all(cungMask >> cungSo & 1
+                   for saoID, cungMask in cc.viTri
+                   for cungSo in range(1, 13)
+                   for sao in db.thapNhiCung[cungSo].cungSao
+                   if sao['saoID'] == saoID)
+
+    signatures = list(_signatures(499))
+    o = anSao_batch(*np.array(signatures).T)
+    batch = cachCuc_batch(o[:SO_SAO], o[engine.MENH])
+    found = set()
+    for i, signature in enumerate(signatures):
+        db = engine.lapDiaBan(diaBan, *signature)
+        expected = [cc for cc in CACH_CUC if khop(db, cc)]
+        assert timCachCuc(LaSoBit.tuDiaBan(db)) == expected
+        assert [cc for j, cc in enumerate(CACH_CUC) if batch[j, i]] == \
+            expected
+        found.update(cc.ten for cc in expected)
+    assert found == {cc.ten for cc in CACH_CUC}
+
+    path = str(tmp_path / "atlas.bin")
+    with open(path, "wb") as f:
+        recordSize = atlas.writeHeader(f, atlas.thuTuSao())
+        f.truncate(atlas.HEADER_SIZE + atlas.SO_LA_SO * recordSize)
+        for signature in signatures[:50]:
+            f.seek(atlas.HEADER_SIZE
+                   + atlas.recordIndex(*signature) * recordSize)
+            f.write(atlas.encodeRecord(*signature)[1])
+    chart_atlas = atlas.ChartAtlas(path)
+    viTriSao, cungMenh = viTriSaoAtlas(chart_atlas)
+    khopAtlas = cachCuc_batch(viTriSao, cungMenh)
+    assert khopAtlas.sum() == batch[:, :50].sum()
+    for i, signature in enumerate(signatures[:50]):
+        laSo = chart_atlas.laSoBit(*signature)
+        assert laSo == LaSoBit.tuDiaBan(engine.lapDiaBan(diaBan, *signature))
+        assert (khopAtlas[:, atlas.recordIndex(*signature)]
+                == batch[:, i]).all()
+
+
+def test_star_placements_are_per_chart():
+    """Dựng lá số không còn sửa các đối tượng Sao dùng chung"""
+    from lasotuvi import Sao
+    from lasotuvi.Sao import SAO_THEO_ID, SaoCung
+
+    db = lapDiaBan(diaBan, 1, 1, 1990, 6, 1, True, 7)
+    assert all(sao.saoDacTinh is None for sao in vars(Sao).values()
+               if isinstance(sao, Sao.Sao))
+
+    tuVi = next(sao for cung in db.thapNhiCung for sao in cung.cungSao
+                if sao.saoID == 1)
+    assert isinstance(tuVi, SaoCung)
+    assert tuVi['saoTen'] == "Tử vi" and tuVi.get('saoLoai') == 1
+    assert tuVi.get('khongCo') is None
+    assert tuVi in db.thapNhiCung[tuVi.cungSo].cungSao
+    with pytest.raises(AttributeError):
+        tuVi.saoDacTinh = "M"
+    with pytest.raises(TypeError):
+        SAO_THEO_ID[1]['saoTen'] = "Tử vi"
+
+
+def test_charts_build_concurrently():
+    """Các lá số dựng song song trên nhiều luồng không ảnh hưởng nhau"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def build(birth):
+        nn, tt, nnnn, gio, gioiTinh = birth
+        return chart_dump(lapDiaBan(diaBan, nn, tt, nnnn, gio, gioiTinh,
+                                    True, 7))
+
+    expected = [build(birth) for birth in BIRTHS]
+    with ThreadPoolExecutor(4) as executor:
+        assert list(executor.map(build, BIRTHS * 8)) == expected * 8
+
+
+def test_chart_cache_shares_charts_through_store():
+    """Lá số trong bộ nhớ đệm giống lapDiaBan; dịch vụ khác đọc lại từ kho"""
+    from lasotuvi import chartcache
+    from lasotuvi.App import lapLaSo
+
+    class Kho(object):
+        def __init__(self):
+            self.duLieu = {}
+
+        def get(self, key):
+            return self.duLieu.get(key)
+
+        def put(self, key, data):
+            self.duLieu[key] = data
+
+    kho = Kho()
+    metaphysical = chartcache.ChartCache(kho, maxsize=2)
+    for nn, tt, nnnn, gio, gioiTinh in BIRTHS:
+        facts = DateFacts(nn, tt, nnnn, gio, timeZone=7)
+        sig = chartcache.canonicalSignature(nn, tt, nnnn, gio, gioiTinh)
+        assert sig == (facts.ngayAm, facts.thangAm, facts.canNam,
+                       facts.chiNam, gio, gioiTinh)
+        assert chart_dump(metaphysical.lapDiaBan(diaBan, sig)) == chart_dump(
+            lapDiaBan(diaBan, nn, tt, nnnn, gio, gioiTinh, True, 7))
+        assert metaphysical.lapLaSo(sig).palace("Mệnh") \
+            == lapLaSo(nn, tt, nnnn, gio, gioiTinh, True, 7).palace("Mệnh")
+    assert len(kho.duLieu) == len(BIRTHS)
+    assert all(len(data) == 132 for data in kho.duLieu.values())
+    assert metaphysical.stats() == {'hits': 4, 'storeHits': 0, 'misses': 4,
+                                    'size': 2}
+
+    chatbot = chartcache.ChartCache(kho)
+    sig = chartcache.canonicalSignature(*BIRTHS[0])
+    assert chatbot.anSao(sig) == chatbot.anSao(sig)
+    assert chatbot.stats() == {'hits': 1, 'storeHits': 1, 'misses': 0,
+                               'size': 1}
+
+    # Kho lỗi thì tính lại, không làm hỏng yêu cầu
+    kho.get = kho.put = None
+    assert chartcache.ChartCache(kho).anSao(sig) == chatbot.anSao(sig)
+    with pytest.raises(Exception):
+        chartcache.canonicalSignature(1, 1, 1990, 13, 1)
+
+
+@pytest.mark.parametrize("nn, tt, nnnn, gio, gioiTinh", BIRTHS)
+def test_serialized_chart_round_trip(nn, tt, nnnn, gio, gioiTinh):
+    """JSON gọn và nhị phân giải mã ra view chỉ đọc giống hệt lá số gốc"""
+    from lasotuvi import serialize
+    from lasotuvi.batch import lapLaSo
+
+    db, tb = lapLaSo((nn, tt, nnnn, gio, gioiTinh, "Thử"))
+    for encode, decode in ((serialize.encodeJSON, serialize.decodeJSON),
+                           (serialize.encodeBinary, serialize.decodeBinary)):
+        view = decode(encode(db, tb))
+        assert chart_dump(view.diaBan) == chart_dump(db)
+        assert view.diaBan.cungMenh == db.cungMenh
+        assert view.diaBan.cungThan == db.cungThan
+        assert view.thienBan._asdict() == vars(tb)
+        assert decode(encode(db)).thienBan is None
+        with pytest.raises(AttributeError):
+            view.diaBan.thapNhiCung[1].cungDaiHan = 0
+    assert len(serialize.encodeBinary(db, tb)) < 256
+    with pytest.raises(Exception):
+        serialize.fromDict(dict(serialize.toDict(db), v=0))
+
+
+def test_lookup_tables():
+    """Các hàm tra cứu đọc đúng từ lasotuvi.tables"""
+    from lasotuvi.AmDuong import nguHanh, nguHanhNapAm, timTriet
+    from lasotuvi.DiaBan import timDacTinh
+
+    assert nguHanhNapAm(1, 1) == "K"
+    assert nguHanhNapAm(1, 1, True) == "HẢI TRUNG KIM"
+    assert nguHanhNapAm(12, 10, True) == "ÐẠI HẢI THỦY"
+    with pytest.raises(Exception):
+        nguHanhNapAm(1, 2)
+    assert nguHanh("Thuy")["cuc"] == 2
+    with pytest.raises(Exception):
+        nguHanh("X")
+    assert timTriet(6) == (9, 10)
+    assert timDacTinh(1, 1) == "B"
+    assert timDacTinh(95, 1) is None
+    assert timDacTinh(7, 1) is None
+
+
+# sha256 của các bản ghi atlas lấy cách 97 lá số một, tính bằng
+# App.lapDiaBan viết tay trước khi chuyển sang lasotuvi.engine
+GOLDEN_RECORDS_SHA256 = \
+    "df6484ee4113bca10512e8bb4b88aefa029c6eeff2e49cbfa5c17f0a28b9724f"
+
+
+def _signatures(step):
+    import itertools
+    signatures = itertools.product(range(1, 31), range(1, 13), range(60),
+                                   range(1, 13), (1, -1))
+    for ngay, thang, canChi, gio, gioiTinh in \
+            itertools.islice(signatures, 0, None, step):
+        yield ngay, thang, canChi % 10 + 1, canChi % 12 + 1, gio, gioiTinh
+
+
+def test_engine_matches_legacy_lapDiaBan():
+    """Bảng quy tắc an sao cho kết quả y hệt lapDiaBan viết tay"""
+    import hashlib
+    from lasotuvi import atlas
+
+    digest = hashlib.sha256()
+    for signature in _signatures(97):
+        digest.update(atlas.encodeRecord(*signature)[1])
+    assert digest.hexdigest() == GOLDEN_RECORDS_SHA256
+
+
+def test_engine_batch_matches_scalar():
+    """anSao_batch khớp từng lá số với engine.anSao"""
+    import numpy as np
+    from lasotuvi import engine
+    from lasotuvi.vectorized import anSao_batch
+
+    signatures = list(_signatures(331))
+    o = anSao_batch(*np.array(signatures).T)
+    for i, signature in enumerate(signatures):
+        assert o[:, i].tolist() == engine.anSao(*signature)
+
+
+def test_engine_school_variant():
+    """Đổi cách an Ân Quang chỉ cần thay một bước quy tắc"""
+    from lasotuvi import engine
+    from lasotuvi.AmDuong import dichCung
+    from lasotuvi.Sao import saoAnQuang, saoThienQuy
+
+    thienLuong = engine.anSao(15, 8, 7, 5, 1, -1)
+    vuThien = engine.anSao(15, 8, 7, 5, 1, -1, engine.QUY_TAC_VU_THIEN)
+    assert vuThien[saoAnQuang.saoID] == dichCung(5, 15 + 1 - 3)
+    assert vuThien[saoThienQuy.saoID] == \
+        dichCung(2, 2 - vuThien[saoAnQuang.saoID])
+    changed = [i for i, (a, b) in enumerate(zip(thienLuong, vuThien))
+               if a != b]
+    assert set(changed) <= {saoAnQuang.saoID, saoThienQuy.saoID}
+
+
+def test_build_charts_dedupes_and_keeps_order():
+    """build_charts giữ thứ tự đầu vào, record trùng chỉ tính một lần"""
+    from lasotuvi.batch import build_charts, lapLaSo
+
+    records = BIRTHS + BIRTHS[::-1] + [BIRTHS[0] + ("Test",)]
+    expected = [chart_dump(lapLaSo(record + ("",) if len(record) == 5
+                                   else record)[0]) for record in records]
+    for workers in (1, 2):
+        charts = list(build_charts(records, workers=workers, chunksize=2))
+        assert [chart_dump(db) for db, tb in charts] == expected
+        assert charts[0] is charts[7]
+        assert charts[-1][1].ten == "Test"
+        assert charts[-1] is not charts[0]
+        # Khác tên vẫn dùng chung Địa Bàn
+        assert charts[-1][0] is charts[0][0]
+        assert charts[0][1].ten == ""
+
+    # Record được đọc dần, kể cả khi không bao giờ hết
+    def voHan():
+        while True:
+            yield from BIRTHS
+
+    for workers in (1, 2):
+        charts = build_charts(voHan(), workers=workers, chunksize=2)
+        dau = [next(charts) for _ in range(9)]
+        charts.close()
+        assert [chart_dump(db) for db, tb in dau] == expected[:4] * 2 + \
+            expected[:1]
+
+
+@pytest.mark.parametrize("nn, tt, nnnn, gio, gioiTinh", BIRTHS)
+def test_partial_chart_matches_full_board(nn, tt, nnnn, gio, gioiTinh):
+    """LaSo.palace cho đúng các sao của cung như Địa Bàn đầy đủ"""
+    from lasotuvi.App import lapLaSo
+    from lasotuvi.engine import NHOM_SAO
+    from lasotuvi.tables import CUNG_CHU
+
+    db = lapDiaBan(diaBan, nn, tt, nnnn, gio, gioiTinh, True, 7)
+    chart = lapLaSo(nn, tt, nnnn, gio, gioiTinh, True, 7)
+    for tenCung in CUNG_CHU:
+        cung = chart.palace(tenCung)
+        full = db.thapNhiCung[cung.cungSo]
+        assert full.cungChu == tenCung
+        assert cung.cungSao == full.cungSao
+        chinhTinh = chart.palace(tenCung, groups={"chinh_tinh"}).cungSao
+        assert chinhTinh == [sao for sao in full.cungSao
+                             if sao.saoID in NHOM_SAO["chinh_tinh"]]
+        assert all(sao['saoLoai'] == 1 for sao in chinhTinh)
+
+
+def test_partial_chart_is_lazy():
+    """Chỉ hỏi chính tinh cung Mệnh thì không an các sao khác"""
+    from lasotuvi.App import lapLaSo
+    from lasotuvi.Sao import saoLocTon, saoTuVi
+
+    chart = lapLaSo(15, 8, 2000, 1, -1, True, 7)
+    chart.palace("Mệnh", groups={"chinh_tinh"})
+    assert chart._o[saoTuVi.saoID] is not None
+    assert chart._o[saoLocTon.saoID] is None
+    assert list(chart._nhom) == ["chinh_tinh"]
+    with pytest.raises(Exception):
+        chart.palace("Không có")
+
+
+def test_bat_tu_pillars():
+    """Tứ trụ đổi năm, tháng theo tiết khí; ngày, giờ khớp DateFacts"""
+    from datetime import datetime
+
+    import numpy as np
+    from lasotuvi.AmDuong import canChiGio
+    from lasotuvi.Lich_HND import jdFromDate, jdToDate
+    from lasotuvi.battu import (TRU, chiGioDongHo, soThuTuTuTru, tuTru,
+                                tuTruThoiDiem)
+    from lasotuvi.vectorized import tuTru_batch
+
+    # Lập xuân Giáp Thìn 4/2/2024, Tết 10/2/2024
+    assert [tru.ten for tru in tuTru(3, 2, 2024, 1)] == \
+        ["Quý Mão", "Ất Sửu", "Đinh Dậu", "Canh Tý"]
+    assert [tru.ten for tru in tuTru(4, 2, 2024, 1)] == \
+        ["Giáp Thìn", "Bính Dần", "Mậu Tuất", "Nhâm Tý"]
+    assert tuTru(10, 2, 2024, 7).ngay.ten == "Giáp Thìn"
+    assert [chiGioDongHo(h) for h in (23, 0, 1, 12, 22)] == [1, 1, 2, 7, 12]
+    assert tuTruThoiDiem(datetime(2024, 2, 4, 0, 30)) == tuTru(4, 2, 2024, 1)
+
+    for nn, tt, nnnn, gio, _ in BIRTHS:
+        facts = DateFacts(nn, tt, nnnn, gio)
+        truNgay, truGio = tuTru(nn, tt, nnnn, gio)[2:]
+        assert (truNgay.can, truNgay.chi) == (facts.canNgay, facts.chiNgay)
+        assert [truGio.can, truGio.chi] == [facts.canGio, facts.chiGio] \
+            == canChiGio(facts.canNgay, gio)
+
+    jd = np.arange(jdFromDate(1, 1, 1790), jdFromDate(1, 1, 2210), 5)
+    dd, mm, yy = np.array([jdToDate(int(j)) for j in jd]).T
+    gio = jd % 12 + 1
+    batch = np.stack(tuTru_batch(dd, mm, yy, gio), axis=1)
+    for i in range(0, len(jd), 7):
+        pillars = soThuTuTuTru(int(dd[i]), int(mm[i]), int(yy[i]),
+                               int(gio[i]))
+        assert tuple(batch[i]) == pillars
+        nam, thang = TRU[pillars[0]], TRU[pillars[1]]
+        # Tháng Dần của năm Giáp, Kỷ là Bính Dần,...
+        assert thang.can == \
+            ((nam.can - 1) % 5 * 2 + 2 + (thang.chi - 3) % 12) % 10 + 1
+
+
+def test_bitset_chart_matches_board():
+    """Lá số bitset trả lời giống hệt Địa Bàn và ghi/đọc lại được"""
+    from lasotuvi import engine
+    from lasotuvi.bitset import (NHOM_MASK, TAM_PHUONG, LaSoBit, danhSachSao,
+                                 lapLaSoBit)
+
+    for signature in _signatures(1999):
+        db = engine.lapDiaBan(diaBan, *signature)
+        laSo = lapLaSoBit(*signature)
+        assert LaSoBit.tuDiaBan(db) == laSo
+        assert LaSoBit.fromBytes(laSo.toBytes()) == laSo
+        assert len(laSo.toBytes()) == 70
+        assert laSo.cungMenh == db.cungMenh
+        for cung in db.thapNhiCung[1:]:
+            saoIDs = [sao['saoID'] for sao in cung.cungSao]
+            assert danhSachSao(laSo.saoTrongCung(cung.cungSo)) == \
+                sorted(saoIDs)
+            assert laSo.cungChu(cung.cungSo) == cung.cungChu
+            assert laSo.cungTheoTen(cung.cungChu) == cung.cungSo
+            assert bool(laSo.co[cung.cungSo] & 2) == \
+                getattr(cung, 'tuanTrung', False)
+            for sao in cung.cungSao:
+                assert laSo.cungCuaSao(sao['saoID']) == cung.cungSo
+                assert laSo.coSao(sao['saoID'], cung.cungSo)
+                assert laSo.dacTinhSao(sao['saoID']) == sao['saoDacTinh']
+        tamPhuong = [db.thapNhiCung[c] for c in TAM_PHUONG[db.cungMenh]]
+        assert danhSachSao(laSo.tamPhuongTuChinh(db.cungMenh)
+                           & NHOM_MASK["chinh_tinh"]) == \
+            sorted(sao['saoID'] for cung in tamPhuong for sao in cung.cungSao
+                   if sao['saoID'] <= 14)
+
+
+def test_annual_overlay_matches_natal_rules():
+    """Sao lưu của một năm trùng với sao gốc của người sinh năm có cùng can
+    chi; đại hạn, tiểu hạn đúng cung trên Địa Bàn"""
+    from lasotuvi import engine
+    from lasotuvi.AmDuong import diaChi
+    from lasotuvi.atlas import canChiIndex
+    from lasotuvi.luunien import (LaSoGoc, canChiNam, dongThoiGian,
+                                  luuNien)
+
+    for ngay, thang, can, chi, gio, gioiTinh in _signatures(4999):
+        namSinh = 1984 + canChiIndex(can, chi)
+        assert canChiNam(namSinh) == (can, chi)
+        db = engine.lapDiaBan(diaBan, ngay, thang, can, chi, gio, gioiTinh)
+        goc = LaSoGoc.tuDiaBan(db, namSinh)
+        namDau = goc.namDauDaiHan(namSinh + 40)
+        thoiGian = dongThoiGian(goc, namDau)
+        assert [ln.nam for ln in thoiGian] == list(range(namDau, namDau + 10))
+        assert len({ln.daiHan for ln in thoiGian}) == 1
+        for ln in thoiGian:
+            assert ln == luuNien(goc, ln.nam)
+        for nam in range(namSinh, namSinh + 90, 7):
+            ln = luuNien(goc, nam)
+            o = engine.anSao(ngay, thang, ln.canNam, ln.chiNam, gio,
+                             gioiTinh)
+            assert (ln.thaiTue, ln.locTon, ln.kinhDuong, ln.daLa,
+                    ln.thienMa) == (o[15], o[27], o[52], o[51], o[98])
+            assert ln.tuHoa == tuple(cung.cungSo for saoID in ln.tuHoaSao
+                                     for cung in db.thapNhiCung[1:]
+                                     for sao in cung.cungSao
+                                     if sao['saoID'] == saoID)
+            daiHan = [cung.cungSo for cung in db.thapNhiCung[1:]
+                      if cung.cungDaiHan <= ln.tuoi < cung.cungDaiHan + 10]
+            assert [ln.daiHan] == (daiHan or [0])
+            assert db.thapNhiCung[ln.tieuHan].cungTieuHan == \
+                diaChi[ln.chiNam]['tenChi']
+
+
+def test_compatibility_tables_and_batch():
+    """Quan hệ tuổi tra từ bảng và bản NumPy khớp với hopTuoi"""
+    import numpy as np
+    from lasotuvi import engine, hoptuoi
+    from lasotuvi.vectorized import anSao_batch, hopTuoi_batch
+
+    # Thân Tý Thìn tam hợp, Tý Sửu lục hợp, Tý Ngọ lục xung, Tý Mùi lục
+    # hại, Giáp Kỷ can hợp, Giáp Canh can xung
+    assert hoptuoi.QUAN_HE_CHI[9][5] == hoptuoi.TAM_HOP
+    assert hoptuoi.QUAN_HE_CHI[1][2] == hoptuoi.LUC_HOP
+    assert hoptuoi.QUAN_HE_CHI[1][7] == \
+        hoptuoi.LUC_XUNG | hoptuoi.TU_HANH_XUNG
+    assert hoptuoi.QUAN_HE_CHI[8][1] == hoptuoi.LUC_HAI
+    assert hoptuoi.QUAN_HE_CAN[1][6] == hoptuoi.CAN_HOP
+    assert hoptuoi.QUAN_HE_CAN[7][1] == hoptuoi.CAN_XUNG
+    # Giáp Tý (Kim) sinh Bính Tý (Thủy)
+    giapTy = engine.anSao(1, 1, 1, 1, 1, 1)
+    binhTy = engine.anSao(1, 1, 3, 1, 1, -1)
+    assert hoptuoi.hopTuoi(giapTy, binhTy).napAm == hoptuoi.SINH_XUAT
+    assert hoptuoi.hopTuoi(binhTy, giapTy).napAm == hoptuoi.SINH_NHAP
+    # Nạp âm đối xứng: đổi chỗ hai người thì sinh / khắc đổi chiều
+    guong = {hoptuoi.BINH_HOA: hoptuoi.BINH_HOA,
+             hoptuoi.SINH_XUAT: hoptuoi.SINH_NHAP,
+             hoptuoi.SINH_NHAP: hoptuoi.SINH_XUAT,
+             hoptuoi.KHAC_XUAT: hoptuoi.KHAC_NHAP,
+             hoptuoi.KHAC_NHAP: hoptuoi.KHAC_XUAT}
+    for hanh1 in range(1, 6):
+        quanHe = [hoptuoi.NAP_AM[hanh1][hanh2] for hanh2 in range(1, 6)]
+        assert sorted(quanHe) == list(range(5))
+        for hanh2 in range(1, 6):
+            assert hoptuoi.NAP_AM[hanh2][hanh1] == \
+                guong[hoptuoi.NAP_AM[hanh1][hanh2]]
+    # Thủy khắc Hỏa
+    assert hoptuoi.NAP_AM[3][4] == hoptuoi.KHAC_XUAT
+
+    signatures = list(_signatures(997))
+    o = anSao_batch(*np.array(signatures).T)
+    for nguoi in signatures[::50]:
+        o1 = engine.anSao(*nguoi)
+        batch = hopTuoi_batch(o1, o)
+        for i, signature in enumerate(signatures):
+            ketQua = hoptuoi.hopTuoi(o1, engine.anSao(*signature))
+            assert tuple(int(v[i]) for v in batch) == ketQua
+        assert hoptuoi.moTaHopTuoi(ketQua)[-1] == "Điểm: %d" % ketQua.diem
+
+
+def test_inverted_index_counts(tmp_path):
+    """Chỉ mục ngược đếm đúng như duyệt từng lá số"""
+    from lasotuvi import engine
+    from lasotuvi.atlas import recordIndex, recordSignature
+    from lasotuvi.chimuc import SO_LA_SO_MOT_NGAY, ChiMuc, xayChiMuc
+    from lasotuvi.tables import CUNG_CHU, DAC_TINH, chiSoDacTinh
+
+    path = str(tmp_path / "index.bin")
+    xayChiMuc(path, soNgay=1)
+    chiMuc = ChiMuc(path)
+    laSo = [recordSignature(i) for i in range(SO_LA_SO_MOT_NGAY)]
+    assert [recordIndex(*s) for s in laSo] == list(range(len(laSo)))
+    o = [engine.anSao(*s) for s in laSo]
+
+    def cungChu(oi, saoID):
+        return CUNG_CHU[(oi[saoID] - oi[engine.MENH]) % 12]
+
+    # Tử Vi, Thất Sát đồng cung ở Mệnh
+    tuSat = chiMuc.sao(1, cungChu="Mệnh") & chiMuc.sao(13, cungChu="Mệnh")
+    expected = [s for s, oi in zip(laSo, o)
+                if cungChu(oi, 1) == cungChu(oi, 13) == "Mệnh"]
+    assert tuSat.dem() == len(expected) > 0
+    assert list(tuSat.laSo()) == expected
+
+    kyMenh = chiMuc.sao(95, cungChu="Mệnh") | chiMuc.sao(95, cungSo=1)
+    assert kyMenh.dem() == sum(1 for oi in o if cungChu(oi, 95) == "Mệnh"
+                               or oi[95] == 1)
+    thaiDuongSang = chiMuc.sao(5, dacTinh=("M", "V")) - tuSat
+    assert thaiDuongSang.dem() == sum(
+        1 for s, oi in zip(laSo, o) if s not in expected
+        and DAC_TINH[chiSoDacTinh(5, oi[5])] in ("M", "V"))
+    assert (~tuSat).dem() == chiMuc.tatCa().dem() - tuSat.dem()
+    # Một đặc tính dạng chuỗi, kể cả với sao có cung không đặc tính
+    assert chiMuc.sao(5, dacTinh="M").dem() == sum(
+        1 for oi in o if DAC_TINH[chiSoDacTinh(5, oi[5])] == "M")
+    assert chiMuc.sao(95, dacTinh="Đ").dem() == sum(
+        1 for oi in o if DAC_TINH[chiSoDacTinh(95, oi[95])] == "Đ") > 0
+    assert chiMuc.sao(95, dacTinh="M").dem() == 0
+
+
+def test_population_statistics(tmp_path):
+    """Thống kê theo lô khớp với an sao từng lá số, có và không trọng số"""
+    import csv
+
+    import numpy as np
+
+    from lasotuvi import engine
+    from lasotuvi.AmDuong import ngayThangNam, ngayThangNamCanChi
+    from lasotuvi.Lich_HND import jdFromDate, jdToDate
+    from lasotuvi.tables import DAC_TINH, chiSoDacTinh
+    from lasotuvi.thongke import (DAC_TINH_TEN, docTrongSo, ghiThongKe,
+                                  thongKe)
+
+    tuNgay, denNgay = jdFromDate(30, 12, 1999), jdFromDate(2, 1, 2000)
+    ketQua = thongKe(tuNgay, denNgay, workers=1)
+    chinhTinh = np.zeros(15, dtype=np.int64)
+    dacTinh = np.zeros_like(ketQua.dacTinh)
+    cuc = np.zeros((2, 5), dtype=np.int64)
+    for jd in range(tuNgay, denNgay + 1):
+        nn, tt, nnnn = jdToDate(jd)
+        ngayAm, thangAm, namAm, _ = ngayThangNam(nn, tt, nnnn, True, 7)
+        _, canNam, chiNam = ngayThangNamCanChi(ngayAm, thangAm, namAm,
+                                               False, 7)
+        for gio in range(1, 13):
+            for gioiTinh in (1, -1):
+                o = engine.anSao(ngayAm, thangAm, canNam, chiNam, gio,
+                                 gioiTinh)
+                menh = [s for s in range(1, 15) if o[s] == o[engine.MENH]]
+                chinhTinh[menh or [0]] += 1
+                for s in range(1, len(dacTinh)):
+                    if o[s]:
+                        dacTinh[s, DAC_TINH_TEN.index(
+                            DAC_TINH[chiSoDacTinh(s, o[s])])] += 1
+                cuc[nnnn // 10 - 199, o[engine.CUC] - 2] += 1
+    assert ketQua.thapKyDau == 1990
+    assert (ketQua.chinhTinhMenh == chinhTinh).all()
+    assert (ketQua.dacTinh == dacTinh).all()
+    assert (ketQua.cucTheoThapKy == cuc).all()
+    assert cuc.sum() == 4 * 24
+
+    users = tmp_path / "users.csv"
+    users.write_text("birth_date,count\n2000-01-01,3\n2000-01-01,\n"
+                     "1980-05-05,9\n")
+    trongSo = docTrongSo(str(users), tuNgay, denNgay)
+    assert trongSo.tolist() == [0, 0, 4, 0]
+    theoNguoi = thongKe(tuNgay, denNgay, workers=1, trongSo=trongSo)
+    assert theoNguoi.cucTheoThapKy.sum() == pytest.approx(4)
+    assert theoNguoi.cucTheoThapKy[0].sum() == 0
+
+    files = ghiThongKe(ketQua, str(tmp_path / "out"))
+    with open(files[2], newline='', encoding='utf-8') as f:
+        dong = list(csv.DictReader(f))
+    assert [d['decade'] for d in dong] == ['1990'] * 5 + ['2000'] * 5
+    assert sum(int(d['count']) for d in dong) == cuc.sum()
@@ -0,0 +1,234 @@
+from lasotuvi.Lich_HND import (L2S, S2L, astronomicalL2S, astronomicalS2L,
+                               getLunarTable, jdToDate)
+
+
+def test_lunar_table_matches_astronomical_every_day():
+    """Bảng âm lịch phải cho kết quả y hệt cách tính thiên văn, từng ngày một"""
+    table = getLunarTable(7)
+    for jd in range(table.month11[0], table.month11[-1]):
+        dd, mm, yy = jdToDate(jd)
+        lunar = table.S2L(jd)
+        assert lunar == astronomicalS2L(dd, mm, yy, 7), (dd, mm, yy)
+        assert 1 <= lunar[0] <= 30
+        assert table.L2S(*lunar) == astronomicalL2S(*lunar, tZ=7) \
+            == [dd, mm, yy]
+
+
+def test_known_lunar_dates():
+    """Tết Giáp Thìn 2024 và tháng 2 nhuận năm Quý Mão 2023"""
+    assert S2L(10, 2, 2024) == [1, 1, 2024, 0]
+    assert S2L(22, 3, 2023) == [1, 2, 2023, 1]
+    assert L2S(1, 2, 2023, 1) == [22, 3, 2023]
+    # Tháng nhuận không tồn tại
+    assert L2S(1, 3, 2023, 1) == [0, 0, 0]
+
+
+def test_outside_table_falls_back_to_astronomical():
+    """Ngoài phạm vi bảng vẫn dùng cách tính thiên văn"""
+    assert S2L(1, 1, 1700) == astronomicalS2L(1, 1, 1700)
+    assert S2L(1, 6, 2300) == astronomicalS2L(1, 6, 2300)
+    assert L2S(1, 1, 2300, 0) == astronomicalL2S(1, 1, 2300, 0)
+    assert L2S(*S2L(1, 6, 1750)) == [1, 6, 1750]
+
+
+def test_batch_conversions_match_scalar():
+    """S2L_batch / L2S_batch khớp từng phần tử với S2L / L2S"""
+    import numpy as np
+    from lasotuvi.vectorized import (L2S_batch, S2L_batch,
+                                     astronomicalS2L_batch, jdFromDate_batch,
+                                     jdToDate_batch)
+
+    table = getLunarTable(7)
+    jd = np.arange(table.month11[0] - 2000, table.month11[-1] + 2000)
+    dd, mm, yy = jdToDate_batch(jd)
+    assert (jdFromDate_batch(dd, mm, yy) == jd).all()
+
+    lunar = np.stack(S2L_batch(dd, mm, yy), axis=1)
+    astronomical = np.stack(astronomicalS2L_batch(dd, mm, yy), axis=1)
+    assert (lunar == astronomical).all()
+    for i in range(0, len(jd), 37):
+        assert lunar[i].tolist() == S2L(int(dd[i]), int(mm[i]), int(yy[i]))
+
+    solar = np.stack(L2S_batch(*lunar.T), axis=1)
+    assert (solar == np.stack([dd, mm, yy], axis=1)).all()
+    # Tháng nhuận không tồn tại cho 0/0/0 như bản vô hướng
+    assert np.stack(L2S_batch(1, [2, 3], 2023, 1), axis=1).tolist() == \
+        [L2S(1, 2, 2023, 1), L2S(1, 3, 2023, 1)]
+
+
+def test_lunar_anchor_cache_counts_hits():
+    """getLunarMonth11 / getLeapMonthOffset chỉ tính một lần mỗi năm"""
+    from lasotuvi.Lich_HND import (clearLunarCache, getLeapMonthOffset,
+                                   getLunarMonth11, lunarCacheStats)
+
+    clearLunarCache()
+    first = astronomicalS2L(22, 3, 2023, 7)
+    after = lunarCacheStats()
+    assert astronomicalS2L(22, 3, 2023, 7) == first
+    again = lunarCacheStats()
+    for name in ('getLunarMonth11', 'getLeapMonthOffset'):
+        assert again[name]['misses'] == after[name]['misses'] > 0
+        assert again[name]['hits'] > after[name]['hits']
+    # Khớp với cách tính không qua cache
+    assert getLunarMonth11(2023, 7) == getLunarMonth11.__wrapped__(2023, 7)
+    a11 = getLunarMonth11(2022, 7)
+    assert getLeapMonthOffset(a11, 7) == \
+        getLeapMonthOffset.__wrapped__(a11, 7)
+    clearLunarCache()
+    assert lunarCacheStats()['getLunarMonth11'] == {
+        'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 512}
+
+
+def test_lunar_year_days_match_s2l():
+    """LunarYear.days / lunarDays cho cùng kết quả với S2L và canChiNgay"""
+    from lasotuvi.AmDuong import canChiNgay
+    from lasotuvi.Lich_HND import LunarYear, jdFromDate, lunarDays
+
+    year = LunarYear(2023)
+    assert year.leapMonth == 2 and len(year.monthStarts) == 13
+    assert year.lunarMonths[:4] == [1, 2, 2, 3]
+    assert LunarYear(2024).leapMonth == 0
+    assert len(LunarYear(2024).monthStarts) == 12
+
+    days = list(lunarDays(1, 1, 1749, 3 * 365)) \
+        + list(lunarDays(1, 12, 2022, 800))
+    assert len(days) == 3 * 365 + 800
+    for day in days:
+        assert jdToDate(day.jd) == [day.day, day.month, day.year]
+        assert [day.lunarDay, day.lunarMonth, day.lunarYear,
+                day.lunarLeap] == S2L(day.day, day.month, day.year)
+        assert [day.canNgay, day.chiNgay] == \
+            canChiNgay(day.day, day.month, day.year)
+    assert list(year.days(jdFromDate(21, 3, 2023),
+                          jdFromDate(23, 3, 2023)))[-1].lunarLeap == 1
+
+
+def _jdFromDate_float(dd, mm, yy):
+    # Bản gốc dùng phép chia số thực
+    a = int((14 - mm) / 12.)
+    y = yy + 4800 - a
+    m = mm + 12 * a - 3
+    jd = dd + int((153 * m + 2) / 5.) + 365 * y + int(y / 4.) \
+        - int(y / 100.) + int(y / 400.) - 32045
+    if (jd < 2299161):
+        jd = dd + int((153 * m + 2) / 5.) + 365 * y + int(y / 4.) - 32083
+    return jd
+
+
+def _jdToDate_float(jd):
+    if (jd > 2299160):
+        a = jd + 32044
+        b = int((4 * a + 3) / 146097.)
+        c = a - int((b * 146097) / 4.)
+    else:
+        b = 0
+        c = jd + 32082
+    d = int((4 * c + 3) / 1461.)
+    e = c - int((1461 * d) / 4.)
+    m = int((5 * e + 2) / 153.)
+    return [e - int((153 * m + 2) / 5.) + 1, m + 3 - 12 * int(m / 10.),
+            b * 100 + d - 4800 + int(m / 10.)]
+
+
+def test_integer_julian_day_matches_float_version():
+    """jdFromDate / jdToDate số nguyên khớp bản số thực từ năm 1 tới 3000"""
+    import numpy as np
+    from lasotuvi.Lich_HND import jdFromDate, jdFromDate_list, jdToDate_list
+    from lasotuvi.vectorized import jdFromDate_batch, jdToDate_batch
+
+    jds = list(range(_jdFromDate_float(1, 1, 1),
+                     _jdFromDate_float(31, 12, 3000) + 1))
+    dates = [_jdToDate_float(jd) for jd in jds]
+    assert jdToDate_list(jds) == dates
+    assert jdFromDate_list(dates) == jds
+    # Cả ngày không hợp lệ (30/2, 31/4...) cũng phải cho cùng kết quả
+    for yy in range(1, 3001, 7):
+        for mm in range(1, 13):
+            for dd in (29, 30, 31):
+                assert jdFromDate(dd, mm, yy) == _jdFromDate_float(dd, mm, yy)
+
+    dd, mm, yy = jdToDate_batch(jds)
+    assert (np.stack([dd, mm, yy], axis=1) == np.array(dates)).all()
+    assert (jdFromDate_batch(dd, mm, yy) == jds).all()
+
+
+def test_solar_term_table_matches_sun_longitude():
+    """Bảng tiết khí khớp với kinh độ mặt trời từng ngày, cả ngoài bảng"""
+    from lasotuvi.Lich_HND import (SOLAR_TERM_NAMES, getSolarTerm,
+                                   getSolarTermTable, getSunLongitude,
+                                   jdFromDate, majorTermOf, nextSolarTerm,
+                                   solarTermOf)
+
+    table = getSolarTermTable(7)
+    term = getSolarTerm(table.entries[0], 7)
+    for jd in range(table.entries[0], table.entries[-1]):
+        # Ngày chuyển tiết thuộc về tiết mới
+        start = getSolarTerm(jd + 1, 7)
+        if start != term:
+            entry = jd
+            term = start
+        if jd % 5 == 0:
+            assert majorTermOf(jd, 7) == getSunLongitude(jd, 7)
+        if jd % 3 == 0 or jd == entry:
+            assert table.solarTermOf(jd) == (term, entry)
+    # Ngoài bảng tính trực tiếp
+    for jd in (jdFromDate(1, 1, 1700), jdFromDate(4, 2, 2300)):
+        here, after = solarTermOf(jd), nextSolarTerm(jd)
+        assert here.jd <= jd < after.jd
+        assert after.term == (here.term + 1) % 24
+        assert solarTermOf(after.jd) == after
+        assert solarTermOf(after.jd - 1) == here
+
+    lapXuan = solarTermOf(jdFromDate(4, 2, 2024))
+    assert SOLAR_TERM_NAMES[lapXuan.term] == "Lập xuân"
+    assert jdToDate(lapXuan.jd) == [4, 2, 2024]
+    assert jdToDate(nextSolarTerm(lapXuan.jd).jd) == [19, 2, 2024]
+    assert SOLAR_TERM_NAMES[solarTermOf(jdFromDate(21, 12, 2024)).term] \
+        == "Đông chí"
+
+
+def test_month_grid_matches_s2l():
+    """Lưới lịch tháng khớp với S2L, solarTermOf từng ngày"""
+    from lasotuvi.Lich_HND import S2L, jdFromDate, solarTermOf
+    from lasotuvi.lichvannien import thangLich
+
+    for nam in range(1900, 2101, 13):
+        for thang in range(1, 13):
+            luoi = thangLich(thang, nam)
+            assert len(luoi) % 7 == 0 and len(luoi) <= 42
+            assert luoi[0].jd % 7 == 0
+            assert [ngay.ngay for ngay in luoi if ngay.trongThang][0] == 1
+            for ngay in luoi:
+                assert jdFromDate(ngay.ngay, ngay.thang, ngay.nam) == ngay.jd
+                assert S2L(ngay.ngay, ngay.thang, ngay.nam) == [
+                    ngay.ngayAm, ngay.thangAm, ngay.namAm, ngay.thangNhuan]
+                tiet = solarTermOf(ngay.jd)
+                assert (ngay.tietKhi, ngay.vaoTiet) == \
+                    (tiet.term, tiet.jd == ngay.jd)
+
+
+def test_good_days_batch_matches_scalar():
+    """Chấm ngày bằng NumPy khớp xemNgay từng ngày, ngayTot lấy đúng thứ tự"""
+    from lasotuvi import xemngay
+    from lasotuvi.Lich_HND import jdFromDate
+    from lasotuvi.vectorized import xemNgay_batch
+
+    # Mùng 1 Tết Giáp Thìn là ngày Giáp Thìn, Kim Quỹ hoàng đạo; tuổi Mậu
+    # Tuất xung ngày Thìn
+    tet = xemngay.xemNgay(jdFromDate(10, 2, 2024), 5, 11)
+    assert xemngay.THAP_NHI_THAN[tet.than] == "Kim Quỹ"
+    assert tet.quanHeChi & xemngay.LUC_XUNG
+    assert "Lục xung với tuổi" in xemngay.lyDo(tet)
+    # Lập xuân 2024 vào 4/2, hôm trước là Tứ tuyệt
+    assert xemngay.xemNgay(jdFromDate(3, 2, 2024), 5, 11).ngayKy \
+        == xemngay.TU_TUYET
+
+    tuNgay = jdFromDate(1, 1, 2024)
+    for canNam, chiNam in ((1, 1), (5, 11), (10, 12)):
+        batch = xemNgay_batch(range(tuNgay, tuNgay + 400), canNam, chiNam)
+        tatCa = [xemngay.xemNgay(jd, canNam, chiNam)
+                 for jd in range(tuNgay, tuNgay + 400)]
+        assert [tuple(int(v[i]) for v in batch) for i in range(400)] \
+            == tatCa
+        top = xemngay.ngayTot(tuNgay, tuNgay + 399, canNam, chiNam, 12)
+        assert top == sorted(tatCa, key=lambda n: (-n.diem, n.jd))[:12]